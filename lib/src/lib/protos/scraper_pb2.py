@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import struct_pb2 as google_dot_protobuf_dot_struct__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n lib/src/lib/protos/scraper.proto\x12\x07scraper\x1a\x1cgoogle/protobuf/struct.proto\"<\n\rScrapeRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\":\n\x0eScrapeResponse\x12(\n\x07\x63ontent\x18\x01 \x01(\x0b\x32\x17.google.protobuf.Struct2F\n\x07Scraper\x12;\n\x06Scrape\x12\x16.scraper.ScrapeRequest\x1a\x17.scraper.ScrapeResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n lib/src/lib/protos/scraper.proto\x12\x07scraper\x1a\x1cgoogle/protobuf/struct.proto\"H\n\rScrapeRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\n\n\x02id\x18\x04 \x01(\t\"U\n\x0eScrapeResponse\x12(\n\x07\x63ontent\x18\x01 \x01(\x0b\x32\x17.google.protobuf.Struct\x12\n\n\x02id\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\";\n\x12ScrapeBatchRequest\x12%\n\x05pages\x18\x01 \x03(\x0b\x32\x16.scraper.ScrapeRequest\"=\n\x13ScrapeBatchResponse\x12&\n\x05pages\x18\x01 \x03(\x0b\x32\x17.scraper.ScrapeResponse2\xd9\x01\n\x07Scraper\x12;\n\x06Scrape\x12\x16.scraper.ScrapeRequest\x1a\x17.scraper.ScrapeResponse\"\x00\x12J\n\x0bScrapeBatch\x12\x1b.scraper.ScrapeBatchRequest\x1a\x1c.scraper.ScrapeBatchResponse\"\x00\x12\x45\n\x0cScrapeStream\x12\x16.scraper.ScrapeRequest\x1a\x17.scraper.ScrapeResponse\"\x00(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -23,9 +23,13 @@ if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
   _globals['_SCRAPEREQUEST']._serialized_start=75
-  _globals['_SCRAPEREQUEST']._serialized_end=135
-  _globals['_SCRAPERESPONSE']._serialized_start=137
-  _globals['_SCRAPERESPONSE']._serialized_end=195
-  _globals['_SCRAPER']._serialized_start=197
-  _globals['_SCRAPER']._serialized_end=267
+  _globals['_SCRAPEREQUEST']._serialized_end=147
+  _globals['_SCRAPERESPONSE']._serialized_start=149
+  _globals['_SCRAPERESPONSE']._serialized_end=234
+  _globals['_SCRAPEBATCHREQUEST']._serialized_start=236
+  _globals['_SCRAPEBATCHREQUEST']._serialized_end=295
+  _globals['_SCRAPEBATCHRESPONSE']._serialized_start=297
+  _globals['_SCRAPEBATCHRESPONSE']._serialized_end=358
+  _globals['_SCRAPER']._serialized_start=361
+  _globals['_SCRAPER']._serialized_end=578
 # @@protoc_insertion_point(module_scope)
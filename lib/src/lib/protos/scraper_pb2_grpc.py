@@ -19,6 +19,16 @@ class ScraperStub(object):
                 request_serializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeRequest.SerializeToString,
                 response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeResponse.FromString,
                 )
+        self.ScrapeBatch = channel.unary_unary(
+                '/scraper.Scraper/ScrapeBatch',
+                request_serializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeBatchRequest.SerializeToString,
+                response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeBatchResponse.FromString,
+                )
+        self.ScrapeStream = channel.stream_stream(
+                '/scraper.Scraper/ScrapeStream',
+                request_serializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeRequest.SerializeToString,
+                response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeResponse.FromString,
+                )
 
 
 class ScraperServicer(object):
@@ -30,6 +40,18 @@ class ScraperServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ScrapeBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ScrapeStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ScraperServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -38,6 +60,16 @@ def add_ScraperServicer_to_server(servicer, server):
                     request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeRequest.FromString,
                     response_serializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeResponse.SerializeToString,
             ),
+            'ScrapeBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ScrapeBatch,
+                    request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeBatchRequest.FromString,
+                    response_serializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeBatchResponse.SerializeToString,
+            ),
+            'ScrapeStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.ScrapeStream,
+                    request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeRequest.FromString,
+                    response_serializer=lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'scraper.Scraper', rpc_method_handlers)
@@ -64,3 +96,37 @@ class Scraper(object):
             lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeResponse.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ScrapeBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/scraper.Scraper/ScrapeBatch',
+            lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeBatchRequest.SerializeToString,
+            lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeBatchResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ScrapeStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/scraper.Scraper/ScrapeStream',
+            lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeRequest.SerializeToString,
+            lib_dot_src_dot_lib_dot_protos_dot_scraper__pb2.ScrapeResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import struct_pb2 as google_dot_protobuf_dot_struct__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n lib/src/lib/protos/storage.proto\x12\x07storage\x1a\x1cgoogle/protobuf/struct.proto\"\xa2\x01\n\x0cStoreRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12)\n\x05pages\x18\x03 \x03(\x0b\x32\x1a.storage.StoreRequest.Page\x1aH\n\x04Page\x12\x0b\n\x03url\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\x12%\n\x04meta\x18\x03 \x01(\x0b\x32\x17.google.protobuf.Struct\"P\n\rStoreResponse\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\x14\n\x07n_pages\x18\x03 \x01(\x05H\x00\x88\x01\x01\x42\n\n\x08_n_pages\"/\n\x0ePendingRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\"?\n\x0fPendingResponse\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05pages\x18\x03 \x03(\t\"<\n\x0c\x43heckRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05pages\x18\x03 \x03(\t\"=\n\rCheckResponse\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05pages\x18\x03 \x03(\t2\xbd\x01\n\x07Storage\x12\x38\n\x05Store\x12\x15.storage.StoreRequest\x1a\x16.storage.StoreResponse\"\x00\x12>\n\x07Pending\x12\x17.storage.PendingRequest\x1a\x18.storage.PendingResponse\"\x00\x12\x38\n\x05\x43heck\x12\x15.storage.CheckRequest\x1a\x16.storage.CheckResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n lib/src/lib/protos/storage.proto\x12\x07storage\x1a\x1cgoogle/protobuf/struct.proto\"\xa2\x01\n\x0cStoreRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12)\n\x05pages\x18\x03 \x03(\x0b\x32\x1a.storage.StoreRequest.Page\x1aH\n\x04Page\x12\x0b\n\x03url\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\x12%\n\x04meta\x18\x03 \x01(\x0b\x32\x17.google.protobuf.Struct\"m\n\nStoreChunk\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\x0b\n\x03url\x18\x03 \x01(\t\x12%\n\x04meta\x18\x04 \x01(\x0b\x32\x17.google.protobuf.Struct\x12\x0c\n\x04\x64\x61ta\x18\x05 \x01(\x0c\"\x93\x02\n\rStoreResponse\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\x14\n\x07n_pages\x18\x03 \x01(\x05H\x00\x88\x01\x01\x12*\n\x05pages\x18\x04 \x03(\x0b\x32\x1b.storage.StoreResponse.Page\x1a\x94\x01\n\x04Page\x12\x0b\n\x03url\x18\x01 \x01(\t\x12\x32\n\x06status\x18\x02 \x01(\x0e\x32\".storage.StoreResponse.Page.Status\x12\x0c\n\x04\x66ile\x18\x03 \x01(\t\"=\n\x06Status\x12\n\n\x06\x46\x41ILED\x10\x00\x12\x0b\n\x07\x43REATED\x10\x01\x12\x0b\n\x07UPDATED\x10\x02\x12\r\n\tUNCHANGED\x10\x03\x42\n\n\x08_n_pages\"/\n\x0ePendingRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\"?\n\x0fPendingResponse\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05pages\x18\x03 \x03(\t\"X\n\x0cLeaseRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05owner\x18\x03 \x01(\t\x12\r\n\x05limit\x18\x04 \x01(\x05\x12\x0b\n\x03ttl\x18\x05 \x01(\x05\"\x19\n\nLeasedPage\x12\x0b\n\x03url\x18\x01 \x01(\t\"]\n\x0eReleaseRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05owner\x18\x03 \x01(\t\x12\r\n\x05pages\x18\x04 \x03(\t\x12\x0e\n\x06\x66\x61iled\x18\x05 \x01(\x08\"\"\n\x0fReleaseResponse\x12\x0f\n\x07n_pages\x18\x01 \x01(\x05\"<\n\x0c\x43heckRequest\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05pages\x18\x03 \x03(\t\"=\n\rCheckResponse\x12\x0e\n\x06market\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\r\n\x05pages\x18\x03 \x03(\t2\xf6\x02\n\x07Storage\x12\x38\n\x05Store\x12\x15.storage.StoreRequest\x1a\x16.storage.StoreResponse\"\x00\x12>\n\x0bStoreStream\x12\x13.storage.StoreChunk\x1a\x16.storage.StoreResponse\"\x00(\x01\x12>\n\x07Pending\x12\x17.storage.PendingRequest\x1a\x18.storage.PendingResponse\"\x00\x12\x37\n\x05Lease\x12\x15.storage.LeaseRequest\x1a\x13.storage.LeasedPage\"\x00\x30\x01\x12>\n\x07Release\x12\x17.storage.ReleaseRequest\x1a\x18.storage.ReleaseResponse\"\x00\x12\x38\n\x05\x43heck\x12\x15.storage.CheckRequest\x1a\x16.storage.CheckResponse\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -26,16 +26,30 @@ if _descriptor._USE_C_DESCRIPTORS == False:
   _globals['_STOREREQUEST']._serialized_end=238
   _globals['_STOREREQUEST_PAGE']._serialized_start=166
   _globals['_STOREREQUEST_PAGE']._serialized_end=238
-  _globals['_STORERESPONSE']._serialized_start=240
-  _globals['_STORERESPONSE']._serialized_end=320
-  _globals['_PENDINGREQUEST']._serialized_start=322
-  _globals['_PENDINGREQUEST']._serialized_end=369
-  _globals['_PENDINGRESPONSE']._serialized_start=371
-  _globals['_PENDINGRESPONSE']._serialized_end=434
-  _globals['_CHECKREQUEST']._serialized_start=436
-  _globals['_CHECKREQUEST']._serialized_end=496
-  _globals['_CHECKRESPONSE']._serialized_start=498
-  _globals['_CHECKRESPONSE']._serialized_end=559
-  _globals['_STORAGE']._serialized_start=562
-  _globals['_STORAGE']._serialized_end=751
+  _globals['_STORECHUNK']._serialized_start=240
+  _globals['_STORECHUNK']._serialized_end=349
+  _globals['_STORERESPONSE']._serialized_start=352
+  _globals['_STORERESPONSE']._serialized_end=627
+  _globals['_STORERESPONSE_PAGE']._serialized_start=467
+  _globals['_STORERESPONSE_PAGE']._serialized_end=615
+  _globals['_STORERESPONSE_PAGE_STATUS']._serialized_start=554
+  _globals['_STORERESPONSE_PAGE_STATUS']._serialized_end=615
+  _globals['_PENDINGREQUEST']._serialized_start=629
+  _globals['_PENDINGREQUEST']._serialized_end=676
+  _globals['_PENDINGRESPONSE']._serialized_start=678
+  _globals['_PENDINGRESPONSE']._serialized_end=741
+  _globals['_LEASEREQUEST']._serialized_start=743
+  _globals['_LEASEREQUEST']._serialized_end=831
+  _globals['_LEASEDPAGE']._serialized_start=833
+  _globals['_LEASEDPAGE']._serialized_end=858
+  _globals['_RELEASEREQUEST']._serialized_start=860
+  _globals['_RELEASEREQUEST']._serialized_end=953
+  _globals['_RELEASERESPONSE']._serialized_start=955
+  _globals['_RELEASERESPONSE']._serialized_end=989
+  _globals['_CHECKREQUEST']._serialized_start=991
+  _globals['_CHECKREQUEST']._serialized_end=1051
+  _globals['_CHECKRESPONSE']._serialized_start=1053
+  _globals['_CHECKRESPONSE']._serialized_end=1114
+  _globals['_STORAGE']._serialized_start=1117
+  _globals['_STORAGE']._serialized_end=1491
 # @@protoc_insertion_point(module_scope)
@@ -20,11 +20,26 @@ class StorageStub(object):
                 request_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreRequest.SerializeToString,
                 response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreResponse.FromString,
                 )
+        self.StoreStream = channel.stream_unary(
+                '/storage.Storage/StoreStream',
+                request_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreChunk.SerializeToString,
+                response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreResponse.FromString,
+                )
         self.Pending = channel.unary_unary(
                 '/storage.Storage/Pending',
                 request_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.PendingRequest.SerializeToString,
                 response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.PendingResponse.FromString,
                 )
+        self.Lease = channel.unary_stream(
+                '/storage.Storage/Lease',
+                request_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.LeaseRequest.SerializeToString,
+                response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.LeasedPage.FromString,
+                )
+        self.Release = channel.unary_unary(
+                '/storage.Storage/Release',
+                request_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.ReleaseRequest.SerializeToString,
+                response_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.ReleaseResponse.FromString,
+                )
         self.Check = channel.unary_unary(
                 '/storage.Storage/Check',
                 request_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.CheckRequest.SerializeToString,
@@ -42,12 +57,30 @@ class StorageServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StoreStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Pending(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Lease(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Release(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Check(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -62,11 +95,26 @@ def add_StorageServicer_to_server(servicer, server):
                     request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreRequest.FromString,
                     response_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreResponse.SerializeToString,
             ),
+            'StoreStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.StoreStream,
+                    request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreChunk.FromString,
+                    response_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreResponse.SerializeToString,
+            ),
             'Pending': grpc.unary_unary_rpc_method_handler(
                     servicer.Pending,
                     request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.PendingRequest.FromString,
                     response_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.PendingResponse.SerializeToString,
             ),
+            'Lease': grpc.unary_stream_rpc_method_handler(
+                    servicer.Lease,
+                    request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.LeaseRequest.FromString,
+                    response_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.LeasedPage.SerializeToString,
+            ),
+            'Release': grpc.unary_unary_rpc_method_handler(
+                    servicer.Release,
+                    request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.ReleaseRequest.FromString,
+                    response_serializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.ReleaseResponse.SerializeToString,
+            ),
             'Check': grpc.unary_unary_rpc_method_handler(
                     servicer.Check,
                     request_deserializer=lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.CheckRequest.FromString,
@@ -100,6 +148,23 @@ class Storage(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def StoreStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/storage.Storage/StoreStream',
+            lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreChunk.SerializeToString,
+            lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.StoreResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def Pending(request,
             target,
@@ -117,6 +182,40 @@ class Storage(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def Lease(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/storage.Storage/Lease',
+            lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.LeaseRequest.SerializeToString,
+            lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.LeasedPage.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Release(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/storage.Storage/Release',
+            lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.ReleaseRequest.SerializeToString,
+            lib_dot_src_dot_lib_dot_protos_dot_storage__pb2.ReleaseResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def Check(request,
             target,
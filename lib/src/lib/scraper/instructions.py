@@ -0,0 +1,167 @@
+# Copyright 2023 Ricardo Yaben
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compiled scraping instructions.
+
+Blueprints and plans describe how to find an element as a list of instructions, e.g.:
+
+    - props: {name: div, class_: listing}
+      attrs: [a]
+    - props: {name: a}
+      attrs: [href]
+
+Compiling them once turns the string props into regular expressions and freezes the
+result, so the same instructions can be run over many pages without any setup.
+"""
+
+import re
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+
+
+@dataclass(frozen=True)
+class Step:
+    """A single instruction: find the elements matching `props` and get `attrs`
+    from each of them
+
+    Attributes:
+        props (Mapping): Arguments for `find_all`, with the strings compiled
+        attrs (tuple[str]): Attributes to get from each element, in order
+    """
+
+    props: Mapping[str, Any]
+    attrs: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Matcher:
+    """Sequence of steps that find some content
+
+    Attributes:
+        steps (tuple[Step]): Steps to run, each over the results of the previous
+        clean (re.Pattern): Expression to clean the text results with
+    """
+
+    steps: tuple[Step, ...] = ()
+    clean: re.Pattern | None = None
+
+
+@dataclass(frozen=True)
+class Field:
+    """A named element of a blueprint or a plan
+
+    Attributes:
+        name (str): Name of the field
+        matcher (Matcher): Compiled instructions to find the field
+        many (bool): Whether the field keeps all the results or only the first one
+        isfixed (bool): Whether the field has a fixed value
+        fixed (Any): Fixed value of the field
+        fields (tuple[Field]): Fields of a group
+    """
+
+    name: str = None
+    matcher: Matcher = None
+    many: bool = False
+    isfixed: bool = False
+    fixed: Any = None
+    fields: tuple["Field", ...] = None
+
+
+def compile_props(prop) -> Any:
+    """Compile the strings in the properties into regular expressions.
+    Unlike `Scraper.map_properties`, the original properties are left untouched
+
+    Args:
+        prop (Any): Property or dictionary of properties
+
+    Returns:
+        Any: Compiled property
+    """
+    if isinstance(prop, Mapping):
+        return {k: compile_props(v) for k, v in prop.items()}
+
+    if isinstance(prop, str):
+        return re.compile(prop)
+
+    return prop
+
+
+def compile_instructions(
+    instructions: list[dict[Any, Any]] | Matcher, clean: str = None
+) -> Matcher:
+    """Compile a list of instructions
+
+    Args:
+        instructions (list[dict]): Instructions with their `props` and `attrs`
+        clean (str): Expression to clean the results with
+
+    Returns:
+        Matcher: Compiled instructions
+    """
+    if isinstance(instructions, Matcher):
+        return instructions
+
+    steps = tuple(
+        Step(
+            props=MappingProxyType(compile_props(instruction.get("props"))),
+            attrs=tuple(instruction.get("attrs", [])),
+        )
+        for instruction in instructions or []
+    )
+
+    return Matcher(steps=steps, clean=re.compile(str(clean)) if clean else None)
+
+
+def compile_field(element: dict[Any, Any] | Field) -> Field:
+    """Compile a field of a blueprint or an element of a plan
+
+    Args:
+        element (dict): Field with its name, instructions, fields, etc.
+
+    Returns:
+        Field: Compiled field
+    """
+    if isinstance(element, Field):
+        return element
+
+    matcher = None
+    if "instructions" in element:
+        matcher = compile_instructions(element.get("instructions"), element.get("clean"))
+
+    fields = None
+    if "fields" in element:
+        fields = compile_fields(element.get("fields"))
+
+    return Field(
+        name=element.get("name"),
+        matcher=matcher,
+        many="many" in element,
+        isfixed="fixed" in element,
+        fixed=element.get("fixed"),
+        fields=fields,
+    )
+
+
+def compile_fields(elements: list[dict[Any, Any]] | None) -> tuple[Field, ...]:
+    """Compile a list of fields
+
+    Args:
+        elements (list[dict]): Fields of a blueprint or elements of a plan
+
+    Returns:
+        tuple[Field]: Compiled fields
+    """
+    return tuple(compile_field(element) for element in elements or [])
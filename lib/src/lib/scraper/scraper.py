@@ -19,6 +19,11 @@ from typing import Any
 
 from bs4 import BeautifulSoup
 
+from lib.scraper.instructions import Matcher, compile_instructions
+
+# Attribute of the responses that holds their parsed document
+_DOCUMENT = "_document"
+
 
 @dataclass
 class Scraper:
@@ -32,9 +37,26 @@ class Scraper:
         content = BeautifulSoup(html, "lxml")
         return cls(content=content)
 
-    def clean(self, data: str, expression: str = None) -> str:
+    @classmethod
+    def from_response(cls, response):
+        """Scraper for the content of a response. The document is parsed only once,
+        the tree is kept in the response and shared by every scraper made from it.
+        The tree must be treated as read-only.
+        """
+        content = getattr(response, _DOCUMENT, None)
+
+        if content is None:
+            content = BeautifulSoup(response.content, "lxml")
+            setattr(response, _DOCUMENT, content)
+
+        return cls(content=content)
+
+    def clean(self, data: str, expression: str | re.Pattern = None) -> str:
         if expression:
-            exp = re.compile(str(expression))
+            exp = expression
+            if not isinstance(exp, re.Pattern):
+                exp = re.compile(str(expression))
+
             groups = exp.search(data)
             if groups:
                 ret = groups.group()
@@ -45,34 +67,37 @@ class Scraper:
     def process(
         self,
         content,
-        instructions: list[dict[Any, Any]],
+        instructions: list[dict[Any, Any]] | Matcher,
         clean_expr: str = None,
     ):
+        """Run the instructions over the content.
+        Compile the instructions with `compile_instructions` to run them many times.
+        """
+        matcher = compile_instructions(instructions, clean_expr)
+        return self.run(content, matcher)
+
+    def run(self, content, matcher: Matcher, index: int = 0):
+        """Run the compiled instructions over the content, from the step at `index`"""
         # Continue only if there is content or an instruction
         iscontent = hasattr(content, "find_all")
-        if not (iscontent and instructions):
+        if not (iscontent and index < len(matcher.steps)):
             return content
 
-        instruction = instructions.pop(0)
+        step = matcher.steps[index]
         results: list = []
 
         # Find the element(s)
-        props = instruction.get("props")
-        props = self.map_properties(props)
-        found = content.find_all(**props)
-
-        # Get the attribute(s)
-        attrs = instruction.get("attrs", [])
+        found = content.find_all(**step.props)
 
         for el in found:
-            for attr in attrs:
+            # Get the attribute(s)
+            for attr in step.attrs:
                 el = self.get_attribute(content=el, attribute=attr)
 
-            # Copy the list of instructions for each of the results
+            # Each of the results runs the rest of the steps
             # NOTE: It will cause the results to create branches and groups
             # of results
-            cp = instructions.copy()
-            branch = self.process(el, cp, clean_expr)
+            branch = self.run(el, matcher, index + 1)
 
             # If the branch is a single value, add it to the list
             # of results, otherwise, join the list of the results
@@ -81,7 +106,7 @@ class Scraper:
                     results += branch
                 else:
                     if isinstance(branch, str):
-                        branch = self.clean(branch, clean_expr)
+                        branch = self.clean(branch, matcher.clean)
                     results.append(branch)
 
         return results
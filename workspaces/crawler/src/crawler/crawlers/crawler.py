@@ -32,8 +32,8 @@ class Crawler(CrawlerProtocol):
         # Clean the url
         clean = self.clean(url)
 
-        # Request the page
-        response = session.request(clean)
+        # Request the page. The budget hears about it once it is validated
+        response = session.request(clean, feedback=not validate)
 
         # Validate the response if necessary
         if not validate:
@@ -42,9 +42,13 @@ class Crawler(CrawlerProtocol):
         # If there is a response continue, otherwise
         # try again without validation this time
         if not response:
+            session.feedback(response)
             return self.crawl(session=session, url=url, validate=False)
 
         valid = self.validate(response)
+        # Invalid content is often the server pushing back, e.g. a captcha
+        session.feedback(response, valid=valid)
+
         if valid:
             return response
 
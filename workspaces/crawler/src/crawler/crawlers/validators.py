@@ -3,6 +3,7 @@ from typing import Any
 from crawler.crawlers.factory import ValidatorFactory
 from crawler.crawlers.interfaces import Validator
 
+from lib.scraper.instructions import Field, compile_fields
 from lib.scraper.scraper import Scraper
 from lib.logger.logger import log
 
@@ -27,26 +28,29 @@ class ContentValidator(Validator):
     invalid: list[dict[Any, Any]] = field(default_factory=list)
     required: list[dict[Any, Any]] = field(default_factory=list)
 
+    def __post_init__(self):
+        # Compile the instructions once, every response is validated against them
+        self.invalid: tuple[Field, ...] = compile_fields(self.invalid)
+        self.required: tuple[Field, ...] = compile_fields(self.required)
+
     def isValid(self, obj) -> bool:
         if not hasattr(obj, "text"):
             return False
 
-        content = obj.content
-        scraper = Scraper.from_html(content)
+        # The document is shared with the other validators and the strategy
+        scraper = Scraper.from_response(obj)
 
-        for element in self.invalid.copy():
-            instructions: list = element.get("instructions").copy()
-            found = scraper.process(scraper.content, instructions=instructions)
+        for element in self.invalid:
+            found = scraper.run(scraper.content, element.matcher)
             if found:
-                log.error(f"Found invalid element: {element.get('name')}")
+                log.error(f"Found invalid element: {element.name}")
                 return False
 
-        for element in self.required.copy():
-            instructions: list = element.get("instructions").copy()
-            found = scraper.process(scraper.content, instructions=instructions)
+        for element in self.required:
+            found = scraper.run(scraper.content, element.matcher)
 
             if not found:
-                log.error(f"Failed to find required element: {element.get('name')}")
+                log.error(f"Failed to find required element: {element.name}")
                 return False
 
         return True
\ No newline at end of file
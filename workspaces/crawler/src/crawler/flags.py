@@ -7,7 +7,7 @@ from crawler.crawlers.factory import ValidatorFactory
 from crawler.session.session import SessionManager, new_session
 from crawler.strategies.factory import StrategyFactory
 from crawler.strategies.interfaces import Strategy
-from crawler.strategies.page import Page, make_pages
+from crawler.strategies.page import SPILL_SIZE, Page, make_pages
 from crawler.strategies.plan import Plan
 from crawler.stubs.interfaces import Core, Planner, Storage
 
@@ -27,7 +27,11 @@ class StrategyNotFound(Exception):
     pass
 
 def get_strategy(
-    model: str, plan: Plan, session: SessionManager, storage: Storage
+    model: str,
+    plan: Plan,
+    session: SessionManager,
+    storage: Storage,
+    spill_size: int = SPILL_SIZE,
 ) -> Strategy | None:
     
     strategy: Strategy = StrategyFactory.get_strategy(model)
@@ -51,7 +55,7 @@ def get_strategy(
     )
 
     kwargs: dict[Any, Any] = dict(
-        crawler=crawler, session=session, storage=storage, model=model
+        crawler=crawler, session=session, storage=storage, model=model, spill_size=spill_size
     )
 
     # Get the strategy model unique elements
@@ -66,31 +70,42 @@ def get_strategy(
 
 
 def pending_loop(market: str, model: str, storage: Storage, **kwargs):
-    """Request pending pages from the database.
-    This loop continues until there are no more pending items in the database
-
-    NOTE: This need a fix, either on the database or extending this function
-    to keep track of those items that are not reachable!
+    """Lease pending pages from the database and crawl them.
+    This loop continues until there are no more pages to lease. Pages that could not be
+    crawled are released as failed, the storage retries them later with a backoff and
+    gives up on them after a few attempts.
 
     Args:
         market (str): Name of the market
         model (str): Name of the model as is in the database
         storage (Storage): Storage Stub or server
     """
-    pending: list[Page] = storage.pending(market=market, model=model)
+    leased: list[Page] = storage.lease(market=market, model=model)
 
-    while pending:
-        log.info(f"{len(pending)} pending {model}(s)")
+    while leased:
+        log.info(f"{len(leased)} pending {model}(s)")
 
         # Get the strategy
         strat = get_strategy(**kwargs, storage=storage, model=model)
-        strat.start(pages=pending, check=False)  # Do not check the pages
+        stored = strat.start(pages=leased, check=False)  # Do not check the pages
+
+        # Give back the pages that did not make it to the storage
+        urls = {page.url for page in stored or []}
+        failed = [page for page in leased if page.url not in urls]
+        if failed:
+            storage.release(market=market, model=model, pages=failed)
 
         # Repeat until there are no more pending
-        pending: list[Page] = storage.pending(market=market, model=model)
+        leased: list[Page] = storage.lease(market=market, model=model)
 
 
-def start(storage: Storage, core: Core, planner: Planner) -> str:
+def start(
+    storage: Storage,
+    core: Core,
+    planner: Planner,
+    budget: str = "simple",
+    spill_size: int = SPILL_SIZE,
+) -> str:
     """Build the strategies and start the crawl"""
 
     while True:
@@ -105,7 +120,10 @@ def start(storage: Storage, core: Core, planner: Planner) -> str:
             continue
 
         # Create a new session instance
-        session: SessionManager = new_session(cookies_fn=core.cookies)
+        meta: dict = plan.data.get("meta") or {}
+        session: SessionManager = new_session(
+            cookies_fn=core.cookies, budget=budget, market=market, domain=meta.get("domain")
+        )
         session.auth(market)
 
         # Stablish some common ground
@@ -113,6 +131,7 @@ def start(storage: Storage, core: Core, planner: Planner) -> str:
             plan=plan,
             session=session,
             storage=storage,
+            spill_size=spill_size,
         )
         pending = partial(pending_loop, market=market, **common)
 
@@ -128,6 +147,8 @@ def start(storage: Storage, core: Core, planner: Planner) -> str:
         categories_strat = get_strategy(**common, model="category")
         categories_strat.start(pages=pages)
 
+        log.info(f"Connections to {market}: {session.pool_stats()}")
+
     # TODO: Add a summary here
 
 def set_logger(name: str, verbose) -> logging.Logger:
@@ -160,7 +181,7 @@ def load_flags(cfg: Config) -> None:
             stubs[client.name] = stub
 
     # Start the crawler
-    start(**stubs)
+    start(**stubs, budget=cfg.budget, spill_size=cfg.spill_size)
 
 
     
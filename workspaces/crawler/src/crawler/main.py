@@ -22,12 +22,17 @@ from crawler.flags import load_flags
 import hydra
 from hydra.core.config_store import ConfigStore
 from crawler.session.networks import set_proxy
+from crawler.strategies.page import SPILL_SIZE
 
 hydra.output_subdir = None
 
 @dataclass
 class CrawlerConfig(Config):
     proxy: str = "localhost"
+    # Budget of the sessions, `simple` or `adaptive`
+    budget: str = "simple"
+    # Page bodies bigger than this, in bytes, are written to disk
+    spill_size: int = SPILL_SIZE
 
 cs = ConfigStore.instance()
 # Registering the Config class with the name 'config'.
@@ -0,0 +1,83 @@
+# Copyright 2023 Ricardo Yaben
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Connection pools of the sessions.
+
+Opening a connection through Tor or I2P means building a circuit, which takes
+seconds. The pools keep as many connections alive to each host as the budget may
+use at once, so the next requests reuse them instead.
+"""
+
+from dataclasses import dataclass
+
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class PoolStats:
+    """Usage of the connection pools
+
+    Attributes:
+        requests (int): Requests sent
+        connections (int): Connections opened, i.e. requests that missed the pool
+    """
+
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def reused(self) -> int:
+        """Requests that reused a connection from the pool"""
+        return max(0, self.requests - self.connections)
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.requests:
+            return 0
+
+        return self.reused / self.requests
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.connections} connections opened, "
+            f"{self.reused} reused ({self.hit_rate:.0%})"
+        )
+
+
+class PooledAdapter(HTTPAdapter):
+    """Adapter with pools sized for the connections of the budget. The same pools
+    are used for the requests through the proxies"""
+
+    def __init__(self, pool_maxsize: int, **kwargs):
+        super().__init__(pool_maxsize=pool_maxsize, pool_block=False, **kwargs)
+
+    def stats(self) -> PoolStats:
+        """Usage of the pools, direct and through the proxies"""
+        stats = PoolStats()
+
+        managers = [self.poolmanager, *self.proxy_manager.values()]
+        for manager in managers:
+            pools = manager.pools
+
+            for key in pools.keys():
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    # Evicted meanwhile
+                    continue
+
+                stats.requests += pool.num_requests
+                stats.connections += pool.num_connections
+
+        return stats
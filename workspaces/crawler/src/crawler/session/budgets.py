@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import jsonlines
+import atexit
 import os
 import random
+import threading
+import time
+import weakref
 
 from abc import abstractmethod
 from dataclasses import dataclass, field
@@ -23,6 +26,13 @@ from statistics import median_high
 from typing import Callable, Protocol
 from uuid import uuid4
 
+import yaml
+
+from lib.logger.logger import log
+
+from crawler.session.records import get_sink
+
+
 @dataclass
 class Record:
     url: str
@@ -42,10 +52,19 @@ class Recommendation:
     connections: int = 1
     records: list[Record] = field(default_factory=list)
     volume: str = "local"
+    # Connections recommended, `connections` are those left
+    concurrency: int = None
+
+    def __post_init__(self):
+        if self.concurrency is None:
+            self.concurrency = self.connections
 
     def success_rate(self) -> float:
         # Percentage of successful connections
-        ret = len([con for con in self.recordds if con.code == 200]) / len(
+        if not self.records:
+            return 0
+
+        ret = len([con for con in self.records if con.code == 200]) / len(
             self.records
         )
 
@@ -53,27 +72,26 @@ class Recommendation:
 
     def respond_time(self) -> float:
         # (High) Median respond time of the connections
+        if not self.records:
+            return 0
+
         respond_times: list[float] = list(map(lambda con: con.respond_time, self.records))
         ret: float = median_high(respond_times)
         return ret
 
     def register(self, record: Record) -> None:
-        """Include a new record and store it"""
-        file_name: str = "records.jsonl"
-        file_path: str = os.path.join(self.volume, file_name)
-        data = record.__dict__
-        
-        with jsonlines.open(file_path, mode="a+", encoding="utf-8") as f:
-            f.write(data)
+        """Include a new record and store it. Records are written in the background,
+        see `RecordsSink`"""
+        get_sink(self.volume).put(dict(record.__dict__))
 
         self.records.append(record)
 
     def record(
         self, response, name: str, url: str, response_code: int, elapsed
     ) -> None:
-        if not response:
+        if response is None:
             return
-        
+
         rec = Record(
             code=response_code,
             respond_time=elapsed,
@@ -96,18 +114,24 @@ class BudgetProtocol(Protocol):
     def consume(self) -> Recommendation:
         raise NotImplementedError
 
+    @abstractmethod
+    def feedback(self, code: int | None, elapsed: float = None, valid: bool = True) -> None:
+        raise NotImplementedError
+
 
 @dataclass
 class Budget(BudgetProtocol):
     """Base for Budgets
 
     Attributes:
+        market (str): Name of the market the budget is for
         recommendation (Recommendation): Current budget recommendation
         records (list[Record]): List of Records from previous requests.
 
         _recommendations (list[Recommendation]): List of previous recommendations
     """
 
+    market: str = None
     recommendation: Recommendation = field(default_factory=Recommendation)
     _recomendations: list[Recommendation] = field(default_factory=list)
 
@@ -125,6 +149,17 @@ class Budget(BudgetProtocol):
     def delay(self) -> float:
         return random.uniform(self._MIN_DELAY, self.recommendation.delay)
 
+    @property
+    def max_connections(self) -> int:
+        """Most connections the budget may recommend at once"""
+        return int(getattr(self, "_MAX_CONNECTIONS", self._MIN_CONNECTIONS))
+
+    @property
+    def interval(self) -> float:
+        """Seconds between two requests to the same host. Each connection waits the
+        delay, so together they request once every `delay / concurrency`"""
+        return self.delay / max(1, self.recommendation.concurrency)
+
     def consume(self) -> Recommendation:
         """Consume one connection from the current recommendation
 
@@ -140,6 +175,15 @@ class Budget(BudgetProtocol):
 
         return self.recommendation
 
+    def feedback(self, code: int | None, elapsed: float = None, valid: bool = True) -> None:
+        """Outcome of a request made with the budget
+
+        Args:
+            code (int): Status code of the response, None if there was no response
+            elapsed (float): Seconds the server took to respond
+            valid (bool): Whether the content of the response was valid
+        """
+
 
 @dataclass
 class BudgetFactory:
@@ -177,3 +221,176 @@ class SimpleBudget(Budget):
         self.recommendation = ret
 
         return ret
+
+
+@BudgetFactory.register("adaptive")
+@dataclass
+class AdaptiveBudget(Budget):
+    """Budget that tunes itself from the outcome of the requests.
+
+    Connections grow by one and the delay shrinks by a step after each round of
+    healthy responses, i.e. one response per connection, fast enough and without
+    errors. On a rate limit, server error, timeout or invalid content, connections
+    are halved and the delay doubled right away (AIMD). It backs off at most once
+    per round, so the requests already in flight do not collapse it further.
+
+    What it learns is saved for each market and the next crawl starts from there.
+    It is saved at most every `_SAVE_INTERVAL` seconds while crawling, and when the
+    process exits.
+    """
+
+    name: str = "adaptive"
+    volume: str = os.path.join("local", "markets")
+
+    _MIN_DELAY: float = 0.5
+    _MAX_DELAY: float = 10
+    _DELAY_STEP: float = 0.25
+    _MAX_CONNECTIONS: float = 20
+    # Median seconds to respond above which the server is considered struggling
+    _SLOW: float = 5
+    # Status codes that mean the server is overloaded or limiting us
+    _BACKOFF_CODES: tuple[int, ...] = (408, 429, 500, 502, 503, 504)
+    _SAVE_INTERVAL: float = 60
+
+    _connections: float = 1
+    _delay: float = _MAX_DELAY
+    _round: list[float] = field(default_factory=list)
+    _since_backoff: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    # Whether it learned something since it was saved, and when it was saved
+    _dirty: bool = False
+    _saved: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self.load()
+
+        # Save what is left when the process exits
+        _budgets[:] = [ref for ref in _budgets if ref() is not None]
+        _budgets.append(weakref.ref(self))
+
+    @property
+    def path(self) -> str | None:
+        if self.market:
+            return os.path.join(self.volume, self.market, "budget.yaml")
+
+    def calculate(self) -> Recommendation:
+        with self._lock:
+            ret: Recommendation = Recommendation(
+                delay=self._delay, connections=int(self._connections)
+            )
+
+            self._recomendations.append(self.recommendation)
+            self.recommendation = ret
+
+        return ret
+
+    def feedback(self, code: int | None, elapsed: float = None, valid: bool = True) -> None:
+        with self._lock:
+            self._learn(code=code, elapsed=elapsed, valid=valid)
+
+        # Outside of the lock, the other threads do not wait for the disk
+        if self._dirty and time.monotonic() - self._saved >= self._SAVE_INTERVAL:
+            self.save()
+
+    def _learn(self, code: int | None, elapsed: float = None, valid: bool = True) -> None:
+        self._since_backoff += 1
+
+        if code is None or code in self._BACKOFF_CODES or not valid:
+            self._backoff()
+            return
+
+        self._round.append(elapsed or 0)
+        if len(self._round) < int(self._connections):
+            return
+
+        # A round of responses completed
+        healthy = median_high(self._round) <= self._SLOW
+        self._round = []
+
+        if healthy:
+            self._connections = min(self._MAX_CONNECTIONS, self._connections + 1)
+            self._delay = max(self._MIN_DELAY, self._delay - self._DELAY_STEP)
+        else:
+            self._connections = max(self._MIN_CONNECTIONS, self._connections - 1)
+
+        self._update()
+
+    def _backoff(self) -> None:
+        self._round = []
+
+        if self._since_backoff < int(self._connections):
+            return
+
+        self._since_backoff = 0
+        self._connections = max(self._MIN_CONNECTIONS, self._connections / 2)
+        self._delay = min(self._MAX_DELAY, self._delay * 2)
+
+        self._update()
+
+    def _update(self) -> None:
+        """Apply the new parameters to the current recommendation"""
+        self.recommendation.delay = self._delay
+        self.recommendation.concurrency = int(self._connections)
+        self.recommendation.connections = min(
+            self.recommendation.connections, int(self._connections)
+        )
+        self._dirty = True
+
+    def load(self) -> None:
+        """Start from the parameters learned for the market. An unreadable file is
+        ignored, the budget starts from scratch"""
+        if not self.path or not os.path.isfile(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                learned = yaml.load(f, yaml.loader.SafeLoader) or {}
+
+            connections = float(learned.get("connections", self._connections))
+            delay = float(learned.get("delay", self._delay))
+        except (OSError, yaml.YAMLError, AttributeError, TypeError, ValueError) as e:
+            log.warning(f"Could not load the budget {self.path}: {e}")
+            return
+
+        self._connections = min(self._MAX_CONNECTIONS, max(self._MIN_CONNECTIONS, connections))
+        self._delay = min(self._MAX_DELAY, max(self._MIN_DELAY, delay))
+
+    def save(self) -> None:
+        """Save the parameters learned for the market"""
+        if not self.path:
+            return
+
+        with self._lock:
+            learned = dict(connections=self._connections, delay=self._delay)
+            self._dirty = False
+            self._saved = time.monotonic()
+
+        folder = os.path.dirname(self.path)
+        if not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        # Write and rename, so a crash never leaves half a file behind
+        partial = f"{self.path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with open(partial, "w") as f:
+                yaml.dump(learned, f)
+
+            os.replace(partial, self.path)
+        except OSError as e:
+            log.error(f"Could not save the budget {self.path}: {e}")
+
+
+# Adaptive budgets alive, saved when the process exits
+_budgets: list[weakref.ref] = []
+
+
+def save_budgets() -> None:
+    """Save what every adaptive budget learned"""
+    for ref in list(_budgets):
+        budget = ref()
+
+        if budget is not None and budget._dirty:
+            budget.save()
+
+
+atexit.register(save_budgets)
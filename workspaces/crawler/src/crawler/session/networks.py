@@ -12,16 +12,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+
 from dataclasses import dataclass
 from typing import Callable, Protocol
+from urllib.parse import urlparse
 
 Proxy = "localhost"
 
+# Proxies resolved for each host
+_proxies: dict[str, dict[str, str]] = {}
+_proxies_lock = threading.Lock()
+
 def set_proxy(addr: str):
     global Proxy
 
     Proxy = addr
 
+    # The proxies resolved point to the previous address
+    with _proxies_lock:
+        _proxies.clear()
+
 @dataclass
 class Network(Protocol):
     protocol: str
@@ -67,3 +78,47 @@ class Tor(Network):
 class I2P(Network):
     protocol: str = "http"
     port: int = 4444  # 4444
+
+
+def resolve_network(host: str) -> str:
+    """Name of the network a host is in, after its suffix. Unlike resolving the
+    public suffix, this never needs to look anything up
+
+    Args:
+        host (str): Host name, e.g. `market.onion` or `market.b32.i2p`
+
+    Returns:
+        str: Name of the network
+    """
+    host = (host or "").lower().rstrip(".")
+
+    if host.endswith(".onion"):
+        return "tor"
+
+    # Includes the `.b32.i2p` addresses
+    if host.endswith(".i2p"):
+        return "i2p"
+
+    # Anything else goes through the i2p outproxy, as it always did
+    return "i2p"
+
+
+def get_proxies(url: str) -> dict[str, str]:
+    """Returns the proxies to request the url with. They are resolved once for each
+    host and then reused
+
+    Args:
+        url (str): Url, or domain, to request
+
+    Returns:
+        dict[str, str]: Proxies for http and https. A copy, requests may modify it
+    """
+    # Domains without a scheme are parsed as paths
+    host = urlparse(url if "//" in url else f"//{url}").hostname or ""
+
+    with _proxies_lock:
+        if host not in _proxies:
+            network: Network = NetworkFactory.get_network(resolve_network(host))()
+            _proxies[host] = network.get_proxy()
+
+        return dict(_proxies[host])
@@ -0,0 +1,81 @@
+# Copyright 2023 Ricardo Yaben
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pacing of the requests sent to each host.
+
+Rather than each connection sleeping before its own request, requests are handed
+slots in time for their host, one after the other (leaky bucket). Whoever requests
+only waits for its slot, and the host sees the requests evenly spaced no matter how
+many connections there are.
+"""
+
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+from urllib.parse import urlparse
+
+
+@dataclass
+class Pacer:
+    """Hands out the slots to request each host
+
+    Attributes:
+        _slots (dict[str, float]): Next free slot of each host, in monotonic time
+    """
+
+    _slots: dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _grants: threading.local = field(default_factory=threading.local)
+
+    def reserve(self, url: str, interval: float) -> float:
+        """Reserve the next slot to request the host of the url
+
+        Args:
+            url (str): Url to request
+            interval (float): Seconds between this request and the next one
+
+        Returns:
+            float: Seconds to wait until the slot
+        """
+        host = urlparse(url).netloc
+        now = time.monotonic()
+
+        with self._lock:
+            slot = max(now, self._slots.get(host, now))
+            self._slots[host] = slot + interval
+
+        return slot - now
+
+    @contextmanager
+    def granted(self) -> Iterator[None]:
+        """The thread already waited for its slot, its next request goes right away"""
+        self._grants.granted = True
+        try:
+            yield
+        finally:
+            self._grants.granted = False
+
+    def take(self) -> bool:
+        """Use the grant of the thread, if it has one"""
+        granted = getattr(self._grants, "granted", False)
+        self._grants.granted = False
+
+        return granted
+
+
+# Slots are shared by all the sessions of the process
+pacer: Pacer = Pacer()
@@ -0,0 +1,195 @@
+# Copyright 2023 Ricardo Yaben
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sink for the health records of the requests.
+
+Records are queued in memory and written in batches by a background thread, so
+registering a record does not touch the disk. The log is rotated when it grows too
+big or the day changes, e.g.:
+
+    local/records.jsonl             <- current
+    local/records.2023-05-01.jsonl
+    local/records.2023-05-01.1.jsonl
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, TextIO
+
+from lib.logger.logger import log
+
+
+@dataclass
+class RecordsSink:
+    """Writes records as lines of json in the background
+
+    Attributes:
+        directory (str): Folder of the log
+        name (str): Name of the log, without the extension
+        batch_size (int): Records queued before they are written
+        interval (float): Seconds records wait at most before they are written
+        max_bytes (int): Size of the log before it is rotated
+    """
+
+    directory: str = "local"
+    name: str = "records"
+    batch_size: int = 100
+    interval: float = 5
+    max_bytes: int = 64 * 1024 * 1024  # 64 MiB
+
+    _queue: queue.SimpleQueue = field(default_factory=queue.SimpleQueue, repr=False)
+    _wake: threading.Event = field(default_factory=threading.Event, repr=False)
+    _closed: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _thread: threading.Thread = field(default=None, repr=False)
+
+    _file: TextIO = field(default=None, repr=False)
+    _size: int = 0
+    _day: date = None
+
+    @property
+    def path(self) -> str:
+        """Path to the current log"""
+        return os.path.join(self.directory, f"{self.name}.jsonl")
+
+    def put(self, record: dict[str, Any]) -> None:
+        """Queue a record to be written"""
+        self._queue.put(record)
+
+        if self._thread is None:
+            self._start()
+
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write the records queued"""
+        with self._lock:
+            lines: list[str] = []
+
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                lines.append(json.dumps(record, default=str) + "\n")
+
+            if lines:
+                self._write("".join(lines))
+
+    def close(self) -> None:
+        """Stop the background thread and write the records left"""
+        self._closed.set()
+        self._wake.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._closed.clear()
+                self._thread = threading.Thread(target=self._run, name="records", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+            try:
+                self.flush()
+            except OSError as e:
+                log.error(f"Could not write the records: {e}")
+
+    def _write(self, data: str) -> None:
+        today = datetime.utcnow().date()
+
+        if self._file is None:
+            self._open()
+
+        if self._size and (self._day != today or self._size + len(data) > self.max_bytes):
+            self._rotate()
+            self._open()
+
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _open(self) -> None:
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+        # A log left from before belongs to the day it was last written
+        self._day = datetime.utcnow().date()
+        if self._size:
+            self._day = datetime.utcfromtimestamp(os.path.getmtime(self.path)).date()
+
+    def _rotate(self) -> None:
+        """Move the current log aside, named after its day"""
+        self._file.close()
+        self._file = None
+
+        path = os.path.join(self.directory, f"{self.name}.{self._day.isoformat()}.jsonl")
+
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{self.name}.{self._day.isoformat()}.{n}.jsonl")
+            n += 1
+
+        os.replace(self.path, path)
+
+
+# Sinks of each folder, shared by all the budgets
+_sinks: dict[str, RecordsSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_sink(directory: str = "local") -> RecordsSink:
+    """Returns the records sink of a folder"""
+    with _sinks_lock:
+        if directory not in _sinks:
+            _sinks[directory] = RecordsSink(directory=directory)
+
+        return _sinks[directory]
+
+
+def close_sinks() -> None:
+    """Write the records left of every sink"""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(close_sinks)
@@ -16,13 +16,14 @@
 
 import time
 import requests
-import tldextract
 
 from dataclasses import dataclass, field
 from typing import Any, Callable
 
+from crawler.session.adapters import PoolStats, PooledAdapter
 from crawler.session.budgets import Budget, BudgetFactory, Recommendation
-from crawler.session.networks import Network, NetworkFactory
+from crawler.session.networks import get_proxies
+from crawler.session.pacing import pacer
 
 from lib.logger.logger import log
 
@@ -63,28 +64,54 @@ class SessionManager:
         self._session = session
         self._session.headers.update(**self.headers)
 
+        # Keep alive as many connections to each host as the budget may use, the
+        # same connections are reused through the proxies
+        adapter = PooledAdapter(pool_maxsize=self.budget.max_connections)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
         return self._session
 
+    def pool_stats(self) -> PoolStats:
+        """Returns how often the requests reused a connection"""
+        if not self._session:
+            return PoolStats()
+
+        adapter = self._session.get_adapter("http://")
+        if isinstance(adapter, PooledAdapter):
+            return adapter.stats()
+
+        return PoolStats()
+
     def get_proxy(self, url: str) -> dict:
         """Returns a dictionary with the proxy"""
-        res = tldextract.extract(url)
-        
-        # [9/17/2022] TODO: This has a bug with I2P urls, where tldextract can not capture i2p suffix.
-        prox = "tor" if res.suffix == "onion" else "i2p"
-        
-        network: Network = NetworkFactory.get_network(prox)()
-        return network.get_proxy()
-
-    def request(self, url: str):
+        return get_proxies(url)
+
+    def reserve(self, url: str) -> float:
+        """Reserve a slot to request the url, see `Budget.interval`
+
+        Args:
+            url (str): Url to request
+
+        Returns:
+            float: Seconds to wait until the slot
+        """
+        return pacer.reserve(url, self.budget.interval)
+
+    def request(self, url: str, feedback: bool = True):
         """Returns the list of url's to the new items found in the page
         previous to the last item, if given.
 
         Args:
             url (str): URL page to request
+            feedback (bool): Whether to tell the budget how the request went. Callers
+                that validate the content tell it themselves, see `feedback`
         """
         recommendation: Recommendation = self.budget.consume()
-        delay: float = self.budget.delay
-        time.sleep(delay)
+
+        # Wait for a slot, unless it was waited for already
+        if not pacer.take():
+            time.sleep(self.reserve(url))
 
         try:
             proxies = self.get_proxy(url)
@@ -97,18 +124,35 @@ class SessionManager:
             response = e.response
             log.error(e)
 
-        if response:
+        # Errors have a response too, e.g. 429 or 503
+        if response is not None:
             # Store a health record in the budget
             recommendation.record(
                 response,
                 self.budget.name,
                 response_code=response.status_code,
                 url=url,
-                elapsed=response.elapsed.seconds,
+                elapsed=response.elapsed.total_seconds(),
             )
 
+        if feedback:
+            self.feedback(response)
+
         return response
 
+    def feedback(self, response, valid: bool = True) -> None:
+        """Let the budget adapt to how the server is doing
+
+        Args:
+            response (Response): Response of the request, None if it failed
+            valid (bool): Whether the content of the response is valid
+        """
+        code, elapsed = None, None
+        if response is not None:
+            code, elapsed = response.status_code, response.elapsed.total_seconds()
+
+        self.budget.feedback(code=code, elapsed=elapsed, valid=valid)
+
     def auth(self, market: str) -> bool:
         """Invoke the `cookies` method from
         a stub object, then, if some cookies have been
@@ -131,7 +175,14 @@ class SessionManager:
             return True
 
 
-def new_session(cookies_fn: Callable, budget: str = "simple") -> SessionManager:
+def new_session(
+    cookies_fn: Callable, budget: str = "simple", market: str = None, domain: str = None
+) -> SessionManager:
     bd: Budget = BudgetFactory.get_budget(budget)
-    budget_instance: Budget= bd()
+    budget_instance: Budget= bd(market=market)
+
+    # Resolve the proxies of the market before the first request
+    if domain:
+        get_proxies(domain)
+
     return SessionManager(cookies_fn=cookies_fn, budget=budget_instance)
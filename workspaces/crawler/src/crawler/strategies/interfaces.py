@@ -2,7 +2,7 @@
 from dataclasses import dataclass, field
 from typing import Any, Protocol
 
-from crawler.strategies.page import Page
+from crawler.strategies.page import SPILL_SIZE, Page
 from crawler.session.session import SessionManager
 from crawler.crawlers.crawler import Crawler
 from crawler.stubs.interfaces import Storage
@@ -15,6 +15,8 @@ class Strategy(Protocol):
     storage: Storage
     crawler: Crawler
     elements: list[dict[Any, Any]] = field(default_factory=list)
+    # Page bodies bigger than this, in bytes, are written to disk
+    spill_size: int = SPILL_SIZE
 
     def start(self, pages: list[Page]) -> list[Page]:
         """Starting point for the strategy, the only method that should be used
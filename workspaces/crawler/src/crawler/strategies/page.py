@@ -15,7 +15,7 @@
 import re
 import tempfile
 
-from typing import Any
+from typing import Any, Iterator
 from dataclasses import dataclass, field
 
 import requests
@@ -23,40 +23,128 @@ import requests
 from lib.logger.logger import log
 
 
+# Bodies bigger than this, in bytes, are written to disk
+SPILL_SIZE: int = 1024 * 1024  # 1 MiB
+
+
+@dataclass
+class PageBody:
+    """Content of a crawled page.
+
+    Most pages are small, so their content is kept in memory as it came in the
+    response, without copying it. Only those bigger than the spill size are written
+    to a temporary file, and read back in pieces when sent.
+
+    Attributes:
+        size (int): Length of the content
+        _data (bytes): Content, when kept in memory
+        _file (TemporaryFile): Where the content is written, when spilled
+    """
+
+    size: int = 0
+
+    _data: bytes = None
+    _file: tempfile.TemporaryFile = None
+
+    @classmethod
+    def from_content(cls, content: bytes, spill_size: int = SPILL_SIZE) -> "PageBody":
+        """Keep the content of a response
+
+        Args:
+            content (bytes): Content of the response
+            spill_size (int): Size, in bytes, from which the content is written to disk
+        """
+        body = cls(size=len(content))
+
+        if body.size > spill_size:
+            body._file = tempfile.TemporaryFile()
+            body._file.write(content)
+            log.debug("Content written in Temporary file")
+        else:
+            body._data = bytes(content)
+
+        return body
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    @property
+    def data(self) -> bytes:
+        """The whole content. Spilled bodies are read from the disk"""
+        if self._file:
+            self._file.seek(0)
+            return self._file.read()
+
+        return self._data
+
+    def chunks(self, size: int) -> Iterator[bytes]:
+        """Read the content in pieces of at most `size` bytes"""
+        if self._file:
+            self._file.seek(0)
+
+            while chunk := self._file.read(size):
+                yield chunk
+
+            return
+
+        if not self._data:
+            return
+
+        # Most bodies fit in a single piece, send them as they are
+        if self.size <= size:
+            yield self._data
+            return
+
+        view = memoryview(self._data)
+        for i in range(0, self.size, size):
+            yield bytes(view[i : i + size])
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+
+        self._data = self._file = None
+
+
 @dataclass(order=True, unsafe_hash=True)
 class Page:
     """Wrapper to store information about the page content
 
     Attributes:
         url (str): Relative Url to the page
-        _file (TemporaryFile): Where the content is written
+        _body (PageBody): Content of the page
     """
 
     url: str
     meta: dict[Any, Any] = field(default_factory=dict)
     status_code: int = 0
 
-    _file: tempfile.TemporaryFile = None
+    _body: PageBody = None
     _pk: str = ""
 
     @property
     def crawled(self) -> bool:
-        # Return True if there is a file
-        return self._file is not None
+        # Return True if there is a body
+        return self._body is not None
 
     @property
     def data(self) -> bytes:
-        """Read the content of the file in bytes"""
+        """Content of the page in bytes"""
 
-        if self._file:
-            self._file.seek(0)
-            data = self._file.read()
+        if self._body:
+            data = self._body.data
 
             if data:
-                return bytes(data)
+                return data
 
         log.warning("Attempted to read from an empty Page file")
 
+    def chunks(self, size: int) -> Iterator[bytes]:
+        """Read the content of the page in pieces of at most `size` bytes"""
+        if self._body:
+            yield from self._body.chunks(size)
+
     @property
     def pk(self) -> str:
         # Slugify the url
@@ -64,24 +152,21 @@ class Page:
             self._pk = re.sub("[^a-zA-Z0-9 \n\.]", "_", self.url)
         return self._pk
 
-    def store(self, response: requests.Response) -> tempfile.TemporaryFile:
-        # Get the response and store the content on a temporary file
+    def store(self, response: requests.Response, spill_size: int = SPILL_SIZE) -> PageBody:
+        # Keep the content of the response
         if hasattr(response, "content"):
-            self._file = tempfile.TemporaryFile()
-            self._file.write(response.content)
+            self._body = PageBody.from_content(response.content, spill_size=spill_size)
 
         # Store the status code
         if hasattr(response, "status_code"):
             self.status_code = response.status_code
 
-        log.debug("Content written in Temporary file")
-
-        return self._file
+        return self._body
 
     def close(self) -> None:
-        if self._file:
-            self._file.close()
-            self._file = None
+        if self._body:
+            self._body.close()
+            self._body = None
 
     def serialize(self) -> dict[Any, Any]:
         ret: dict = dict(
@@ -92,7 +177,6 @@ class Page:
         return ret
 
 
-
 @dataclass
 class PageParser:
     rex = re.compile(r"\$\{(?P<var>.*?)\}")
@@ -0,0 +1,142 @@
+# Copyright 2023 Ricardo Yaben
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pipeline stages that run next to the crawler workers"""
+
+import asyncio
+import time
+
+from dataclasses import dataclass, field
+
+from lib.logger.logger import log
+
+from crawler.strategies.page import Page
+from crawler.stubs.interfaces import Storage
+
+
+@dataclass
+class StorePipeline:
+    """Sends the crawled pages to the storage while the crawl goes on.
+
+    Pages are buffered in a bounded queue and sent in small batches, either when
+    the batch is full or when the oldest page in it has waited long enough.
+    When the storage is slow the queue fills up and `put` waits, which slows the
+    crawler workers down instead of piling pages up in memory.
+
+    Attributes:
+        storage (Storage): Storage Stub or server
+        market (str): Name of the market
+        model (str): Name of the model in where the pages must be stored
+
+        batch_size (int): Max. pages sent in a single store call
+        batch_time (float): Max. seconds a page waits for its batch to fill up
+        buffer (int): Max. pages waiting to be sent
+        retry_delay (float): Seconds to wait before retrying a failed store
+        max_retry_delay (float): Upper bound for the retry delay
+
+        stored (list[Page]): Pages stored so far
+    """
+
+    storage: Storage
+    market: str
+    model: str
+
+    batch_size: int = 10
+    batch_time: float = 2
+    buffer: int = 50
+    retry_delay: float = 2
+    max_retry_delay: float = 60
+
+    stored: list[Page] = field(default_factory=list)
+
+    _queue: asyncio.Queue = field(default=None, init=False, repr=False)
+    _task: asyncio.Task = field(default=None, init=False, repr=False)
+
+    async def __aenter__(self) -> "StorePipeline":
+        self._queue = asyncio.Queue(maxsize=self.buffer)
+        self._task = asyncio.create_task(self.consume())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        # Flush whatever is left in the buffer before leaving
+        await self._queue.put(None)
+        await self._task
+
+    async def put(self, page: Page) -> None:
+        """Add a page to the buffer. Waits while the buffer is full"""
+        await self._queue.put(page)
+
+    async def consume(self) -> None:
+        """Send batches to the storage until the pipeline is closed"""
+        closed = False
+
+        while not closed:
+            batch, closed = await self.collect()
+
+            # Send the batch from a thread so the loop keeps serving the workers
+            if batch:
+                self.stored += await asyncio.to_thread(self.send, batch)
+
+                # The storage answered, the content is not needed anymore
+                for page in batch:
+                    page.close()
+
+    async def collect(self) -> tuple[list[Page], bool]:
+        """Wait for the next batch of pages
+
+        Returns:
+            tuple[list[Page], bool]: The batch and whether the pipeline was closed
+        """
+        page: Page = await self._queue.get()
+        if page is None:
+            return [], True
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_time
+        batch: list[Page] = [page]
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+
+            try:
+                page = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+
+            if page is None:
+                return batch, True
+
+            batch.append(page)
+
+        return batch, False
+
+    def send(self, pages: list[Page]) -> list[Page]:
+        """Store the pages, retrying with an increasing delay if it fails
+
+        Returns:
+            list[Page]: Pages the storage has stored
+        """
+        delay = self.retry_delay
+
+        while True:
+            try:
+                return self.storage.store(
+                    pages=pages, market=self.market, model=self.model
+                )
+            except Exception as e:
+                log.error(e)
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
@@ -22,15 +22,18 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from tabulate import tabulate
 
 from lib.logger.logger import log
+from lib.scraper.instructions import Field, compile_field, compile_fields
 from lib.scraper.scraper import Scraper
 
+from crawler.session.pacing import pacer
 from crawler.strategies.page import Page
 from crawler.strategies.factory import StrategyFactory
 from crawler.strategies.interfaces import Strategy
+from crawler.strategies.pipeline import StorePipeline
 from crawler.strategies.state import State
 
 
@@ -43,56 +46,91 @@ class PageStrategy(Strategy):
         return stored
 
     async def run(self, pages: list[Page], check=True) -> list[Page]:
-        p_stored: list[Page] = []
-
         # Check the pages before crawling them
         if check:
             pages = self.new_pages(pages)
 
-        # Crawl each page of the chunk
-        while pages:
-            # Get a chunk of the list
-            conns = self.session.budget.connections
-            chunk = pages[:conns]
-            del pages[:conns]
-
-            # Crawl the pages asynchronously but wait here until this is done
-            with ThreadPoolExecutor(max_workers=len(chunk)) as executor:
-                # Create the tasks
-
-                loop = asyncio.get_event_loop()
-                futures = [
-                    loop.run_in_executor(executor, self.crawl_page, page)
-                    for page in chunk
+        if not pages:
+            return []
+
+        # Feed the pages to the workers through a queue. A worker picks the next
+        # page as soon as it is done with the previous one, so a slow page only
+        # holds its own connection instead of the whole chunk
+        queue: asyncio.Queue = asyncio.Queue()
+        for page in pages:
+            queue.put_nowait(page)
+
+        # As many workers as connections the budget may ever recommend. Each worker
+        # waits for its slot, so the pacing of the budget sets how fast they go,
+        # not the connections left in its current recommendation
+        conns = max(1, min(self.session.budget.max_connections, len(pages)))
+
+        # Crawled pages go straight to the storage pipeline, so storing a page
+        # overlaps with crawling the next ones
+        pipeline = StorePipeline(
+            storage=self.storage, market=self.crawler.market, model=self.model
+        )
+
+        async with pipeline:
+            with ThreadPoolExecutor(max_workers=conns) as executor:
+                workers = [
+                    self.worker(queue=queue, executor=executor, pipeline=pipeline)
+                    for _ in range(conns)
                 ]
+                await asyncio.gather(*workers)
+
+        return pipeline.stored
+
+    async def worker(
+        self,
+        queue: asyncio.Queue,
+        executor: ThreadPoolExecutor,
+        pipeline: StorePipeline,
+    ) -> None:
+        """Crawl pages from the queue until it is empty
+
+        Args:
+            queue (asyncio.Queue): Pages waiting to be crawled
+            executor (ThreadPoolExecutor): Executor shared by all the workers
+            pipeline (StorePipeline): Where to send the crawled pages
+        """
+        loop = asyncio.get_running_loop()
+
+        while not queue.empty():
+            page: Page = queue.get_nowait()
 
-                # Gather the responses and print a finished thing in the console
-                for response, url in await asyncio.gather(*futures):
-                    res = "\u274c"  # Cross mark
+            # Wait for the slot here, the thread is only busy with the request
+            if not page.crawled:
+                await asyncio.sleep(self.session.reserve(self.crawler.clean(page.url)))
 
-                    if response and getattr(response, "content"):
-                        res = "\u2714"  # Tick mark
+            # Crawl the page and print a finished thing in the console
+            response = await loop.run_in_executor(executor, self.paced, self.crawl_page, page)
+            self.report(response=response, url=page.url)
 
-                    print(f"[{res}] {url}")
+            # Only pages with content are worth storing
+            if page.crawled:
+                await pipeline.put(page)
 
-                # Store the pages in the database
-                stored = self.store(
-                    pages=chunk, market=self.crawler.market, model=self.model
-                )
+    def report(self, response, url: str) -> None:
+        res = "\u274c"  # Cross mark
 
-                # Add the pages to the stored variable
-                if stored:
-                    p_stored += chunk
+        if response and getattr(response, "content"):
+            res = "\u2714"  # Tick mark
 
-        return p_stored
+        print(f"[{res}] {url}")
+
+    def paced(self, fn: Callable, *args) -> Any:
+        """Call the function with the slot of its first request already waited for"""
+        with pacer.granted():
+            return fn(*args)
 
     def crawl_page(self, page: Page):
         if not page.crawled:
             response = self.crawler.crawl(session=self.session, url=page.url)
 
             # Store the content of the response, if any
-            page.store(response)
-            return response, page.url
+            page.store(response, spill_size=self.spill_size)
+            return response
 
     def new_pages(self, pages: list[Page]) -> list[Page]:
         """Return only those pages not found in the db"""
@@ -124,15 +162,6 @@ class PageStrategy(Strategy):
 
         return ret
 
-    def store(self, **kwargs):
-        try:
-            stored = self.storage.store(**kwargs)
-            return stored
-        except Exception as e:
-            log.error(e)
-            time.sleep(2)
-            return self.store(**kwargs)
-
     def check(self, **kwargs):
         try:
             in_db = self.storage.check(**kwargs)
@@ -151,6 +180,12 @@ class CategoryStrategy(Strategy):
     # Perhaps, a nice Strategy could recognise this from the plan.
     state: Optional[State] = None
 
+    def __post_init__(self):
+        # Compile the instructions of the elements once, they run on every page
+        self.fields: dict[str, Field] = {
+            element.name: element for element in compile_fields(self.elements)
+        }
+
     def start(self, pages: list[Page]):
         # Load the state for the market
         self.state = State(market=self.crawler.market)
@@ -217,7 +252,7 @@ class CategoryStrategy(Strategy):
             response = self.crawler.crawl(session=self.session, url=url)
 
             if hasattr(response, "content"):
-                found, next_page = self.get_listings(response.content)
+                found, next_page = self.get_listings(response)
 
                 # Regardless if there is a next page, set it on the status and save it.
                 # This will make it so if this is the last page, the next time we crawl this
@@ -242,17 +277,13 @@ class CategoryStrategy(Strategy):
 
         return listings
 
-    def get_listings(self, content) -> list[str]:
-        # Load the content in the scraper
-        scraper: Scraper = Scraper.from_html(content)
-        cp = self.elements.copy()
+    def get_listings(self, response) -> list[str]:
+        # Load the content in the scraper. It was already parsed if validated
+        scraper: Scraper = Scraper.from_response(response)
 
         # Find the listings and the next page elements
-        listing_element = next(filter(lambda x: x.get("name") == "listing", cp))
-        listings = self.find_elements(scraper=scraper, element=listing_element)
-
-        nx_element = next(filter(lambda x: x.get("name") == "next_page", cp))
-        next_page = self.find_elements(scraper=scraper, element=nx_element)
+        listings = self.find_elements(scraper=scraper, element=self.fields["listing"])
+        next_page = self.find_elements(scraper=scraper, element=self.fields["next_page"])
 
         return [listings, next_page]
 
@@ -267,20 +298,21 @@ class CategoryStrategy(Strategy):
             storage=self.storage,
             model="item",
             session=self.session,
+            spill_size=self.spill_size,
         )
 
         # Crawl the pages asynchron.
         stored = strat.start(pages=pages)
         return stored
 
-    def find_elements(self, scraper: Scraper, element: dict[Any, Any]):
+    def find_elements(self, scraper: Scraper, element: dict[Any, Any] | Field):
         """This method finds the listings on the response, and returns
         a list of url's
         """
-        instructions = element.get("instructions").copy()
-        ret = scraper.process(content=scraper.content, instructions=instructions)
+        element = compile_field(element)
+        ret = scraper.run(scraper.content, element.matcher)
 
-        if ("many" not in element) and ret:
+        if not element.many and ret:
             ret = ret.pop(0)
 
         return ret
\ No newline at end of file
@@ -56,12 +56,18 @@ class Core(Stub):
 class Storage(Stub):
     """Storage Protocol"""
 
-    def store(self, pages: list[Page], market: str, model: str) -> bool:
+    def store(self, pages: list[Page], market: str, model: str) -> list[Page]:
         raise NotImplementedError
 
     def pending(self, market: str, model: str) -> list[dict[Any, Any]]:
         raise NotImplementedError
 
+    def lease(self, market: str, model: str) -> list[Page]:
+        raise NotImplementedError
+
+    def release(self, market: str, model: str, pages: list[Page], failed: bool = True) -> int:
+        raise NotImplementedError
+
     def check(self, market: str, model: str, pages: list[str]) -> list[Page]:
         raise NotImplementedError
 
@@ -15,8 +15,9 @@
 from dataclasses import dataclass, field
 import os
 import json
+import socket
 
-from typing import Any
+from typing import Any, Iterator
 from google.protobuf.struct_pb2 import Struct
 
 from lib.logger.logger import log
@@ -26,7 +27,10 @@ from crawler.strategies.page import Page
 from crawler.stubs.interfaces import Storage
 from lib.protos.storage_pb2 import (
     PendingRequest,
-    StoreRequest,
+    LeaseRequest,
+    ReleaseRequest,
+    StoreChunk,
+    StoreResponse,
     CheckRequest,
 )
 from lib.protos.storage_pb2_grpc import StorageStub
@@ -36,31 +40,57 @@ from lib.stubs.interfaces import LocalStubCls
 @StubFactory.register("storage")
 class StorageService(Storage):
     _stub_cls = StorageStub
+    _chunk_size: int = 64 * 1024  # 64 KiB
 
-    def store(self, pages: list[Page], market: str, model: str) -> bool:
-        """Send the content of the pages to the storage service
+    # Pages leased at once, and seconds the lease lasts
+    lease_limit: int = 50
+    lease_ttl: int = 600
+    # Name the storage knows this crawler by when leasing pages
+    owner: str = field(default_factory=lambda: f"{socket.gethostname()}-{os.getpid()}")
+
+    def store(self, pages: list[Page], market: str, model: str) -> list[Page]:
+        """Send the content of the pages to the storage service.
+        The pages are streamed in chunks rather than in a single message
 
         Args:
             pages (list[Page]): Page objects
             market (str): Name of the market
             model (str): Name of the model in where the pages must be stored
         Returns:
-            bool: Whether the pages were stored successfully
+            list[Page]: Pages the storage has, either stored now or unchanged
         """
-        # Serialise all the pages
-        serialised = [page.serialize() for page in pages]
-        serialised = [page for page in serialised if page["data"]]
+        chunks = self._chunks(pages=pages, market=market, model=model)
+        response = self.stub.StoreStream(chunks)
+
+        stored = {
+            page.url
+            for page in response.pages
+            if page.status != StoreResponse.Page.Status.FAILED
+        }
+
+        failed = [page.url for page in pages if page.url not in stored]
+        if failed:
+            log.warning(f"The storage failed to store {len(failed)} page(s): {failed}")
+
+        return [page for page in pages if page.url in stored]
+
+    def _chunks(self, pages: list[Page], market: str, model: str) -> Iterator[StoreChunk]:
+        """Split the pages into chunks to stream them"""
+        for page in pages:
+            first = True
 
-        # Convert the meta into a struct object
-        for page in serialised:
-            s = Struct()
-            s.update(page["meta"])
-            page["meta"] = s
+            for data in page.chunks(self._chunk_size):
+                if not first:
+                    yield StoreChunk(data=data)
+                    continue
 
-        request = StoreRequest(market=market, pages=serialised, model=model)
-        response = self.stub.Store(request)
+                # Convert the meta into a struct object
+                meta = Struct()
+                meta.update(page.meta)
 
-        return response
+                # The first chunk tells which page the data belongs to
+                yield StoreChunk(market=market, model=model, url=page.url, meta=meta, data=data)
+                first = False
 
     def pending(self, market: str, model: str) -> list[dict[Any, Any]]:
         """Returns the list of pending pages to be crawled
@@ -79,6 +109,53 @@ class StorageService(Storage):
 
         return pages
 
+    def lease(self, market: str, model: str) -> list[Page]:
+        """Lease some pending pages to crawl. No other crawler gets these pages until
+        they are stored, released or the lease expires
+
+        Args:
+            market (str): Name of the market
+            model (str): Name of the model as is in the database
+
+        Returns:
+            list[Page]: Pages leased
+        """
+        log.info(f"Leasing pending {model}(s)...")
+        request = LeaseRequest(
+            market=market,
+            model=model,
+            owner=self.owner,
+            limit=self.lease_limit,
+            ttl=self.lease_ttl,
+        )
+
+        pages: list[Page] = [Page(url=page.url) for page in self.stub.Lease(request)]
+
+        return pages
+
+    def release(self, market: str, model: str, pages: list[Page], failed: bool = True) -> int:
+        """Give back leased pages. Failed pages are retried later by any crawler
+
+        Args:
+            market (str): Name of the market
+            model (str): Name of the model as is in the database
+            pages (list[Page]): Pages to release
+            failed (bool): Whether the pages could not be crawled
+
+        Returns:
+            int: Amount of pages released
+        """
+        request = ReleaseRequest(
+            market=market,
+            model=model,
+            owner=self.owner,
+            pages=[page.url for page in pages],
+            failed=failed,
+        )
+        response = self.stub.Release(request)
+
+        return response.n_pages
+
     def check(self, market: str, model: str, pages: list[str]) -> list[str]:
         """Return the list of pages that are found in the database with these attributes
 
@@ -99,9 +176,10 @@ class StorageService(Storage):
 @StubFactory.register("storage", True)
 class LocalStorageService(Storage):
     _stub_cls = LocalStubCls
+    _chunk_size: int = 64 * 1024  # 64 KiB
     _pending: list[Page] = field(default_factory=list)
 
-    def store(self, pages: list[Page], market: str, model: str) -> bool:
+    def store(self, pages: list[Page], market: str, model: str) -> list[Page]:
         """Method to store locally the content of the pages
 
         Args:
@@ -109,7 +187,7 @@ class LocalStorageService(Storage):
             market (str): Name of the market to where they belong
 
         Returns:
-            bool: Whether everything went alright
+            list[Page]: Pages stored
         """
         for page in pages:
             category = page.meta["category"] if "category" in page.meta else None
@@ -125,12 +203,17 @@ class LocalStorageService(Storage):
             if not os.path.exists(local):
                 os.makedirs(local)
 
-            data = page.data
+            chunks = page.chunks(self._chunk_size)
+            data = next(chunks, None)
             if data:
+                # Write the content as it is read, big pages are not loaded at once
                 with open(os.path.join(local, page.pk), "wb") as f:
                     f.write(data)
 
-                # Close the temporary file
+                    for data in chunks:
+                        f.write(data)
+
+                # Release the content
                 page.close()
 
             else:
@@ -139,7 +222,7 @@ class LocalStorageService(Storage):
             # Remove the page from the pending
             self._remove_pending(page.pk)
 
-        return True
+        return pages
 
     def pending(self, market: str, model: str) -> list[Page]:
         """This function returns the list of pending pages to crawl
@@ -175,6 +258,35 @@ class LocalStorageService(Storage):
 
         return self._pending
 
+    def lease(self, market: str, model: str) -> list[Page]:
+        """Locally there is a single crawler, the pending pages are all its own
+
+        Args:
+            market (str): Name of the market being crawled
+            model (str): Name of the table/folder in where the data is stored
+
+        Returns:
+            list[Page]: A list of pending pages
+        """
+        return self.pending(market=market, model=model)
+
+    def release(self, market: str, model: str, pages: list[Page], failed: bool = True) -> int:
+        """Drop the pages from the pending list so they are not leased again in this run
+
+        Args:
+            market (str): Name of the market being crawled
+            model (str): Name of the table/folder in where the data is stored
+            pages (list[Page]): Pages to release
+            failed (bool): Whether the pages could not be crawled
+
+        Returns:
+            int: Amount of pages released
+        """
+        for page in pages:
+            self._remove_pending(page.pk)
+
+        return len(pages)
+
     def _remove_pending(self, identifier: str) -> None:
         """Remove some pages from the pending list
 
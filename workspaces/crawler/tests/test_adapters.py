@@ -0,0 +1,46 @@
+import threading
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawler.session.budgets import BudgetFactory
+from crawler.session.session import SessionManager
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledAdapter(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/" % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuse(self):
+        budget = BudgetFactory.get_budget("adaptive")()
+        manager = SessionManager(budget=budget, cookies_fn=None)
+
+        # The pools are sized for the budget
+        adapter = manager.session.get_adapter(self.url)
+        self.assertEqual(adapter._pool_maxsize, budget.max_connections)
+
+        for _ in range(5):
+            manager.session.get(self.url)
+
+        stats = manager.pool_stats()
+        self.assertEqual((stats.requests, stats.connections, stats.reused), (5, 1, 4))
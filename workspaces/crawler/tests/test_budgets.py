@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from crawler.session.budgets import AdaptiveBudget, BudgetFactory, save_budgets
+
+
+class TestAdaptiveBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def budget(self) -> AdaptiveBudget:
+        return BudgetFactory.get_budget("adaptive")(market="m", volume=self.tmp.name)
+
+    def test_aimd(self):
+        budget = self.budget()
+
+        # Healthy rounds open up the budget
+        for _ in range(20):
+            budget.feedback(code=200, elapsed=0.5)
+        self.assertEqual(budget.calculate().connections, 6)
+        self.assertLess(budget.calculate().delay, budget._MAX_DELAY)
+
+        # A rate limit halves it right away, once per round
+        budget.feedback(code=429)
+        budget.feedback(code=429)
+        self.assertEqual(budget.calculate().connections, 3)
+
+        # Slow responses take connections away
+        for _ in range(3):
+            budget.feedback(code=200, elapsed=30)
+        self.assertEqual(budget.calculate().connections, 2)
+
+    def test_persist(self):
+        budget = self.budget()
+        for _ in range(20):
+            budget.feedback(code=200, elapsed=0.5)
+
+        # Not saved on every response, but when the process exits
+        self.assertFalse(os.path.exists(budget.path))
+        save_budgets()
+
+        # The next crawl of the market starts where this one left
+        warm = self.budget()
+        self.assertEqual(warm._connections, budget._connections)
+        self.assertEqual(warm._delay, budget._delay)
+
+    def test_unreadable(self):
+        os.makedirs(os.path.join(self.tmp.name, "m"))
+        with open(os.path.join(self.tmp.name, "m", "budget.yaml"), "w") as f:
+            f.write("connections: [6\n")
+
+        budget = self.budget()
+        self.assertEqual(budget._connections, 1)
+        self.assertEqual(budget._delay, budget._MAX_DELAY)
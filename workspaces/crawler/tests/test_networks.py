@@ -0,0 +1,29 @@
+import unittest
+
+from crawler.session import networks
+from crawler.session.networks import get_proxies, resolve_network, set_proxy
+
+
+class TestNetworks(unittest.TestCase):
+
+    def tearDown(self):
+        set_proxy("localhost")
+
+    def test_resolve(self):
+        self.assertEqual(resolve_network("market.onion"), "tor")
+        self.assertEqual(resolve_network("sub.market.ONION"), "tor")
+        self.assertEqual(resolve_network("market.i2p"), "i2p")
+        self.assertEqual(resolve_network("abcdef.b32.i2p"), "i2p")
+
+    def test_proxies(self):
+        set_proxy("proxy")
+
+        proxies = get_proxies("http://market.onion/item/1")
+        self.assertEqual(proxies["http"], "socks5h://proxy:9050")
+        self.assertEqual(get_proxies("market.onion"), proxies)
+        self.assertEqual(get_proxies("http://abc.b32.i2p/")["https"], "http://proxy:4444")
+
+        # Resolved once per host, and handed out as copies
+        proxies["all"] = "x"
+        self.assertNotIn("all", get_proxies("http://market.onion/other"))
+        self.assertEqual(len(networks._proxies), 2)
@@ -0,0 +1,24 @@
+import unittest
+
+from crawler.session.pacing import Pacer
+
+
+class TestPacer(unittest.TestCase):
+
+    def test_slots(self):
+        pacer = Pacer()
+
+        # Requests to the same host are spaced, other hosts are not affected
+        waits = [pacer.reserve("http://a.onion/p/%d" % i, 1) for i in range(3)]
+        for wait, expected in zip(waits, [0, 1, 2]):
+            self.assertAlmostEqual(wait, expected, places=2)
+
+        self.assertAlmostEqual(pacer.reserve("http://b.onion/", 1), 0, places=2)
+
+    def test_grant(self):
+        pacer = Pacer()
+        self.assertFalse(pacer.take())
+
+        with pacer.granted():
+            self.assertTrue(pacer.take())
+            self.assertFalse(pacer.take())
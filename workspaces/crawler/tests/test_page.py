@@ -0,0 +1,35 @@
+import unittest
+
+from crawler.strategies.page import Page
+
+
+class Response:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+
+
+class TestPage(unittest.TestCase):
+
+    def test_in_memory(self):
+        content = b"<html>" * 10
+        page = Page(url="/")
+        page.store(Response(content))
+
+        # Small bodies are kept as they are, and sent in one piece
+        self.assertFalse(page._body.spilled)
+        self.assertIs(page.data, content)
+        self.assertEqual([c for c in page.chunks(1024)], [content])
+        self.assertEqual(b"".join(page.chunks(7)), content)
+
+    def test_spilled(self):
+        content = b"<html>" * 10
+        page = Page(url="/")
+        page.store(Response(content), spill_size=16)
+
+        self.assertTrue(page._body.spilled)
+        self.assertEqual(page.data, content)
+        self.assertEqual(b"".join(page.chunks(7)), content)
+
+        page.close()
+        self.assertFalse(page.crawled)
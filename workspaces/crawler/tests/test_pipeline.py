@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+
+from crawler.strategies.page import Page
+from crawler.strategies.pipeline import StorePipeline
+from crawler.stubs.interfaces import Storage
+
+
+class Response:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+
+
+class FakeStorage(Storage):
+    """Stores every page but the ones in `failed`"""
+
+    def __init__(self, failed: set[str]):
+        self.failed = failed
+        self.received: list[bytes] = []
+
+    def store(self, pages: list[Page], market: str, model: str) -> list[Page]:
+        self.received += [page.data for page in pages]
+        return [page for page in pages if page.url not in self.failed]
+
+
+class TestStorePipeline(unittest.TestCase):
+
+    def test_stored(self):
+        storage = FakeStorage(failed={"b"})
+        pages = [Page(url=url) for url in "abcd"]
+        for page in pages:
+            page.store(Response(page.url.encode()))
+
+        async def run() -> StorePipeline:
+            pipeline = StorePipeline(storage=storage, market="m", model="item", batch_size=3)
+
+            async with pipeline:
+                for page in pages:
+                    await pipeline.put(page)
+
+            return pipeline
+
+        pipeline = asyncio.run(run())
+
+        self.assertEqual(storage.received, [b"a", b"b", b"c", b"d"])
+        self.assertEqual([page.url for page in pipeline.stored], ["a", "c", "d"])
+
+        # The bodies are released once the storage answered
+        self.assertFalse(any(page.crawled for page in pages))
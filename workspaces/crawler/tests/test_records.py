@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from crawler.session.records import RecordsSink
+
+
+class TestRecordsSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def lines(self) -> list[dict]:
+        ret = []
+        for name in sorted(os.listdir(self.tmp.name)):
+            with open(os.path.join(self.tmp.name, name)) as f:
+                ret += [json.loads(line) for line in f]
+        return ret
+
+    def test_concurrent(self):
+        sink = RecordsSink(directory=self.tmp.name, batch_size=10, interval=0.01)
+
+        def put(n):
+            for i in range(100):
+                sink.put({"thread": n, "i": i})
+
+        threads = [threading.Thread(target=put, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        sink.close()
+
+        # Every record is written whole, once
+        lines = self.lines()
+        self.assertEqual(len(lines), 800)
+        self.assertEqual(len({(r["thread"], r["i"]) for r in lines}), 800)
+
+    def test_rotate(self):
+        sink = RecordsSink(directory=self.tmp.name, max_bytes=100)
+
+        for i in range(10):
+            sink.put({"i": i, "pad": "x" * 30})
+            sink.flush()
+        sink.close()
+
+        self.assertGreater(len(os.listdir(self.tmp.name)), 1)
+        self.assertEqual([r["i"] for r in self.lines()][-1], 9)
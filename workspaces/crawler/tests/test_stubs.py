@@ -1,11 +1,38 @@
 # Import all the services
 import unittest
 
-from crawler.stubs.storage import LocalStorageService
+from crawler.strategies.page import Page
+from crawler.stubs.storage import LocalStorageService, StorageService
 from lib.config.config import Client
+from lib.protos.storage_pb2 import StoreResponse
 from lib.stubs.factory import StubFactory
 
 
+class Response:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+
+
+class FakeStorageStub:
+    """Stores every page but the ones in `failed`"""
+
+    def __init__(self, failed: set[str]):
+        self.failed = failed
+
+    def StoreStream(self, chunks):
+        urls = [chunk.url for chunk in chunks if chunk.url]
+
+        status = StoreResponse.Page.Status
+        pages = [
+            StoreResponse.Page(
+                url=url, status=status.FAILED if url in self.failed else status.CREATED
+            )
+            for url in urls
+        ]
+        return StoreResponse(pages=pages)
+
+
 class TestStubs(unittest.TestCase):
 
     def test_load_stub(self):
@@ -17,4 +44,15 @@ class TestStubs(unittest.TestCase):
         ) 
         storage = StubFactory.create_stub(client)
 
-        self.assertIsInstance(storage, LocalStorageService)
\ No newline at end of file
+        self.assertIsInstance(storage, LocalStorageService)
+
+    def test_store_returns_stored_pages(self):
+        client: Client = Client(address="localhost", port=0, name="storage")
+        storage = StorageService(client=client, stub=FakeStorageStub(failed={"b"}))
+
+        pages = [Page(url=url) for url in "abc"]
+        for page in pages:
+            page.store(Response(b"<html>"))
+        stored = storage.store(pages=pages, market="market", model="model")
+
+        self.assertEqual([page.url for page in stored], ["a", "c"])
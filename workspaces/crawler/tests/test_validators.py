@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+
+from unittest import mock
+
+from crawler.crawlers.crawler import Crawler
+from crawler.crawlers.validators import ContentValidator
+from lib.scraper import scraper as scraper_module
+from lib.scraper.scraper import Scraper
+
+
+class Response:
+    text = ""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class Session:
+    """Reports the validity of each response the budget is told about"""
+
+    def __init__(self, response: Response):
+        self.response = response
+        self.reports: list[bool] = []
+
+    def request(self, url: str, feedback: bool = True):
+        if feedback:
+            self.feedback(self.response)
+
+        return self.response
+
+    def feedback(self, response, valid: bool = True) -> None:
+        self.reports.append(valid)
+
+    def auth(self, market: str) -> None:
+        pass
+
+
+class TestValidators(unittest.TestCase):
+
+    def test_content(self):
+        required = [dict(name="title", instructions=[dict(props=dict(name="h1"))])]
+        invalid = [dict(name="captcha", instructions=[dict(props=dict(id="captcha"))])]
+        validator = ContentValidator(invalid=invalid, required=required)
+
+        # The compiled instructions run many times
+        for _ in range(2):
+            self.assertTrue(validator.isValid(Response("<h1>Market</h1>")))
+            self.assertFalse(validator.isValid(Response("<p>Market</p>")))
+            self.assertFalse(validator.isValid(Response("<h1>Market</h1><div id='captcha'/>")))
+
+        # The plan is left untouched
+        self.assertEqual(required[0]["instructions"], [dict(props=dict(name="h1"))])
+
+    def test_shared_document(self):
+        response = Response("<h1>Market</h1>")
+        validator = ContentValidator(required=[dict(name="title", instructions=[dict(props=dict(name="h1"))])])
+
+        parse = mock.Mock(wraps=scraper_module.BeautifulSoup)
+        with mock.patch.object(scraper_module, "BeautifulSoup", parse):
+            self.assertTrue(validator.isValid(response))
+            self.assertEqual(parse.call_count, 1)
+            document = getattr(response, scraper_module._DOCUMENT)
+
+            # The strategy gets the document parsed by the validator, without parsing it again
+            scraper = Scraper.from_response(response)
+            self.assertIs(scraper.content, document)
+            self.assertIs(Scraper.from_response(response).content, document)
+            self.assertEqual(parse.call_count, 1)
+
+        self.assertEqual(scraper.content.h1.text, "Market")
+
+    def test_feedback(self):
+        required = [dict(name="title", instructions=[dict(props=dict(name="h1"))])]
+        validators = dict(all=[ContentValidator(required=required)])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            crawler = Crawler(market="m", domain="http://m/", validators=validators, volume=tmp)
+
+            # The budget hears once about each request, after it is validated
+            session = Session(Response(b"<h1>Market</h1>"))
+            crawler.crawl(session=session, url="/")
+            self.assertEqual(session.reports, [True])
+
+            # Invalid content, then the retry without validation
+            session = Session(Response(b"<p>Captcha</p>"))
+            crawler.crawl(session=session, url="/")
+            self.assertEqual(session.reports, [False, True])
@@ -17,6 +17,8 @@
 
 import sys
 
+from dataclasses import dataclass
+
 from lib.server.factory import ServerFactory, start_server
 from lib.config.config import Config
 
@@ -24,17 +26,42 @@ import hydra
 from hydra.core.config_store import ConfigStore
 
 from scraper.server.scraper import Scraper
+from scraper.scraper.blueprint import registry
+from scraper.scraper.pool import start_pool, stop_pool
+
+
+@dataclass
+class ScraperConfig(Config):
+    # Threads serving requests
+    workers: int = 5
+    # Processes scraping the pages. With 0, the pages are scraped in the server threads
+    processes: int = 0
+
 
 cs = ConfigStore.instance()
 # Registering the Config class with the name 'config'.
-cs.store(name="base_config", node=Config)
+cs.store(name="base_config", node=ScraperConfig)
 
 @hydra.main(version_base=None, config_path="config", config_name="config")
-def main(cfg: Config) -> None:
+def main(cfg: ScraperConfig) -> None:
+
+    # Load the blueprints before the first request arrives
+    registry.warm()
+
+    # Start the processes before the server, there must be a thread per process
+    # to keep them all busy
+    workers = cfg.workers
+    if cfg.processes > 0:
+        start_pool(cfg.processes)
+        workers = max(workers, cfg.processes)
 
     # Start the server
-    server = ServerFactory.create_server(servicer=Scraper, host=cfg.host, workers=5)
-    start_server(server)
+    server = ServerFactory.create_server(servicer=Scraper, host=cfg.host, workers=workers)
+
+    try:
+        start_server(server)
+    finally:
+        stop_pool()
 
 
 if __name__ == "__main__":
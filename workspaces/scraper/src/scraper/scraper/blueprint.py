@@ -14,11 +14,14 @@
 
 import yaml
 import os
+import hashlib
+import threading
 import scraper
 
 from dataclasses import dataclass, field
 
 from lib.logger.logger import log
+from lib.scraper.instructions import Field, compile_fields
 
 
 @dataclass
@@ -30,12 +33,136 @@ class Blueprint:
         model (str): Type of the content
 
         structure (dict): Instructions to follow to find the content
+        fields (tuple[Field]): Compiled fields of the structure
     """
 
     market: str
     model: str
 
     structure: dict = field(default_factory=dict)
+    fields: tuple[Field, ...] = field(default=(), init=False, repr=False)
+
+    def __post_init__(self):
+        # Compile the instructions once, the blueprint is used for every page
+        self.fields = compile_fields((self.structure or {}).get("struct"))
+
+
+@dataclass
+class _Entry:
+    """Blueprint loaded in the registry, with the version of the file it came from"""
+
+    blueprint: Blueprint
+    stat: tuple[int, int]
+    digest: str
+
+
+@dataclass
+class BlueprintRegistry:
+    """In-process cache of the blueprints.
+
+    Blueprints are loaded and compiled once. Every lookup checks the modification time
+    and size of the file, and the file is only read again when they change. If the
+    content did not change either, the loaded blueprint is kept.
+
+    Attributes:
+        path (str): Folder with a sub-folder of blueprints per market
+    """
+
+    path: str = os.path.join(os.path.dirname(scraper.__file__), "../../dist")
+
+    _entries: dict[tuple[str, str], _Entry] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def filepath(self, market: str, model: str) -> str:
+        return os.path.join(self.path, market, "%s.yaml" % model)
+
+    def get(self, market: str, model: str) -> Blueprint | None:
+        """Returns the blueprint for the market and model, loading it if needed
+
+        Args:
+            market (str): Name of the market
+            model (str): Type of the content
+
+        Returns:
+            Blueprint: Instance of the blueprint, or None if there is no blueprint
+        """
+        model = model.lower()
+        key = (market, model)
+
+        try:
+            st = os.stat(self.filepath(market, model))
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+        stat = (st.st_mtime_ns, st.st_size)
+
+        entry = self._entries.get(key)
+        if entry and entry.stat == stat:
+            return entry.blueprint
+
+        with self._lock:
+            # Another thread may have loaded it while waiting for the lock
+            entry = self._entries.get(key)
+            if entry and entry.stat == stat:
+                return entry.blueprint
+
+            entry = self._load(market, model, stat, entry)
+            self._entries[key] = entry
+
+        return entry.blueprint
+
+    def _load(self, market: str, model: str, stat: tuple[int, int], entry: _Entry = None) -> _Entry:
+        """Read and compile the blueprint file"""
+        with open(self.filepath(market, model), "rb") as file:
+            data = file.read()
+
+        digest = hashlib.sha256(data).hexdigest()
+
+        # Only the modification time changed
+        if entry and entry.digest == digest:
+            return _Entry(blueprint=entry.blueprint, stat=stat, digest=digest)
+
+        log.debug("Loading blueprint for market %s, model %s" % (market, model))
+        structure = yaml.load(data, yaml.loader.SafeLoader)
+        blueprint = Blueprint(market=market, model=model, structure=structure)
+
+        return _Entry(blueprint=blueprint, stat=stat, digest=digest)
+
+    def warm(self) -> int:
+        """Load the blueprints of every market
+
+        Returns:
+            int: Amount of blueprints loaded
+        """
+        if not os.path.isdir(self.path):
+            log.warning("Blueprints folder %s not found" % self.path)
+            return 0
+
+        n = 0
+        for market in sorted(os.listdir(self.path)):
+            folder = os.path.join(self.path, market)
+            if not os.path.isdir(folder):
+                continue
+
+            for filename in sorted(os.listdir(folder)):
+                model, ext = os.path.splitext(filename)
+                if ext != ".yaml":
+                    continue
+
+                try:
+                    if self.get(market=market, model=model):
+                        n += 1
+                except Exception as e:
+                    log.error("Failed to load blueprint %s: %s" % (os.path.join(folder, filename), e))
+
+        log.info("Loaded %d blueprints" % n)
+        return n
+
+
+# Blueprints loaded in this process
+registry = BlueprintRegistry()
 
 
 def get_blueprint(market: str, model: str) -> Blueprint:
@@ -48,22 +175,9 @@ def get_blueprint(market: str, model: str) -> Blueprint:
     Returns:
         Blueprint: Instance of the blueprint
     """
-    model = model.lower()
-    # Check that the file is there and it is a file
-    filename: str = "%s.yaml" % model
+    blueprint = registry.get(market=market, model=model)
 
-    base_path = os.path.join(os.path.dirname(scraper.__file__), "../../dist")
-    filepath = os.path.join(base_path, market, filename)
-
-    if os.path.isfile(filepath):
-
-        # Load the content of the file
-        with open(filepath, "r") as file:
-            structure = yaml.load(file, yaml.loader.SafeLoader)
-
-            # Load the blueprint and return it
-            blueprint = Blueprint(market=market, model=model, structure=structure)
-            return blueprint
-
-    else:
+    if not blueprint:
         log.error("Blueprint for market %s, model %s not found" % (market, model))
+
+    return blueprint
@@ -0,0 +1,120 @@
+# Copyright 2023 Ricardo Yaben
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pool of processes to scrape pages.
+
+Building the tree of a page and searching it is pure Python, so the threads of the
+server only use one core between all of them. When the pool is started, the pages
+are scraped in separate processes instead, each with its own blueprints loaded.
+"""
+
+import multiprocessing
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from lib.logger.logger import log
+
+from scraper.scraper.blueprint import registry
+from scraper.scraper.scraper import scrape
+
+# Pool shared by the server threads
+_pool: ProcessPoolExecutor = None
+_processes: int = 0
+
+
+def _init_worker(path: str) -> None:
+    """Load the blueprints once in each worker, from the same folder as the server"""
+    registry.path = path
+    registry.warm()
+
+
+def _ready() -> bool:
+    return True
+
+
+def start_pool(processes: int) -> ProcessPoolExecutor:
+    """Start the pool of processes and wait until the workers are ready
+
+    Args:
+        processes (int): Number of processes
+
+    Returns:
+        ProcessPoolExecutor: The pool
+    """
+    global _pool, _processes
+
+    if _pool:
+        return _pool
+
+    # Spawn the workers rather than forking the process with the gRPC threads in it
+    context = multiprocessing.get_context("spawn")
+    _pool = ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(registry.path,),
+    )
+    _processes = processes
+
+    # The workers start on demand, start them all now so the first requests do not
+    # wait for them
+    for future in [_pool.submit(_ready) for _ in range(processes)]:
+        future.result()
+
+    log.info(f"Started {processes} scraper processes")
+    return _pool
+
+
+def get_pool() -> ProcessPoolExecutor | None:
+    return _pool
+
+
+def stop_pool() -> None:
+    global _pool, _processes
+
+    if _pool:
+        _pool.shutdown(wait=True, cancel_futures=True)
+
+    _pool, _processes = None, 0
+
+
+def capacity() -> int:
+    """Number of pages that can be scraped at the same time"""
+    return _processes or 1
+
+
+def submit(market: str, model: str, html: str | bytes) -> Future:
+    """Scrape a page in the pool. Without a pool, the page is scraped right away in the
+    current thread
+
+    Args:
+        market (str): Market name
+        model (str): Type of the content
+        html (bytes): Page data
+
+    Returns:
+        Future: Future with the content of the page
+    """
+    if _pool:
+        return _pool.submit(scrape, market=market, model=model, html=html)
+
+    future: Future = Future()
+    try:
+        content: dict[Any, Any] = scrape(market=market, model=model, html=html)
+        future.set_result(content)
+    except Exception as e:
+        future.set_exception(e)
+
+    return future
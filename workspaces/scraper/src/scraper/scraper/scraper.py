@@ -17,33 +17,30 @@ from typing import Any
 
 from lib.scraper.scraper import Scraper
 from lib.scraper.factory import ScraperFactory
+from lib.scraper.instructions import Field, compile_fields
 from scraper.scraper.blueprint import Blueprint, get_blueprint
 
 @ScraperFactory.register("simple")
 class SimpleScraper(Scraper):
     """Scraper for 'simple' tagged structures"""
 
-    def scrape(self, structure: list[dict[Any, Any]]) -> dict[Any, Any]:
+    def scrape(self, structure: list[dict[Any, Any]] | tuple[Field, ...]) -> dict[Any, Any]:
         # Initialise a variable to hold the data points
         data: dict = {}
 
-        for point in structure:
-            # Get the name and the instructions from the field
-            instructions = point.get("instructions")
-            clean = point.get("clean")
-            name = point.get("name")
+        for point in compile_fields(structure):
+            if not point.matcher:
+                continue
 
             # Process the instructions over the field
-            value = self.process(
-                content=self.content, instructions=instructions, clean_expr=clean
-            )
+            value = self.run(self.content, point.matcher)
 
             # If there is a value, add it to the data
             if value:
-                if "many" not in point:
+                if not point.many:
                     value = value.pop(0)
 
-                data[name] = value
+                data[point.name] = value
 
         return data
 
@@ -52,36 +49,27 @@ class SimpleScraper(Scraper):
 class GroupedScraper(Scraper):
     """Scraper for content that contains groups of fields"""
 
-    def scrape(self, structure: list[dict[Any, Any]]) -> dict[Any, Any]:
+    def scrape(self, structure: list[dict[Any, Any]] | tuple[Field, ...]) -> dict[Any, Any]:
         data: dict = {}
 
-        for group in structure:
-            # Get the name of the group and the fields
-            name = group.get("name")
-            clean = group.get("clean")
-            fields = group.get("fields")
+        for group in compile_fields(structure):
+            if group.fields is not None:
+                data[group.name] = self.scrape(structure=group.fields)
 
-            if "fields" in group:
-                data[name] = self.scrape(structure=fields)
+            # If there is a fixed value, use that value and jump to the next
+            # iteration
+            elif group.isfixed:
+                data[group.name] = group.fixed
 
-            elif any(x in ["instructions", "fixed"] for x in group):
-                # If there is a fixed value, use that value and jump to the next
-                # iteration
-                if "fixed" in group:
-                    data[name] = group["fixed"]
-                    continue
-
-                # Otherwise, get the instructions and process the content
-                instructions = group.get("instructions")
-                value = self.process(
-                    content=self.content, instructions=instructions, clean_expr=clean
-                )
+            # Otherwise, process the instructions over the content
+            elif group.matcher:
+                value = self.run(self.content, group.matcher)
 
                 if value:
-                    if "many" not in group:
+                    if not group.many:
                         value: str = value.pop(0)
 
-                    data[name] = value
+                    data[group.name] = value
 
         return data
 
@@ -113,5 +101,5 @@ def scrape(
     scraper = scraper.from_html(html)
 
     # scrape the content
-    content: dict[Any, Any] = scraper.scrape(structure=blueprint.structure["struct"])
+    content: dict[Any, Any] = scraper.scrape(structure=blueprint.fields)
     return content
@@ -12,23 +12,67 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import deque
+from concurrent.futures import Future
+
 from lib.protos import scraper_pb2, scraper_pb2_grpc
-from scraper.scraper.scraper import scrape
+from scraper.scraper import pool
 from google.protobuf.struct_pb2 import Struct
 
+from lib.logger.logger import log
+
 
 class Scraper(scraper_pb2_grpc.ScraperServicer):
-    """Endpoint for the Scraper functions"""
+    """Endpoint for the Scraper functions.
+    The pages are scraped in the pool of processes, if started"""
 
     def Scrape(self, request, context) -> scraper_pb2.ScrapeResponse:
         """Returns the content scraped from an HTML page"""
 
         # scrape the content from the data
-        content = scrape(market=request.market, model=request.model, html=request.data)
+        content = self._submit(request).result()
+
+        return self._response(request, content)
+
+    def ScrapeBatch(self, request, context) -> scraper_pb2.ScrapeBatchResponse:
+        """Returns the content scraped from many pages, in the same order"""
+        # Send all the pages to the pool at once so they are scraped in parallel
+        futures = [(page, self._submit(page)) for page in request.pages]
+        pages = [self._result(page, future) for page, future in futures]
+
+        return scraper_pb2.ScrapeBatchResponse(pages=pages)
+
+    def ScrapeStream(self, request_iterator, context):
+        """Scrapes the pages as they arrive. Each response carries the id of its request"""
+        # Keep a few pages in flight per process while the next ones arrive
+        window = 2 * pool.capacity()
+        pending: deque = deque()
 
+        for request in request_iterator:
+            pending.append((request, self._submit(request)))
+
+            if len(pending) >= window:
+                yield self._result(*pending.popleft())
+
+        while pending:
+            yield self._result(*pending.popleft())
+
+    def _submit(self, request) -> Future:
+        return pool.submit(market=request.market, model=request.model, html=request.data)
+
+    def _response(self, request, content: dict) -> scraper_pb2.ScrapeResponse:
         content_struct = Struct()
         content_struct.update(content)
 
-        response = scraper_pb2.ScrapeResponse(content=content_struct)
+        response = scraper_pb2.ScrapeResponse(content=content_struct, id=request.id)
 
         return response
+
+    def _result(self, request, future: Future) -> scraper_pb2.ScrapeResponse:
+        """Result of a single page of a batch. A page that fails does not fail the rest"""
+        try:
+            return self._response(request, future.result())
+
+        except Exception as e:
+            log.error(f"Failed to scrape {request.market} {request.model} {request.id}: {e}")
+            return scraper_pb2.ScrapeResponse(id=request.id, error=str(e) or type(e).__name__)
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from scraper.scraper.blueprint import BlueprintRegistry
+
+
+class TestBlueprintRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "m"))
+        self.registry = BlueprintRegistry(path=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, content: str, mtime: int):
+        path = os.path.join(self.tmp.name, "m", "item.yaml")
+        with open(path, "w") as f:
+            f.write(content)
+        os.utime(path, ns=(mtime, mtime))
+
+    def test_cache(self):
+        self.write("scraper: simple\nstruct: []\n", 1)
+
+        blueprint = self.registry.get(market="m", model="Item")
+        self.assertIs(self.registry.get(market="m", model="item"), blueprint)
+
+        # Touching the file keeps the blueprint if the content is the same
+        self.write("scraper: simple\nstruct: []\n", 2)
+        self.assertIs(self.registry.get(market="m", model="item"), blueprint)
+
+        # Changing the content loads it again
+        self.write("scraper: groups\nstruct: []\n", 3)
+        blueprint = self.registry.get(market="m", model="item")
+        self.assertEqual(blueprint.structure["scraper"], "groups")
+
+        os.remove(os.path.join(self.tmp.name, "m", "item.yaml"))
+        self.assertIsNone(self.registry.get(market="m", model="item"))
+
+    def test_warm(self):
+        self.write("scraper: simple\nstruct: []\n", 1)
+        self.assertEqual(self.registry.warm(), 1)
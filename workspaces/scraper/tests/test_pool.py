@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from lib.protos import scraper_pb2
+from scraper.scraper import pool
+from scraper.scraper.blueprint import registry
+from scraper.server.scraper import Scraper
+
+BLUEPRINT = """
+scraper: simple
+struct:
+  - name: title
+    instructions:
+      - props:
+          name: h1
+        attrs:
+          - text
+"""
+
+
+class TestPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(cls.tmp.name, "m"))
+        with open(os.path.join(cls.tmp.name, "m", "item.yaml"), "w") as f:
+            f.write(BLUEPRINT)
+
+        cls.path = registry.path
+        registry.path = cls.tmp.name
+        pool.start_pool(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        pool.stop_pool()
+        registry.path = cls.path
+        cls.tmp.cleanup()
+
+    def request(self, n: int, model: str = "item") -> scraper_pb2.ScrapeRequest:
+        return scraper_pb2.ScrapeRequest(
+            market="m", model=model, data=f"<h1>{n}</h1>".encode(), id=str(n)
+        )
+
+    def test_batch(self):
+        self.assertIsNotNone(pool.get_pool())
+
+        pages = [self.request(n) for n in range(6)]
+        # No blueprint for this model, the worker fails to scrape it
+        pages[3] = self.request(3, model="missing")
+
+        response = Scraper().ScrapeBatch(scraper_pb2.ScrapeBatchRequest(pages=pages), None)
+
+        self.assertEqual([page.id for page in response.pages], [str(n) for n in range(6)])
+        for n, page in enumerate(response.pages):
+            if n == 3:
+                self.assertTrue(page.error)
+                self.assertFalse(page.HasField("content"))
+                continue
+
+            self.assertFalse(page.error)
+            self.assertEqual(page.content["title"], str(n))
+
+    def test_stream(self):
+        requests = [self.request(n) for n in range(6)]
+        requests[1] = self.request(1, model="missing")
+
+        responses = list(Scraper().ScrapeStream(iter(requests), None))
+
+        self.assertEqual([page.id for page in responses], [str(n) for n in range(6)])
+        self.assertEqual([bool(page.error) for page in responses], [n == 1 for n in range(6)])
@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import uuid
+
+from datetime import datetime, timedelta, timezone
 from typing import Callable
-from sqlalchemy import Sequence
+from sqlalchemy import Sequence, exc, func, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
 from dataclasses import dataclass
 
 from lib.logger.logger import log
-from storage.database.models import Item, Page, Vendor
+from storage.database.models import Item, Market, Page, Vendor
 
 from storage.api.interfaces import ApiEndpoint
 
@@ -47,11 +51,18 @@ class ApiFactory:
 class PageEndpoint(ApiEndpoint):
     model = Page
 
+    # Failed attempts before a page is not leased anymore
+    _MAX_ATTEMPTS: int = 5
+    # Seconds to wait after the first failed attempt, and the max. wait
+    _BACKOFF: int = 60
+    _MAX_BACKOFF: int = 24 * 60 * 60
+
     def find(self, url, market):
         try:
             instance = (
                 self.db.session.query(self.model)
-                .filter(self.model.market.has(name=market), self.model.url == url)
+                .join(self.model.market)
+                .filter(Market.name == market, self.model.url == url)
                 .one_or_none()
             )
 
@@ -59,10 +70,215 @@ class PageEndpoint(ApiEndpoint):
         except:
             pass
 
-    def placeholders(self, urls: Sequence[str], market: str, page_type: str):
-        for url in urls:
-            page = {"market": {"name": market}, "page_type": page_type, "url": url}
-            self.store(force=False, **page)
+    def store_page(self, url: str, market: str, page_type: str, file: str = None):
+        """Create or update a single page"""
+        # Semi-serialise the data into a json like object
+        serialised: dict = {
+            "url": url,
+            "market": {
+                "name": market,
+            },
+            "page_type": page_type,
+        }
+
+        if file:
+            serialised.update({"file": file})
+
+        # Attempt to find the page
+        instance = self.find(url=url, market=market)
+
+        if instance:
+            self.update(instance, **serialised)
+            return instance, False
+
+        instance = self.store(force=False, **serialised)
+        return instance, True
+
+    def store_batch(
+        self, market: str, page_type: str, pages: Sequence[dict[str, str]]
+    ) -> list[dict[str, str]]:
+        """Create or update many pages of a market in a single transaction.
+
+        The market is resolved once, the pages already stored are loaded with one
+        query, and everything is committed together. If the commit fails, i.e. some
+        other request stored one of the pages in the meantime, the pages are stored
+        one by one instead.
+
+        Args:
+            market (str): Name of the market
+            page_type (str): Name of the type of the page i.e. vendor, item, etc.
+            pages (Sequence[dict[str, str]]): The `url` and `file` of each page
+
+        Returns:
+            list[dict[str, str]]: The `url`, `file` and `status` (created, updated,
+                unchanged or failed) of each page
+        """
+        if not pages:
+            return []
+
+        session = self.db.session
+        market_instance, _ = self.db.get_or_create(Market, name=market)
+
+        urls = [page["url"] for page in pages]
+        stored = {
+            instance.url: instance
+            for instance in session.query(self.model).filter(
+                self.model.market_id == market_instance.id, self.model.url.in_(urls)
+            )
+        }
+
+        results = []
+        for page in pages:
+            url, file = page["url"], page.get("file")
+            instance = stored.get(url)
+
+            if instance:
+                # Content addressed files have the same name if the content is the same
+                status = "unchanged" if file and instance.file == file else "updated"
+            else:
+                status = "created"
+                instance = self.model(url=url, market_id=market_instance.id)
+                session.add(instance)
+                stored[url] = instance
+
+            instance.page_type = page_type
+            if file:
+                instance.file = file
+
+                # The page is crawled, the lease is not needed anymore
+                instance.leased_until = None
+                instance.lease_owner = None
+
+            results.append(dict(url=url, file=file, status=status))
+
+        try:
+            session.commit()
+            return results
+
+        except exc.IntegrityError as e:
+            log.warning(f"Failed to store the pages in batch, storing them one by one: {e}")
+            session.rollback()
+
+        for result in results:
+            try:
+                _, created = self.store_page(
+                    url=result["url"], market=market, page_type=page_type, file=result["file"]
+                )
+                result["status"] = "created" if created else "updated"
+
+            except Exception as e:
+                log.error(e)
+                session.rollback()
+                result["status"] = "failed"
+
+        return results
+
+    def placeholders(
+        self, urls: Sequence[str], market: str, page_type: str
+    ) -> tuple[list[str], list[str]]:
+        """Create placeholders for the pages that are not in the database yet.
+
+        The market is resolved once and all the pages are inserted in bulk, skipping
+        those already stored for the market.
+
+        Args:
+            urls (Sequence[str]): List of page urls
+            market (str): The market in where the pages should be found.
+            page_type (str): Name of the type of the page i.e. vendor, item, etc.
+
+        Returns:
+            tuple[list[str], list[str]]: Urls of the pages found and of those created
+        """
+        # Remove duplicates, keeping the order
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return [], []
+
+        market_instance, _ = self.db.get_or_create(Market, name=market)
+        rows = [
+            dict(id=uuid.uuid4(), url=url, market_id=market_instance.id, page_type=page_type)
+            for url in urls
+        ]
+
+        session = self.db.session
+        dialect = session.get_bind().dialect.name
+
+        if dialect == "postgresql":
+            res = self._upsert_placeholders(rows, market_instance.id)
+        else:
+            res = self._insert_placeholders(rows, market_instance.id)
+
+        session.commit()
+
+        found = [url for url, created in res if not created]
+        created = [url for url, created in res if created]
+        return found, created
+
+    def _upsert_placeholders(self, rows: list[dict], market_id) -> list[tuple[str, bool]]:
+        """Insert the pages and return the found and created ones in a single statement.
+
+        The statement is built as follows:
+
+            WITH created AS (
+                INSERT INTO page ... ON CONFLICT (url, market_id) DO NOTHING RETURNING url
+            )
+            SELECT url, false FROM page WHERE market_id = ... AND url IN (...)
+            UNION ALL
+            SELECT url, true FROM created
+
+        Both selects see the table as it was before the insert, so the first one only
+        returns the pages that were already stored. A page inserted by a concurrent
+        transaction is in neither, the insert skips it and the snapshot of the select
+        does not have it yet. Those pages are selected again afterwards.
+        """
+        urls = [row["url"] for row in rows]
+
+        created = (
+            postgresql.insert(self.model)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["url", "market_id"])
+            .returning(self.model.url)
+            .cte("created")
+        )
+
+        found = select(self.model.url, literal(False)).where(
+            self.model.market_id == market_id, self.model.url.in_(urls)
+        )
+
+        stmt = found.union_all(select(created.c.url, literal(True)))
+        res = self.db.session.execute(stmt).all()
+
+        missing = set(urls).difference(url for url, _ in res)
+        if missing:
+            res += [
+                (url, False)
+                for url in self.db.session.execute(
+                    select(self.model.url).where(
+                        self.model.market_id == market_id, self.model.url.in_(missing)
+                    )
+                ).scalars()
+            ]
+
+        return res
+
+    def _insert_placeholders(self, rows: list[dict], market_id) -> list[tuple[str, bool]]:
+        """Fallback for databases without data modifying CTEs, i.e. SQLite.
+        It takes one statement to find the pages and another one to insert the rest."""
+        urls = [row["url"] for row in rows]
+
+        found = self.db.session.execute(
+            select(self.model.url).where(
+                self.model.market_id == market_id, self.model.url.in_(urls)
+            )
+        ).scalars().all()
+
+        new = [row for row in rows if row["url"] not in found]
+        if new:
+            self.db.session.execute(
+                sqlite.insert(self.model).values(new).on_conflict_do_nothing()
+            )
+
+        return [(url, False) for url in found] + [(row["url"], True) for row in new]
 
     def exists(
         self,
@@ -70,7 +286,7 @@ class PageEndpoint(ApiEndpoint):
         pages: Sequence[str],
         page_type: str,
         placeholders: bool = True,
-    ):
+    ) -> list[str]:
         """Check the database for some pages.
 
         We do not need to know the type of the page, only the url and the market. It might
@@ -84,43 +300,187 @@ class PageEndpoint(ApiEndpoint):
             placeholders (bool): Wether or not to store the values not found as placeholders
 
         Returns:
-            q: A query list object
+            list[str]: Urls of the pages found
         """
         log.debug("Checking pages...")
+
+        # Create the page placeholders for those pages that were not found, and
+        # get the ones found on the way
+        if placeholders:
+            log.debug("Creating placeholders...")
+
+            found, _ = self.placeholders(urls=pages, market=market, page_type=page_type)
+            return found
+
         # Filter the database to get the pages found from the list for the market
         q = (
-            self.db.session.query(self.model)
-            .filter(self.model.url.in_(pages), self.model.market.has(name=market))
+            self.db.session.query(self.model.url)
+            .join(self.model.market)
+            .filter(Market.name == market, self.model.url.in_(pages))
             .all()
         )
 
-        # Create the page placeholders for those pages that were not found
-        if placeholders:
-            log.debug("Creating placeholders...")
+        return [page.url for page in q]
 
-            found = [page.url for page in q]
-            not_found = [url for url in pages if url not in found]
-            self.placeholders(urls=not_found, market=market, page_type=page_type)
+    def unscraped_query(self, market: str = None):
+        """Query for the pages with a file but without a vendor or an item.
+        The anti-joins use the indexes on `vendor.page_id` and `item.page_id`.
+        """
+        q = (
+            self.db.session.query(self.model)
+            .outerjoin(Vendor, Vendor.page_id == self.model.id)
+            .outerjoin(Item, Item.page_id == self.model.id)
+            # Filter the db to get those without vendor or items
+            .filter(
+                Vendor.id.is_(None),  # There isnt a vendor
+                Item.id.is_(None),  # There isnt an item
+                self.model.file.is_not(None),  # There is a file
+            )
+        )
+
+        if market:
+            q = q.join(self.model.market).filter(Market.name == market)
 
         return q
 
+    def files_in_use(self, files: Sequence[str]) -> set[str]:
+        """Returns which of the files some page still has to be scraped from. Files are
+        content addressed, so many pages may share the same file
+
+        Args:
+            files (Sequence[str]): Names of the files in the pending folder
+
+        Returns:
+            set[str]: Names of the files in use
+        """
+        files = [f for f in set(files) if f]
+        if not files:
+            return set()
+
+        q = (
+            self.unscraped_query()
+            .filter(self.model.file.in_(files))
+            .with_entities(self.model.file)
+            .distinct()
+        )
+        return {file for (file,) in q}
+
     def pending(self, market: str = None, page_type: str = None) -> list:
         """Return the list of pending pages to be crawl"""
         log.debug("Checking pending...")
 
-        # Get the pages with no file in it
-        q = self.db.session.query(self.model).filter(self.model.file == None)
+        # Limit the query to 50 items, to make it manageable
+        q = self.pending_query(market=market, page_type=page_type).limit(50).all()
+        return q
+
+    def pending_query(self, market: str = None, page_type: str = None):
+        """Query for the pages with no file in it.
+        It matches the `ix_page_pending` index: (market_id, page_type) WHERE file IS NULL
+        """
+        q = self.db.session.query(self.model).filter(self.model.file.is_(None))
 
         if market:
-            q = q.filter(self.model.market.has(name=market))
+            q = q.join(self.model.market).filter(Market.name == market)
 
         if page_type:
             q = q.filter(self.model.page_type == page_type)
 
-        # Limit the query to 50 items, to make it manageable
-        q = q.limit(50).all()
         return q
 
+    def lease(
+        self,
+        owner: str,
+        market: str = None,
+        page_type: str = None,
+        limit: int = 50,
+        ttl: int = 600,
+    ) -> list[str]:
+        """Lease pending pages to a crawler.
+
+        The pages are locked with `FOR UPDATE SKIP LOCKED`, so crawlers asking at the
+        same time get different pages. A leased page is not handed out again until
+        the lease expires. Pages that failed too many times, or whose backoff did
+        not pass yet, are left out.
+
+        Args:
+            owner (str): Crawler leasing the pages
+            market (str): Name of the market
+            page_type (str): Name of the type of the page i.e. vendor, item, etc.
+            limit (int): Max. amount of pages to lease
+            ttl (int): Seconds the lease lasts
+
+        Returns:
+            list[str]: Urls of the pages leased
+        """
+        now = datetime.now(timezone.utc)
+        model = self.model
+
+        pages = (
+            self.pending_query(market=market, page_type=page_type)
+            .filter(
+                or_(model.leased_until.is_(None), model.leased_until < now),
+                or_(model.next_attempt.is_(None), model.next_attempt <= now),
+                func.coalesce(model.attempts, 0) < self._MAX_ATTEMPTS,
+            )
+            .order_by(model.creation_date)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=model)
+            .all()
+        )
+
+        until = now + timedelta(seconds=ttl)
+        urls = []
+        for page in pages:
+            page.leased_until = until
+            page.lease_owner = owner
+            urls.append(page.url)
+
+        self.db.session.commit()
+        return urls
+
+    def release(
+        self, owner: str, urls: Sequence[str], market: str, failed: bool = True
+    ) -> int:
+        """Give back leased pages.
+
+        Failed pages count one more attempt and wait before they can be leased
+        again. The wait doubles with every attempt.
+
+        Args:
+            owner (str): Crawler that leased the pages
+            urls (Sequence[str]): Urls of the pages
+            market (str): Name of the market
+            failed (bool): Whether the pages could not be crawled
+
+        Returns:
+            int: Amount of pages released
+        """
+        model = self.model
+        now = datetime.now(timezone.utc)
+
+        pages = (
+            self.db.session.query(model)
+            .join(model.market)
+            .filter(
+                Market.name == market,
+                model.url.in_(urls),
+                model.lease_owner == owner,
+            )
+            .all()
+        )
+
+        for page in pages:
+            page.leased_until = None
+            page.lease_owner = None
+
+            if failed:
+                page.attempts = (page.attempts or 0) + 1
+                backoff = min(self._BACKOFF * 2 ** (page.attempts - 1), self._MAX_BACKOFF)
+                page.next_attempt = now + timedelta(seconds=backoff)
+
+        self.db.session.commit()
+        return len(pages)
+
 
 @ApiFactory.register("item")
 class ItemEndpoint(ApiEndpoint):
@@ -33,7 +33,7 @@ class ApiEndpointProtocol(Protocol):
         self._db = v
 
     @abstractmethod
-    def store(self, force: bool = True, **kwargs):
+    def store(self, force: bool = True, commit: bool = True, **kwargs):
         raise NotImplementedError
 
     @abstractmethod
@@ -69,7 +69,14 @@ class ApiEndpoint(ApiEndpointProtocol):
 
         instance.save()
 
-    def store(self, force: bool = True, **kwargs):
+    def store(self, force: bool = True, commit: bool = True, **kwargs):
+        """Create an instance of the model with its related fields.
+
+        Args:
+            force (bool): Always create a new instance rather than looking for it first
+            commit (bool): Commit the instance. Otherwise it is only added to the session
+                and the caller commits it, i.e. together with others
+        """
         related_fields: dict = self._get_related_columns()
 
         # Remove the related fields from the kwargs
@@ -83,14 +90,19 @@ class ApiEndpoint(ApiEndpointProtocol):
         if force:
             instance = self.model(**params)
         else:
-            instance, _ = self.db.get_or_create(self.model, **params)
+            instance, _ = self.db.get_or_create(self.model, commit=commit, **params)
 
         # Update the instance with the values of the related fields using their
         # primary key to find the other instances
         for name, rel in related_fields.items():
             rel_params = kwargs.pop(name, None)
             if rel_params:
-                self._set_related_field(instance, name, rel, rel_params)
+                self._set_related_field(instance, name, rel, rel_params, commit=commit)
+
+        if not commit:
+            instance.prepare()
+            self.db.session.add(instance)
+            return instance
 
         instance.save()
         return instance
@@ -128,7 +140,9 @@ class ApiEndpoint(ApiEndpointProtocol):
 
         return [col.name for col in columns if col.type in weird]
 
-    def _set_related_field(self, instance, name: str, relationship, params):
+    def _set_related_field(
+        self, instance, name: str, relationship, params, commit: bool = True
+    ):
         """Sets the value of a Related Field using the parameters to get or
         create a new instance of the related model.
         The related model is captured from the field.
@@ -137,11 +151,12 @@ class ApiEndpoint(ApiEndpointProtocol):
             instance: Instance of a model
             name (str): Name of the field
             relationship: Relationship object
+            commit (bool): Commit the related instance if created, see `Database.create`
         """
 
         # Get an instance of the related model
         rel_model = relationship.mapper.class_
-        rel_instance, _ = self.db.get_or_create(rel_model, **params)
+        rel_instance, _ = self.db.get_or_create(rel_model, commit=commit, **params)
 
         # Add the instance to the field or set it
         if relationship.uselist:
@@ -26,7 +26,9 @@ from typing import Callable, Protocol
 from lib.config.config import Client
 from lib.stubs.factory import StubFactory
 
+from storage.volume.volume import volume
 from storage.events import (
+    benchmark_archives,
     calcualte_reputation,
     create_pending_vendors,
     re_scrape,
@@ -111,7 +113,8 @@ class RescrapeCommand(Command):
     The following arguments can be included:
     ----------------------------------------
     @ market: str -> Name of the market to scrape
-    @ extract: bool -> Whether to extract the content of the zip files
+    @ extract: bool -> Whether to extract the content of the zip files. Otherwise, the
+        content is read straight from them
     @ keepzip: bool -> Whether to keep the Zip files after extracted
     @ page_type: str -> "vendor" or "item"
     """
@@ -148,9 +151,17 @@ class RescrapeCommand(Command):
             help="Whether to keep the Zip file after extracting the content. This option requires 'extract'",
         )
 
+        parser.add_argument(
+            "-a",
+            "--archive",
+            default="zip",
+            help="Format of the new zip files, `zip` or `zstd`",
+        )
+
     @staticmethod
     def handle(kwargs):
         scraper = StubFactory.create_stub(scraper_client)
+        volume.archive = kwargs.archive
 
         if scraper:
             re_scrape(
@@ -201,12 +212,93 @@ class ScrapeCommand(Command):
             help="Market to Scrape",
         )
 
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=4,
+            help="Batches of pages scraped at the same time",
+        )
+
+        parser.add_argument(
+            "-b",
+            "--batch",
+            type=int,
+            default=100,
+            help="Pages in each batch",
+        )
+
+        parser.add_argument(
+            "-a",
+            "--archive",
+            default="zip",
+            help="Format of the new zip files, `zip` or `zstd`",
+        )
+
     @staticmethod
     def handle(kwargs):
         scraper = StubFactory.create_stub(scraper_client)
+        volume.archive = kwargs.archive
 
         if scraper:
-            scrape(scraper=scraper, market=kwargs.market)
+            scrape(
+                scraper=scraper,
+                market=kwargs.market,
+                workers=kwargs.workers,
+                batch_size=kwargs.batch,
+            )
+
+
+@CommandFactory.register("benchmark_archives")
+@dataclass
+class BenchmarkArchivesCommand(Command):
+    help: str = """
+    Compare the compression ratio and throughput of the archive formats over some of
+    the pending files
+    """
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument(
+            "-m",
+            "--market",
+            nargs="?",
+            default=None,
+            help="Market of the files",
+        )
+
+        parser.add_argument(
+            "-p",
+            "--page_type",
+            nargs="?",
+            default=None,
+            help="`item` or `vendor`",
+        )
+
+        parser.add_argument(
+            "-n",
+            "--files",
+            type=int,
+            default=1000,
+            help="Amount of files to compare the formats with",
+        )
+
+        parser.add_argument(
+            "-f",
+            "--formats",
+            nargs="*",
+            default=None,
+            help="Formats to compare, e.g. `zip zstd`",
+        )
+
+    @staticmethod
+    def handle(kwargs):
+        benchmark_archives(
+            market=kwargs.market,
+            page_type=kwargs.page_type,
+            files=kwargs.files,
+            formats=kwargs.formats,
+        )
 
 
 @CommandFactory.register("reputation")
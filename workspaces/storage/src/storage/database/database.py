@@ -16,8 +16,10 @@
 This package contains functions and methods for connecting
 and performing operations on a given database.
 """
+import functools
+
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable
 
 from sqlalchemy import create_engine
 from sqlalchemy import orm, exc
@@ -36,7 +38,9 @@ Base = declarative_base()
 class Database:
     """This class keeps a record of the database session."""
 
-    session: orm.Session = field(default_factory=orm.Session)
+    session: orm.scoped_session = field(
+        default_factory=lambda: orm.scoped_session(orm.sessionmaker(future=True))
+    )
     engine: Engine = None
 
     def get_url(self, db: interfaces.Database) -> URL:
@@ -73,8 +77,17 @@ class Database:
         url: URL = self.get_url(db)
         log.debug("Connecting to database...")
 
+        # Size the pool so each server worker can hold a connection
+        pool: dict = {}
+        if db.dialect != "sqlite":
+            pool = dict(
+                pool_size=db.pool_size,
+                max_overflow=db.max_overflow,
+                pool_pre_ping=db.pool_pre_ping,
+            )
+
         # Create a database engine that we can connect to
-        engine: Engine = create_engine(url, echo=False, echo_pool=False)
+        engine: Engine = create_engine(url, echo=False, echo_pool=False, **pool)
         engine.execution_options(stream_results=True)
 
         # Bind the engine to a session to ensure db consistency
@@ -82,13 +95,19 @@ class Database:
         # function later on to filter statements rather than making raw queries
         session: orm.Session = orm.sessionmaker(bind=engine, future=True)
 
-        self.session = session()
+        # Each thread gets its own session from the registry, so concurrent
+        # requests do not share one
+        self.session = orm.scoped_session(session)
         self.engine = engine
 
         log.info("Connected to database")
 
         return session
 
+    def remove(self) -> None:
+        """Close the session of the current thread and return its connection to the pool"""
+        self.session.remove()
+
     def load_models(self):
         if self.engine:
             log.debug("Loading models...")
@@ -98,13 +117,14 @@ class Database:
             )
 
     def get_or_create(
-        self, model, defaults: dict[Any, Any] = {}, **kwargs
+        self, model, defaults: dict[Any, Any] = {}, commit: bool = True, **kwargs
     ) -> tuple[Any, bool]:
         """Return the instance of the object or create a new one if it did not exists
 
         Args:
             model ([type]): Model of the table in where the item should be found
             defaults (dict[Any, Any], optional): Default values for the model fields. Defaults to {}.
+            commit (bool, optional): Commit the new object, see `create`. Defaults to True.
 
         Returns:
             Any: Instance of the (new) object
@@ -115,7 +135,7 @@ class Database:
 
         if not q:
             # Create the item from the parameters given
-            q, created = self.create(model, defaults, **kwargs)
+            q, created = self.create(model, defaults, commit=commit, **kwargs)
 
         return q, created
 
@@ -131,13 +151,16 @@ class Database:
             log.warning(f"Item not found: \nmodel: {model}\nArgs: {kwargs}")
 
     def create(
-        self, model, defaults: dict[Any, Any] = {}, **kwargs
+        self, model, defaults: dict[Any, Any] = {}, commit: bool = True, **kwargs
     ) -> tuple[Any, bool]:
         """Create a new instance in the database
 
         Args:
             model ([type]): Model of the table in where the item should be found
             defaults (dict[Any, Any], optional): Default values for the model fields. Defaults to {}.
+            commit (bool, optional): Commit the new instance. Otherwise it is written in a
+                savepoint and the caller commits it, together with the rest of its
+                transaction. Defaults to True.
 
         Raises:
             not_found: The item could not be created nor found in the db
@@ -153,12 +176,22 @@ class Database:
         try:
             # Create the instance and add it to the q on the session
             instance = model(**params)
+
+            if not commit:
+                # Only the savepoint is lost if it exists already
+                with self.session.begin_nested():
+                    instance.prepare()
+                    self.session.add(instance)
+
+                return instance, True
+
             instance.save()
             return instance, True
         except exc.IntegrityError:
 
             # Remove the intance added
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
 
             # Query to get the item, apparently there is one in the db
             query = self.session.query(model).filter_by(**kwargs)
@@ -203,4 +236,19 @@ def create_database(conf: interfaces.Database) -> Database:
 
 def get_database() -> Database | None: 
     global _db
-    return _db
\ No newline at end of file
+    return _db
+
+def scoped(fn: Callable) -> Callable:
+    """Decorator to release the session of the current thread once the function returns.
+    Use it on the functions that handle a request on a worker thread.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            db = get_database()
+            if db:
+                db.remove()
+
+    return wrapper
\ No newline at end of file
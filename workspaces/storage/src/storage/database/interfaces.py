@@ -13,4 +13,10 @@ class Database(Host):
     # Dialect of the db
     dialect: str = "postgresql"
     # Driver
-    driver: str = "psycopg2"
\ No newline at end of file
+    driver: str = "psycopg2"
+    # Connections kept open in the pool
+    pool_size: int = 10
+    # Connections allowed on top of the pool when it is exhausted
+    max_overflow: int = 10
+    # Test the connections before using them
+    pool_pre_ping: bool = True
@@ -31,7 +31,9 @@ config = context.config
 db = get_database()
 if not db:
     raise DatabaseNotLoadedException
-config.set_main_option("sqlalchemy.url", db.get_url())
+# NOTE: The config values are interpolated, escape the % signs of the url
+url = db.engine.url.render_as_string(hide_password=False)
+config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,42 @@
+"""Add indexes for the pending and check queries
+
+Revision ID: 41ef406baded
+Revises:
+Create Date: 2026-10-17 09:12:41.208551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '41ef406baded'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Markets are always looked up by name
+    op.create_index("ix_market_name", "market", ["name"], if_not_exists=True)
+
+    # Pages pending to crawl
+    op.create_index(
+        "ix_page_pending",
+        "page",
+        ["market_id", "page_type"],
+        postgresql_where=sa.text("file IS NULL"),
+        sqlite_where=sa.text("file IS NULL"),
+        if_not_exists=True,
+    )
+
+    # Pages pending to scrape are those without an item or a vendor
+    op.create_index("ix_item_page_id", "item", ["page_id"], if_not_exists=True)
+    op.create_index("ix_vendor_page_id", "vendor", ["page_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_vendor_page_id", table_name="vendor", if_exists=True)
+    op.drop_index("ix_item_page_id", table_name="item", if_exists=True)
+    op.drop_index("ix_page_pending", table_name="page", if_exists=True)
+    op.drop_index("ix_market_name", table_name="market", if_exists=True)
@@ -0,0 +1,32 @@
+"""Add an index to look up the pages by file
+
+Revision ID: 9b1e7d2a4c6f
+Revises: c58f5c838372
+Create Date: 2026-10-17 14:21:36.402915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1e7d2a4c6f'
+down_revision = 'c58f5c838372'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Files are content addressed, many pages may point to the same one
+    op.create_index(
+        "ix_page_file",
+        "page",
+        ["file"],
+        postgresql_where=sa.text("file IS NOT NULL"),
+        sqlite_where=sa.text("file IS NOT NULL"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_page_file", table_name="page", if_exists=True)
@@ -0,0 +1,31 @@
+"""Add the lease and retry columns to the pages
+
+Revision ID: c58f5c838372
+Revises: 41ef406baded
+Create Date: 2026-10-17 10:47:03.514273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58f5c838372'
+down_revision = '41ef406baded'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("page", sa.Column("leased_until", sa.DateTime(timezone=True)))
+    op.add_column("page", sa.Column("lease_owner", sa.String(100)))
+    op.add_column("page", sa.Column("attempts", sa.Integer(), server_default="0"))
+    op.add_column("page", sa.Column("next_attempt", sa.DateTime(timezone=True)))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("page") as batch_op:
+        batch_op.drop_column("next_attempt")
+        batch_op.drop_column("attempts")
+        batch_op.drop_column("lease_owner")
+        batch_op.drop_column("leased_until")
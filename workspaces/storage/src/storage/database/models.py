@@ -26,6 +26,8 @@ from sqlalchemy import (
     DateTime,
     Float,
     Integer,
+    Index,
+    text,
 )
 
 from sqlalchemy import exc
@@ -42,17 +44,18 @@ class CRUD:
     Similarly to the use of `save` methods on Django
     """
 
-    __session = None
-
     @property
     def _session(self):
-        if not self.__session:
-            self.__session = get_database().session
+        # The session of the current thread
+        return get_database().session
 
-        return self.__session
+    def prepare(self):
+        """Hook to fill in derived values before the instance is added to the session"""
+        pass
 
     def save(self):
         ses = self._session
+        self.prepare()
         ses.add(self)
         return self.commit()
 
@@ -77,6 +80,7 @@ class GUID(TypeDecorator):
     """
 
     impl = CHAR(36)
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is None:
@@ -142,7 +146,7 @@ class Market(Mixin, Base):
 
     __tablename__ = "market"
 
-    name = Column(String(200))
+    name = Column(String(200), index=True)
 
     pages = relationship(
         "Page",
@@ -200,7 +204,7 @@ class Vendor(Mixin, Base):
     shipping_to = Column(String)
 
     # relationships
-    page_id = Column(GUID, ForeignKey("page.id", ondelete="CASCADE"))
+    page_id = Column(GUID, ForeignKey("page.id", ondelete="CASCADE"), index=True)
 
     page = relationship(
         "Page",
@@ -209,9 +213,9 @@ class Vendor(Mixin, Base):
         cascade="all, delete",
     )
 
-    def save(self):
+    def prepare(self):
         """If the model does not contain a reputation metrics, assume this is given
-        by the other parameters. Then attempt to calculate the reputation and save the model.
+        by the other parameters. Then attempt to calculate the reputation.
         """
         if not self.reputation:
             from storage.events import reputation_fn
@@ -224,9 +228,6 @@ class Vendor(Mixin, Base):
             if rep:
                 self.reputation = rep
 
-        # Save the instance
-        super().save()
-
 
 class Crypto(Mixin, Base):
     """Crypto currencies. Although this table only contains one column, it is
@@ -289,7 +290,7 @@ class Item(Mixin, Base):
     stock = Column(Integer)
 
     # relationships
-    page_id = Column(GUID, ForeignKey("page.id", ondelete="CASCADE"))
+    page_id = Column(GUID, ForeignKey("page.id", ondelete="CASCADE"), index=True)
 
     page = relationship(
         "Page",
@@ -315,17 +316,45 @@ class Page(Mixin, Base):
         parsed: whether or not the file has been parsed.
         page_type: Type of the page. Vendor, Listing or so.
         market: market rel. in where the page was found
+
+        leased_until: until when the page is leased to a crawler
+        lease_owner: crawler that leased the page
+        attempts: failed attempts to crawl the page
+        next_attempt: when the page can be leased again after failing
     """
 
     PAGES = [("vendor", "Vendor"), ("item", "Item")]
 
     __tablename__ = "page"
-    __table_args__ = (UniqueConstraint("url", "market_id"),)
+    __table_args__ = (
+        UniqueConstraint("url", "market_id"),
+        # Pages pending to crawl, see `PageEndpoint.pending`
+        Index(
+            "ix_page_pending",
+            "market_id",
+            "page_type",
+            postgresql_where=text("file IS NULL"),
+            sqlite_where=text("file IS NULL"),
+        ),
+        # Files are content addressed and shared between pages
+        Index(
+            "ix_page_file",
+            "file",
+            postgresql_where=text("file IS NOT NULL"),
+            sqlite_where=text("file IS NOT NULL"),
+        ),
+    )
 
     file = Column(String(200))
     url = Column(String(200), nullable=False)
     page_type = Column(ChoiceType(PAGES))
 
+    # Crawl queue
+    leased_until = Column(DateTime(timezone=True))
+    lease_owner = Column(String(100))
+    attempts = Column(Integer, default=0, server_default="0")
+    next_attempt = Column(DateTime(timezone=True))
+
     # Relationships
     market_id = Column(GUID, ForeignKey("market.id"))
     crawl_id = Column(GUID, ForeignKey("crawl.id"))
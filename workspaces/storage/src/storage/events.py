@@ -15,9 +15,14 @@
 """This package contains multiple observable wrapper events"""
 
 import os
-from typing import Any, Dict
+import time
 
-from sqlalchemy import or_
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator
+
+from sqlalchemy import exc, or_
 from sqlalchemy.orm.collections import InstrumentedList
 from storage.api.factory import (
     ApiFactory,
@@ -25,30 +30,21 @@ from storage.api.factory import (
     PageEndpoint,
     VendorEndpoint,
 )
+from storage.database.models import Market, Page
+from storage.volume.archives import benchmark
 from storage.volume.volume import volume
 
 from lib.logger.logger import log
 
 def get_pending_pages(market: str = None, limit: int = 100):
     """Returns a list of pending to scrape pages"""
-    page_ep = PageEndpoint()
-
-    pending = (
-        # Query the model
-        page_ep.db.session.query(page_ep.model)
-        # Filter the db to get those without vendor or items
-        .filter(
-            page_ep.model.vendor == None,  # There isnt a vendor
-            page_ep.model.item == None,  # There isnt an item
-            page_ep.model.file.is_not(None),  # There is a file
-        )
-    )
+    ret = pending_pages_query(market=market).limit(limit).all()
+    return ret
 
-    if market:
-        pending = pending.filter(page_ep.model.market.has(name=market))
 
-    ret = pending.limit(limit).all()
-    return ret
+def pending_pages_query(market: str = None):
+    """Query for the pages with a file but without a vendor or an item"""
+    return PageEndpoint().unscraped_query(market=market)
 
 
 def get_vendors_without_page():
@@ -87,7 +83,8 @@ def get_vendors_feedback(market: str = None):
 
 def get_page_content(page):
     """Returns the content from some file stored in the volume"""
-    ret = volume.retrieve(page.file)
+    market = page.market.name if page.market else None
+    ret = volume.retrieve(page.file, market=market, page_type=page.page_type.code)
     return ret
 
 
@@ -111,67 +108,303 @@ def scrape_content(page, data: bytes, scraper) -> Dict[Any, Any]:
         return data_points
 
 
-def store_serialised_entry(model: str, data: Dict[Any, Any], force: bool = True):
+def scrape_contents(contents: list[tuple[Any, bytes]], scraper) -> list[Dict[Any, Any] | None]:
+    """Scrapes the data points from the content of many pages in a single call
+
+    Args:
+        contents (list[tuple[Page, bytes]]): Pages and the content of their files. The
+            market of the pages is either the market or its name
+
+    Returns:
+        list[Dict[Any, Any]]: Data points found in each file, in the same order. None if
+            the scraper failed on the page
+    """
+    # Only the pages with a market can be scraped, the rest have no data points
+    batch = [
+        (i, dict(market=getattr(page.market, "name", page.market), model=page.page_type, data=data))
+        for i, (page, data) in enumerate(contents)
+        if page.market
+    ]
+
+    results: list = [{} for _ in contents]
+    if not batch:
+        return results
+
+    scraped = scrape_batch([entry for _, entry in batch], scraper=scraper)
+    for (i, _), data_points in zip(batch, scraped):
+        results[i] = data_points
+
+    return results
+
+
+def scrape_batch(pages: list[Dict[str, Any]], scraper) -> list[Dict[Any, Any] | None]:
+    """Send a batch of pages to the scraper. If the call fails, i.e. one page breaks
+    it, the batch is split in halves and each one tried again, so only the pages that
+    fail on their own are lost
+
+    Returns:
+        list[Dict[Any, Any]]: Data points of each page, None if the scraper failed on it
+    """
+    try:
+        return scraper.scrape_batch(pages=pages)
+    except Exception as e:
+        if len(pages) == 1:
+            log.error(f"Failed to scrape a page of {pages[0]['market']}: {e}")
+            return [None]
+
+        log.warning(f"Failed to scrape a batch of {len(pages)} pages, splitting it: {e}")
+
+    half = len(pages) // 2
+    return scrape_batch(pages[:half], scraper=scraper) + scrape_batch(pages[half:], scraper=scraper)
+
+
+def store_serialised_entry(
+    model: str, data: Dict[Any, Any], force: bool = True, commit: bool = True
+):
     """Stores some entry serialised data
 
     Args:
         model (str): Name of the model. In lower case
         data (Dict[Any, Any]): Data with which to fill the entry
         force (bool, optional): Force the creation of the entry to a new one. Defaults to True.
+        commit (bool, optional): Commit the entry, otherwise the caller commits it. Defaults to True.
     """
     # Clean the model
     model = model.lower()
 
     endpoint = ApiFactory.get_endpoint(model)
-    instance = endpoint.store(force=force, **data)
+    instance = endpoint.store(force=force, commit=commit, **data)
 
     return instance
 
 
-def scrape(scraper, market: str = None):
-    """Wrapper for the events related to scraping content from pending files"""
-    # Get the pending pages
-    log.info("Scraping pending content")
-    pending = get_pending_pages(market=market)
+@dataclass
+class PendingPage:
+    """A page pending to scrape, detached from the session so it can be passed
+    between threads"""
 
-    while pending:
-        print(f"Pages: {len(pending)}")
+    id: Any
+    file: str
+    market: str | None
+    page_type: Any
 
-        for page in pending:
-            # Get the content
-            content = get_page_content(page)
 
-            if not content:
-                # Update the page to let know that the file could
-                # not be found
-                page_ep = PageEndpoint()
-                page_ep.update(page, file=None)
+@dataclass
+class ScrapePipeline:
+    """Scrapes the pending pages in stages that run at the same time.
 
-                continue
+    - The pending pages are read in batches, following their ids
+    - Each batch is read from the volume and sent to the scraper from a pool of threads
+    - The results are written to the database, one transaction per batch for the
+      entries found, and another one for the pages missing or empty
+    - The files of the batch are compressed in the background
 
-            # Store the content on the respective model
-            data_points = scrape_content(page, content, scraper=scraper)
+    Attributes:
+        scraper: Scraper stub
+        market (str): Only scrape the pages of this market
+        workers (int): Batches being scraped at the same time
+        batch_size (int): Pages in each batch
+    """
 
-            if not data_points:
-                # If the page could not be parsed, delete it from the database, it might contain errors.
-                page_ep = PageEndpoint()
-                page_ep.delete(page)
+    scraper: Any
+    market: str = None
+    workers: int = 4
+    batch_size: int = 100
 
-                continue
+    stats: Dict[str, int] = field(
+        default_factory=lambda: dict(pages=0, stored=0, empty=0, missing=0, failed=0)
+    )
+    _start: float = field(default=0, init=False, repr=False)
 
-            data_points.update({"page": {"id": page.id}})
+    def run(self) -> Dict[str, int]:
+        """Scrape all the pending pages
 
-            # Store the data in the database serialised
-            _ = store_serialised_entry(model=page.page_type.value, data=data_points)
+        Returns:
+            Dict[str, int]: Count of the pages by their outcome
+        """
+        log.info("Scraping pending content")
+        self._start = time.monotonic()
 
-            # Compress the page, as it will not be needed anymore
-            volume.compress(
-                name=page.file,
-                market=page.market.name,
-                page_type=page.page_type.code,
+        with ThreadPoolExecutor(self.workers) as pool, ThreadPoolExecutor(1) as compressor:
+            inflight: deque = deque()
+            compressing: list[Future] = []
+
+            for batch in self.read():
+                inflight.append((batch, pool.submit(self.scrape, batch)))
+
+                # Write the oldest batch while the rest are being scraped
+                if len(inflight) >= self.workers:
+                    compressing.append(self.write(*inflight.popleft(), compressor))
+
+            while inflight:
+                compressing.append(self.write(*inflight.popleft(), compressor))
+
+            for future in compressing:
+                future.result()
+
+        self.report()
+        return self.stats
+
+    def read(self) -> Iterator[list[PendingPage]]:
+        """Read the pending pages in batches, in the order of their ids.
+        Pages that stay pending, i.e. the scraper failed on them, are not read again"""
+        query = pending_pages_query(market=self.market)
+        if not self.market:
+            query = query.outerjoin(Page.market)
+
+        query = query.with_entities(Page.id, Page.file, Market.name, Page.page_type)
+
+        last = None
+        while True:
+            q = query if last is None else query.filter(Page.id > last)
+            rows = q.order_by(Page.id).limit(self.batch_size).all()
+
+            if not rows:
+                break
+
+            yield [PendingPage(id=i, file=f, market=m, page_type=t) for i, f, m, t in rows]
+            last = rows[-1][0]
+
+    def scrape(self, batch: list[PendingPage]) -> list[Dict[Any, Any] | None | bool]:
+        """Read the files of the batch and scrape them.
+        Runs in the threads of the pool, so it does not touch the database
+
+        Returns:
+            list: Data points of each page, None if the scraper failed, or False if
+                the file is missing
+        """
+        results: list = [False] * len(batch)
+        found, contents = [], []
+
+        for i, page in enumerate(batch):
+            content = volume.retrieve(
+                page.file, market=page.market, page_type=page.page_type.code
             )
+            if content:
+                found.append(i)
+                contents.append((page, content))
+
+        for i, data_points in zip(found, scrape_contents(contents, scraper=self.scraper)):
+            results[i] = data_points
+
+        return results
+
+    def write(self, batch: list[PendingPage], future: Future, compressor: ThreadPoolExecutor) -> Future:
+        """Store the results of a batch, then send its files to compress
+
+        Returns:
+            Future: Compression of the files of the batch
+        """
+        results = future.result()
+        session = PageEndpoint().db.session
+
+        entries, empty, missing = [], [], []
+        for page, data_points in zip(batch, results):
+            if data_points is False:
+                missing.append(page.id)
+            elif data_points is None:
+                self.stats["failed"] += 1
+            elif not data_points:
+                empty.append(page.id)
+            else:
+                data_points.update({"page": {"id": page.id}})
+                entries.append((page, data_points))
+
+        self.stats["pages"] += len(batch)
+        self.drop(missing=missing, empty=empty)
+
+        try:
+            # Related instances are written in savepoints, nothing is committed until
+            # the whole batch is
+            for page, data_points in entries:
+                store_serialised_entry(
+                    model=page.page_type.value, data=data_points, commit=False
+                )
+
+            session.commit()
+
+        except exc.SQLAlchemyError as e:
+            # Store the entries one by one, so one bad entry does not lose the batch
+            log.error(f"Failed to store a batch of {len(entries)} entries, retrying one by one: {e}")
+            session.rollback()
+
+            stored = []
+            for page, data_points in entries:
+                try:
+                    store_serialised_entry(model=page.page_type.value, data=data_points)
+                    stored.append((page, data_points))
+                except exc.SQLAlchemyError as e:
+                    session.rollback()
+                    log.error(f"Failed to store page {page.id}: {e}")
+
+            self.stats["failed"] += len(entries) - len(stored)
+            entries = stored
+
+        self.stats["stored"] += len(entries)
+        self.report()
+
+        # Compress the pages, as they will not be needed anymore. Unless other pages
+        # with the same content are still waiting to be scraped
+        in_use = PageEndpoint().files_in_use([page.file for page, _ in entries])
+        done = [page for page, _ in entries if page.file not in in_use]
+
+        return compressor.submit(self.compress, done)
+
+    def drop(self, missing: list[Any], empty: list[Any]) -> None:
+        """Set the pages whose file is missing back to pending, and delete the empty
+        ones. Committed on their own, before the entries of their batch"""
+        if not (missing or empty):
+            return
+
+        session = PageEndpoint().db.session
+
+        try:
+            # The files could not be found, let know the page is not crawled
+            if missing:
+                session.query(Page).filter(Page.id.in_(missing)).update(
+                    {Page.file: None}, synchronize_session=False
+                )
+
+            # If the page could not be parsed, delete it from the database, it might contain errors.
+            if empty:
+                session.query(Page).filter(Page.id.in_(empty)).delete(synchronize_session=False)
+
+            session.commit()
+
+        except exc.SQLAlchemyError as e:
+            session.rollback()
+            log.error(f"Failed to drop {len(missing)} missing and {len(empty)} empty pages: {e}")
+            self.stats["failed"] += len(missing) + len(empty)
+            return
+
+        self.stats["missing"] += len(missing)
+        self.stats["empty"] += len(empty)
+
+    def compress(self, pages: list[PendingPage]) -> None:
+        groups: dict[tuple, list[str]] = {}
+        for page in pages:
+            groups.setdefault((page.market, page.page_type.code), []).append(page.file)
+
+        for (market, page_type), names in groups.items():
+            volume.compress_many(names, market=market, page_type=page_type)
+
+    def report(self) -> None:
+        elapsed = max(time.monotonic() - self._start, 1e-6)
+        stats = self.stats
 
-        pending = get_pending_pages(market=market)
+        log.info(
+            f"Pages: {stats['pages']} ({stats['pages'] / elapsed:.1f}/s) | "
+            f"stored: {stats['stored']}, empty: {stats['empty']}, "
+            f"missing: {stats['missing']}, failed: {stats['failed']}"
+        )
+
+
+def scrape(scraper, market: str = None, workers: int = 4, batch_size: int = 100):
+    """Wrapper for the events related to scraping content from pending files"""
+    pipeline = ScrapePipeline(
+        scraper=scraper, market=market, workers=workers, batch_size=batch_size
+    )
+    return pipeline.run()
 
 
 def get_market_pages(market: str = None, pending: list = None):
@@ -191,7 +424,7 @@ def get_market_pages(market: str = None, pending: list = None):
         pages = pages.filter(page_ep.model.file.in_(pending))
 
     if market:
-        pages = pages.filter(page_ep.model.market.has(name=market))
+        pages = pages.join(page_ep.model.market).filter(Market.name == market)
 
     ret = pages.all()
     return ret
@@ -202,10 +435,16 @@ def get_pending_files():
     return filenames
 
 
-def rescrape_targetted(scraper, market: str):
-    """Wrapper for the events related to re-scrape the content of the pages"""
+def rescrape_targetted(scraper, market: str, files: list[str] = None):
+    """Wrapper for the events related to re-scrape the content of the pages
+
+    Args:
+        scraper: Scraper service
+        market (str): Name of the market
+        files (list[str]): Files to re-scrape, the pending files by default
+    """
     eps = {"item": ItemEndpoint(), "vendor": VendorEndpoint()}
-    pending = get_pending_files()
+    pending = get_pending_files() if files is None else files
     log.info(f"Rescraping... pending: {len(pending)}")
 
     csize = 100
@@ -213,6 +452,7 @@ def rescrape_targetted(scraper, market: str):
         chunk = pending[i : i + csize]
         pages = get_market_pages(market=market, pending=chunk)
 
+        contents = []
         for page in pages:
             # Get the content
             content = get_page_content(page)
@@ -220,17 +460,28 @@ def rescrape_targetted(scraper, market: str):
             if not content:
                 continue
 
-            # Store the content on the respective model
-            data_points = scrape_content(page, content, scraper=scraper)
+            contents.append((page, content))
+
+        # Scrape the content of all the pages in the chunk at once
+        scraped = scrape_contents(contents, scraper=scraper)
+
+        for (page, _), data_points in zip(contents, scraped):
+            # The scraper failed, keep the file
+            if data_points is None:
+                continue
+
             ep = eps[page.page_type.code]
 
             if not data_points:
-                # Delete the file
-                volume.delete(page.file)
                 # Empty the space
+                filename = page.file
                 pe = PageEndpoint()
                 pe.update(page, file=None)
 
+                # Delete the file, unless other pages with the same content need it
+                if not pe.files_in_use([filename]):
+                    volume.delete(filename)
+
                 continue
 
             # Store the data in the database serialised
@@ -243,19 +494,61 @@ def rescrape_targetted(scraper, market: str):
 
             # Compress the page, as it will not be needed anymore
             volume.compress(
-                name=page.file, market=market, page_type=page.page_type.code
+                name=page.file, market=page.market.name, page_type=page.page_type.code
             )
 
+        # Write the compressed pages to disk once per chunk
+        volume.flush()
+
 
 def re_scrape(
-    scraper, market: str, page_type: str, extract: bool = True, keep_zip=True
+    scraper, market: str, page_type: str, extract: bool = False, keep_zip=True
 ):
     # Extract the content if stated
     if extract:
         volume.extract(market=market, keep_zip=keep_zip, page_type=page_type)
+        files = get_pending_files()
+
+    # Otherwise, read the content straight from the zip files
+    else:
+        files = get_pending_files() + volume.archived(market=market, page_type=page_type)
 
     # Scrape the targetted content
-    rescrape_targetted(scraper, market=market)
+    rescrape_targetted(scraper, market=market, files=files)
+
+
+def benchmark_archives(
+    market: str = None, page_type: str = None, files: int = 1000, formats: list[str] = None
+) -> list[dict[str, Any]]:
+    """Compare the formats of the archives over some of the pending files
+
+    Args:
+        market (str): Only the files of this market
+        page_type (str): Only the files of this page type
+        files (int): Amount of files to compare the formats with
+        formats (list[str]): Formats to compare, all of them by default
+
+    Returns:
+        list[dict]: Results of each format
+    """
+    suffix = "".join("_" + n for n in [market, page_type] if n)
+    filenames = next(os.walk(volume.pending), (None, None, []))[2]
+    filepaths = [
+        os.path.join(volume.pending, f) for f in sorted(filenames) if f.endswith(suffix)
+    ][:files]
+
+    if not filepaths:
+        log.warning("No files to compare the archives with")
+        return []
+
+    results = benchmark(filepaths, formats=formats)
+    for r in results:
+        log.info(
+            f"{r['format']}: {r['files']} files, {r['size']} -> {r['archived']} bytes, "
+            f"ratio {r['ratio']:.2f}, write {r['write']:.1f} MB/s, read {r['read']:.1f} MB/s"
+        )
+
+    return results
 
 
 def create_pending_vendors():
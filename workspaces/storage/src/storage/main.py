@@ -29,12 +29,17 @@ import hydra
 from hydra.core.config_store import ConfigStore
 from omegaconf import MISSING
 from storage.server.storage import Storage
+from storage.volume.volume import volume
 
 
 @dataclass
 class StorageConfig(Config):
     # Database configuration
     db: Database = MISSING
+    # Threads serving requests. Keep it within the database pool size
+    workers: int = 10
+    # Format of the new zip files, `zip` or `zstd`
+    archive: str = "zip"
 
 
 cs = ConfigStore.instance()
@@ -44,9 +49,10 @@ cs.store(name="base_config", node=StorageConfig)
 @hydra.main(version_base=None, config_path="config", config_name="config")
 def main(cfg: Config) -> None:
     # Read the credentials and build the server
-    server = ServerFactory.create_server(servicer=Storage, host=cfg.host, workers=10)
+    server = ServerFactory.create_server(servicer=Storage, host=cfg.host, workers=cfg.workers)
     # Create a database connection and load the models
     _ = create_database(cfg.db)
+    volume.archive = cfg.archive
 
     start_server(server)
 
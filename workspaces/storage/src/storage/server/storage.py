@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from storage.api.factory import PageEndpoint
+from storage.database.database import scoped
 from storage.volume.volume import volume
 
 # Although the name is confusing, this refers to the server/client connection between
@@ -23,39 +24,127 @@ from lib.protos import storage_pb2_grpc, storage_pb2
 class Storage(storage_pb2_grpc.StorageServicer):
     """Endpoint for the Storage functions"""
 
+    @scoped
     def Store(self, request, context) -> storage_pb2.StoreResponse:
         """This function offers an endpoint to store PAGES in the database"""
         fc = PageEndpoint()
+        pages = []
+        # Files written by this request
+        created = set()
 
+        # Store the content of the pages in the local storage first
         for page in request.pages:
             if page.url:
-                # Semi-serialise the data into a json like object
-                serialised: dict = {
-                    "url": page.url,
-                    "market": {
-                        "name": request.market,
-                    },
-                    "page_type": request.model,
-                    # "status_code": page.status_code,
-                }
+                filename = None
 
                 if page.data:
-                    # Store the content of the page in the local storage
-                    filename = volume.store(data=page.data, market=request.market, page_type=request.model)
-                    serialised.update({"file": filename})
+                    filename = volume.address(data=page.data, market=request.market, page_type=request.model)
 
-                # Attempt to find the page
-                instance = fc.find(url=page.url, market=request.market)
+                    # The same content is already stored, there is nothing to write
+                    if not volume.stored(filename, market=request.market, page_type=request.model):
+                        volume.store(data=page.data, name=filename)
+                        created.add(filename)
 
-                if instance:
-                    fc.update(instance, **serialised)
-                else:
-                    fc.store(force=False, **serialised)
+                pages.append(dict(url=page.url, file=filename))
 
-        response = storage_pb2.StoreResponse(market=request.market, model=request.model)
+        # Then store all the pages in the database at once
+        results = fc.store_batch(market=request.market, page_type=request.model, pages=pages)
 
-        return response
+        return self._store_response(
+            market=request.market, model=request.model, results=results, created=created
+        )
 
+    @scoped
+    def StoreStream(self, request_iterator, context) -> storage_pb2.StoreResponse:
+        """Stores PAGES sent in chunks. The data of each page is written into the
+        volume as it arrives, so it is never held in memory all at once"""
+        fc = PageEndpoint()
+        market, model = "", ""
+        pages = []
+        # Files written by this request
+        created = set()
+
+        # File the data of the current page is written to
+        writer = None
+
+        try:
+            for chunk in request_iterator:
+                # A chunk with a url starts a new page, the previous one is complete
+                if chunk.url:
+                    if writer:
+                        pages[-1]["file"] = self._close(writer, created)
+
+                    market, model = chunk.market, chunk.model
+                    pages.append(dict(url=chunk.url, file=None))
+                    writer = volume.writer(market=market, page_type=model)
+
+                if chunk.data and writer:
+                    writer.write(chunk.data)
+
+            if writer:
+                pages[-1]["file"] = self._close(writer, created)
+
+        except Exception:
+            # Do not leave partial files behind if the stream breaks
+            if writer:
+                writer.discard()
+            raise
+
+        # Store all the pages in the database at once
+        results = fc.store_batch(market=market, page_type=model, pages=pages)
+
+        return self._store_response(market=market, model=model, results=results, created=created)
+
+    def _close(self, writer, created: set) -> str | None:
+        """Close the file of a page and keep track of it if it was written"""
+        filename = writer.close()
+        if writer.created:
+            created.add(filename)
+
+        return filename
+
+    def _store_response(
+        self, market: str, model: str, results: list[dict], created: set = None
+    ) -> storage_pb2.StoreResponse:
+        """Build the response with the outcome of each page"""
+        Status = storage_pb2.StoreResponse.Page.Status
+        pages = []
+
+        self._drop_unused(results, created or set())
+
+        for result in results:
+            pages.append(
+                storage_pb2.StoreResponse.Page(
+                    url=result["url"],
+                    status=Status.Value(result["status"].upper()),
+                    file=result["file"] or "",
+                )
+            )
+
+        n_pages = len([page for page in pages if page.status != Status.FAILED])
+
+        return storage_pb2.StoreResponse(market=market, model=model, n_pages=n_pages, pages=pages)
+
+    def _drop_unused(self, results: list[dict], created: set) -> None:
+        """Remove the files written by the request that no page needs. Files are
+        content addressed, so the same file may be used by other pages too"""
+        # Pages that must be scraped from these files
+        needed = {r["file"] for r in results if r["status"] in ("created", "updated")}
+
+        # Either the page could not be stored, or it had this same content already
+        # and the file was compressed since
+        unused = {
+            r["file"]
+            for r in results
+            if r["status"] in ("failed", "unchanged") and r["file"] in created
+        } - needed
+
+        # Other requests may have stored the same content meanwhile
+        if unused:
+            for filename in unused - PageEndpoint().files_in_use(unused):
+                volume.delete(filename)
+
+    @scoped
     def Pending(self, request, context) -> storage_pb2.PendingResponse:
         """Returns the list of page urls that have not been crawled yet."""
         fc = PageEndpoint()
@@ -71,20 +160,52 @@ class Storage(storage_pb2_grpc.StorageServicer):
             pages=pending, market=request.market, model=request.model
         )
 
+    @scoped
+    def Lease(self, request, context):
+        """Leases pending pages to the crawler that asks for them. Pages leased to a
+        crawler are not handed to any other until they are stored, released or the
+        lease expires"""
+        fc = PageEndpoint()
+
+        kwargs = dict(owner=request.owner, market=request.market, page_type=request.model)
+        if request.limit:
+            kwargs["limit"] = request.limit
+        if request.ttl:
+            kwargs["ttl"] = request.ttl
+
+        urls = fc.lease(**kwargs)
+        leased = [storage_pb2.LeasedPage(url=url) for url in urls if url]
+
+        return iter(leased)
+
+    @scoped
+    def Release(self, request, context) -> storage_pb2.ReleaseResponse:
+        """Gives back the leased pages that could not be crawled"""
+        fc = PageEndpoint()
+
+        n_pages = fc.release(
+            owner=request.owner,
+            urls=list(request.pages),
+            market=request.market,
+            failed=request.failed,
+        )
+
+        return storage_pb2.ReleaseResponse(n_pages=n_pages)
+
+    @scoped
     def Check(self, request, context):
         """Returns the list of pages that can be found in the database"""
         fc = PageEndpoint()
 
         # Get the existing pages from the db and create placeholders for those which are not
-        pages = fc.exists(
+        urls = fc.exists(
             market=request.market,
             page_type=request.model,
             pages=request.pages,
             placeholders=True,
         )
 
-        # Get only the urls from the pages
-        exists = [page.url for page in pages if page.url]
+        exists = [url for url in urls if url]
 
         return storage_pb2.CheckResponse(
             pages=exists, market=request.market, model=request.model
@@ -12,9 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from dataclasses import dataclass
+from typing import Any
+
 from lib.stubs.interfaces import Stub
 
 
+@dataclass
 class Scraper(Stub):
     def scrape(self, model: str, market: str, data: bytes):
         raise NotImplementedError
+
+    def scrape_batch(self, pages: list[dict[str, Any]]) -> list[dict[Any, Any] | None]:
+        raise NotImplementedError
@@ -12,17 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
+
+from lib.logger.logger import log
 from lib.stubs.factory import StubFactory
 from storage.stubs.interfaces import Scraper
-from lib.protos.scraper_pb2 import ScrapeRequest
+from lib.protos.scraper_pb2 import ScrapeBatchRequest, ScrapeRequest
 from lib.protos.scraper_pb2_grpc import ScraperStub
 
 from google.protobuf import json_format
 
 
+@dataclass
 @StubFactory.register("scraper")
 class ScraperService(Scraper):
-    _stub_class = ScraperStub
+    _stub_cls = ScraperStub
+    # Bytes of pages sent in a single call, under the 4 MiB gRPC messages are limited to
+    _max_batch_bytes: int = 3 * 1024 * 1024
 
     def scrape(self, model: str, market: str, data: bytes):
         request = ScrapeRequest(model=model.value, market=market, data=data)
@@ -30,3 +37,64 @@ class ScraperService(Scraper):
 
         ret = json_format.MessageToDict(response.content)
         return ret
+
+    def scrape_batch(self, pages: list[dict[str, Any]]) -> list[dict[Any, Any] | None]:
+        """Scrape many pages in as few calls as their size allows
+
+        Args:
+            pages (list[dict]): Pages with their `market`, `model` and `data`
+
+        Returns:
+            list[dict]: Content of each page, in the same order. None if the page failed
+        """
+        results: list[dict[Any, Any] | None] = []
+
+        for batch in self._batches([self._request(**page) for page in pages]):
+            response = self.stub.ScrapeBatch(ScrapeBatchRequest(pages=batch))
+            results += [self._content(page) for page in response.pages]
+
+        return results
+
+    def _batches(self, requests: list[ScrapeRequest]) -> Iterator[list[ScrapeRequest]]:
+        """Split the requests into batches of at most `_max_batch_bytes`. A page bigger
+        than that goes on its own"""
+        batch: list[ScrapeRequest] = []
+        size = 0
+
+        for request in requests:
+            n = request.ByteSize()
+
+            if batch and size + n > self._max_batch_bytes:
+                yield batch
+                batch, size = [], 0
+
+            batch.append(request)
+            size += n
+
+        if batch:
+            yield batch
+
+    def scrape_stream(self, pages: Iterable[dict[str, Any]]) -> Iterator[tuple[str, dict[Any, Any] | None]]:
+        """Scrape the pages as they are produced. The pages are tagged with their `id`
+
+        Args:
+            pages (Iterable[dict]): Pages with their `id`, `market`, `model` and `data`
+
+        Returns:
+            Iterator[tuple[str, dict]]: Id and content of each page. None if the page failed
+        """
+        requests = (self._request(**page) for page in pages)
+
+        for response in self.stub.ScrapeStream(requests):
+            yield response.id, self._content(response)
+
+    def _request(self, model, market: str, data: bytes, id: str = "") -> ScrapeRequest:
+        model = getattr(model, "value", model)
+        return ScrapeRequest(model=model, market=market, data=data, id=str(id))
+
+    def _content(self, response) -> dict[Any, Any] | None:
+        if response.error:
+            log.error(f"Failed to scrape page {response.id}: {response.error}")
+            return None
+
+        return json_format.MessageToDict(response.content)
@@ -0,0 +1,923 @@
+# Copyright 2023 Ricardo Yaben
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Formats of the archives with the parsed files.
+
+Archives are always zip files, but their members may be compressed differently:
+
+    - zip: members compressed with deflate, readable by any zip tool.
+    - zstd: members compressed with zstandard, using a dictionary trained from the
+      first pages of the archive. The pages of a market share most of their markup,
+      so the dictionary saves most of it. The dictionary is stored in the archive
+      itself, so every archive can be read on its own.
+
+Zstd archives always have the member with the dictionary, even if empty, which tells
+them apart. Their members are stored as zstd frames, save those compressed with
+deflate when copied from an archive with another dictionary.
+
+The `zstd` format needs the `zstandard` package, see the `zstd` extra.
+"""
+
+import os
+import glob
+import json
+import mmap
+import shutil
+import struct
+import threading
+import tempfile
+import time
+import zipfile
+import zlib
+
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable
+
+from lib.logger.logger import log
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Member of the zstd archives with their dictionary
+_DICTIONARY: str = ".zstd-dictionary"
+# Fixed part of the local header of the zip members
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+# Records written by `RawZipWriter`, see the specification of the zip format
+_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_DIRECTORY = struct.Struct("<4s4B4HL2L5H2L")
+_END_ARCHIVE = struct.Struct("<4s4H2LH")
+_END_ARCHIVE64 = struct.Struct("<4sQ2H2L4Q")
+_END_ARCHIVE64_LOCATOR = struct.Struct("<4sLQL")
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise ImportError("The zstd archives need the `zstandard` package")
+
+
+@dataclass
+class ArchiveFactory:
+    archives = {}
+
+    @classmethod
+    def register(cls, name: str) -> Callable:
+        def decorator(decorator_cls: "PackWriter") -> "PackWriter":
+            cls.archives[name] = decorator_cls
+
+            return decorator_cls
+
+        return decorator
+
+    @classmethod
+    def create(cls, name: str, **kwargs) -> "PackWriter":
+        try:
+            archive = cls.archives[name]
+        except KeyError as err:
+            raise NotImplementedError(f"{name=} doesn't exist") from err
+
+        return archive(**kwargs)
+
+
+@ArchiveFactory.register("zip")
+@dataclass
+class PackWriter:
+    """Appends parsed files to the zip files of a folder.
+
+    The current zip file is kept open and its amount of members is tracked in memory,
+    so adding a file does not need to look for the latest zip file nor read its
+    contents. When the zip file is full, a new one is started.
+
+    Files are only removed from the pending folder after they are flushed, that is,
+    once the zip file was closed, its index written and synced to the disk.
+
+    Attributes:
+        directory: Folder of the zip files
+        max_files: Maximum amount of files included in a zip file
+    """
+
+    directory: str
+    max_files: int
+
+    _zip: zipfile.ZipFile = field(default=None, init=False, repr=False)
+    _path: str = field(default=None, init=False, repr=False)
+    _count: int = field(default=0, init=False, repr=False)
+    # Names of the files in the current zip file
+    _names: set[str] = field(default_factory=set, init=False, repr=False)
+    # Files written since the last flush
+    _written: list[str] = field(default_factory=list, init=False, repr=False)
+
+    @property
+    def path(self) -> str | None:
+        """Path to the current zip file"""
+        return self._path
+
+    def add(self, name: str, filepath: str) -> str:
+        """Add a file to the current zip file
+
+        Args:
+            name: Name of the file in the zip file
+            filepath: Path to the file
+
+        Returns:
+            str: Path to the zip file
+        """
+        if self._path is None:
+            self._open(self._latest())
+
+        # Start a new zip file when the current one is full
+        if self._count >= self.max_files:
+            self.flush()
+            self._open(self._new())
+
+        if self._zip is None:
+            self._open(self._path)
+
+        # Names are the content of the files, the file is in the zip file already
+        if name not in self._names:
+            self._write(name, filepath)
+            self._names.add(name)
+            self._count += 1
+
+        self._written.append(filepath)
+
+        return self._path
+
+    def flush(self) -> None:
+        """Write the index of the zip file, sync it to the disk and remove the
+        files that were added to it"""
+        if self._zip is None:
+            return
+
+        # Closing writes the index. The file is opened again on the next add
+        self._zip.close()
+        self._zip = None
+
+        fd = os.open(self._path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        for filepath in self._written:
+            if os.path.isfile(filepath):
+                os.remove(filepath)
+
+        self._written = []
+
+    def _write(self, name: str, filepath: str) -> None:
+        self._zip.write(filepath, name, zipfile.ZIP_DEFLATED)
+
+    def _open(self, path: str) -> None:
+        """Open a zip file to append files to it"""
+        self._zip = zipfile.ZipFile(path, mode="a")
+
+        # Only the first time, afterwards the count is kept in memory
+        if path != self._path:
+            self._names = set(self._zip.namelist())
+            self._count = len(self._names)
+
+        self._path = path
+
+    def _latest(self) -> str:
+        """The last zip file created in the folder, or a new one"""
+        files = list(filter(os.path.isfile, glob.glob(os.path.join(self.directory, "*.zip"))))
+        if not files:
+            return self._new()
+
+        return max(files, key=os.path.getmtime)
+
+    def _new(self) -> str:
+        """Path for a new zip file, named after the current date"""
+        timestamp: str = time.strftime("%Y_%m_%d-%H_%M")
+        path = os.path.join(self.directory, f"{timestamp}.zip")
+
+        # Another zip file may have been started this same minute
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{timestamp}_{n}.zip")
+            n += 1
+
+        return path
+
+
+@ArchiveFactory.register("zstd")
+@dataclass
+class ZstdPackWriter(PackWriter):
+    """Appends parsed files to zip files, compressed with zstandard.
+
+    The first `samples` files of the first zip file are held until there are
+    enough of them to train the dictionary. The dictionary is then reused for the
+    next zip files of the folder, each one keeping a copy of it.
+
+    Attributes:
+        level: Compression level
+        samples: Amount of files to train the dictionary with
+        dict_size: Maximum size of the dictionary, in bytes
+    """
+
+    level: int = 3
+    samples: int = 100
+    dict_size: int = 112640
+
+    # Dictionary trained for the folder, reused by the next zip files
+    _dictionary: bytes = field(default=None, init=False, repr=False)
+    # Dictionary of the current zip file, empty if compressed without one
+    _current: bytes = field(default=None, init=False, repr=False)
+    _compressor: Any = field(default=None, init=False, repr=False)
+    # Files held to train the dictionary
+    _held: list[tuple[str, str]] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        _require_zstandard()
+
+    def flush(self) -> None:
+        # Do not wait for more samples, the files are removed when flushed
+        if self._held:
+            self._train()
+
+        super().flush()
+
+    def _write(self, name: str, filepath: str) -> None:
+        if self._current is None:
+            self._held.append((name, filepath))
+
+            if len(self._held) >= self.samples:
+                self._train()
+
+            return
+
+        with open(filepath, "rb") as f:
+            data = self._compressor.compress(f.read())
+
+        info = zipfile.ZipInfo.from_file(filepath, name)
+        info.compress_type = zipfile.ZIP_STORED
+        self._zip.writestr(info, data)
+
+    def _open(self, path: str) -> None:
+        new = path != self._path
+        super()._open(path)
+
+        if not new:
+            return
+
+        if _DICTIONARY in self._zip.namelist():
+            self._count -= 1
+            self._start(self._zip.read(_DICTIONARY))
+
+        elif self._count:
+            # The zip file was written with another format, start a new one
+            self._zip.close()
+            self._open(self._new())
+
+        elif self._dictionary is not None:
+            self._start(self._dictionary)
+
+        else:
+            self._current = self._compressor = None
+
+    def _start(self, dictionary: bytes) -> None:
+        """Compress the next files of the zip file with the dictionary"""
+        if _DICTIONARY not in self._zip.namelist():
+            self._zip.writestr(_DICTIONARY, dictionary)
+
+        self._current = dictionary
+        self._compressor = zstandard.ZstdCompressor(
+            level=self.level,
+            dict_data=zstandard.ZstdCompressionDict(dictionary) if dictionary else None,
+        )
+
+    def _train(self) -> None:
+        """Train the dictionary with the files held and write them"""
+        held, self._held = self._held, []
+
+        samples: list[bytes] = []
+        for _, filepath in held:
+            with open(filepath, "rb") as f:
+                samples.append(f.read())
+
+        try:
+            trained = zstandard.train_dictionary(self.dict_size, samples, level=self.level)
+            self._dictionary = trained.as_bytes()
+            self._start(self._dictionary)
+        except zstandard.ZstdError as e:
+            # Too few samples. This zip file goes without a dictionary, the next one
+            # tries again
+            log.debug(f"Could not train a dictionary: {e}")
+            self._start(b"")
+
+        for name, filepath in held:
+            self._write(name, filepath)
+
+
+@dataclass
+class Archive:
+    """Reads a zip file with parsed files, whatever format they were written with
+
+    Attributes:
+        path: Path to the zip file
+    """
+
+    path: str
+
+    _zip: zipfile.ZipFile = field(default=None, init=False, repr=False)
+    _decompressor: Any = field(default=None, init=False, repr=False)
+
+    def __enter__(self) -> "Archive":
+        self._zip = zipfile.ZipFile(self.path, "r")
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._zip.close()
+        self._zip = None
+
+    def names(self) -> list[str]:
+        """Names of the files in the zip file"""
+        return [n for n in self._zip.namelist() if n != _DICTIONARY]
+
+    @property
+    def zstd(self) -> bool:
+        """Whether the zip file was written with zstd"""
+        try:
+            self._zip.getinfo(_DICTIONARY)
+        except KeyError:
+            return False
+
+        return True
+
+    def read(self, name: str) -> bytes:
+        """Returns the content of a file of the zip file"""
+        data = self._zip.read(name)
+
+        if self.zstd and self._zip.getinfo(name).compress_type == zipfile.ZIP_STORED:
+            return self.decompressor.decompress(data)
+
+        return data
+
+    def extract(self, directory: str) -> list[str]:
+        """Extract the files of the zip file into a directory
+
+        Returns:
+            list[str]: Names of the files extracted
+        """
+        names = self.names()
+
+        if not self.zstd:
+            self._zip.extractall(directory, names)
+            return names
+
+        for name in names:
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(self.read(name))
+
+        return names
+
+    def dictionary(self) -> bytes | None:
+        """The zstd dictionary of the zip file, if any"""
+        if _DICTIONARY in self._zip.namelist():
+            return self._zip.read(_DICTIONARY)
+
+    def info(self, name: str) -> zipfile.ZipInfo:
+        return self._zip.getinfo(name)
+
+    def open(self, name: str) -> IO[bytes]:
+        """Open a file of the zip file to read it in pieces. The zstd frames are
+        read as they are, without decompressing them"""
+        return self._zip.open(name)
+
+    def raw(self, name: str) -> tuple[zipfile.ZipInfo, bytes]:
+        """Returns a file of the zip file as it is stored, still compressed
+
+        Returns:
+            tuple[ZipInfo, bytes]: Information of the file and its compressed data
+        """
+        info = self._zip.getinfo(name)
+
+        self._zip.fp.seek(info.header_offset)
+        _, name_length, extra_length = _LOCAL_HEADER.unpack(self._zip.fp.read(_LOCAL_HEADER.size))
+        self._zip.fp.seek(name_length + extra_length, os.SEEK_CUR)
+
+        return info, self._zip.fp.read(info.compress_size)
+
+    @property
+    def decompressor(self) -> Any:
+        if self._decompressor is None:
+            _require_zstandard()
+
+            dictionary = None
+            if _DICTIONARY in self._zip.namelist():
+                data = self._zip.read(_DICTIONARY)
+                dictionary = zstandard.ZstdCompressionDict(data) if data else None
+
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+        return self._decompressor
+
+
+@dataclass
+class ArchiveIndex:
+    """Index of the files in the zip files of a folder, to read any of them without
+    opening the zip files or extracting them.
+
+    Each file is mapped to its zip file and the offset of its data. The index is
+    stored in the folder next to the zip files and only the zip files that changed
+    since, by their modification time and size, are indexed again. Zip files are
+    memory mapped, so reading a file is a slice of the map.
+
+    Attributes:
+        directory: Folder of the zip files
+    """
+
+    directory: str
+
+    # name -> (zip file, offset, size, compression)
+    _entries: dict[str, tuple[str, int, int, int]] = field(default=None, init=False, repr=False)
+    # zip file -> {stat: [mtime, size], dictionary: entry or None}
+    _archives: dict[str, dict[str, Any]] = field(default_factory=dict, init=False, repr=False)
+    _maps: dict[str, mmap.mmap] = field(default_factory=dict, init=False, repr=False)
+    _dictionaries: dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+
+    _INDEX: str = "index.json"
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, self._INDEX)
+
+    def names(self) -> list[str]:
+        """Names of the files in the zip files"""
+        self.update()
+        return list(self._entries)
+
+    def contains(self, name: str) -> bool:
+        """Whether the file is in any of the zip files"""
+        if self._entry(name) is None:
+            self.update()
+
+        return self._entry(name) is not None
+
+    def read(self, name: str) -> bytes | None:
+        """Returns the content of a file, or None if it is not in any zip file"""
+        entry = self._entry(name)
+
+        # Not indexed yet, or its zip file changed
+        if entry is None or not os.path.isfile(os.path.join(self.directory, entry[0])):
+            self.update()
+            entry = self._entry(name)
+
+        if entry is None:
+            return
+
+        archive, offset, size, compression = entry
+        data = self._map(archive)[offset : offset + size]
+
+        if compression == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(data, -zlib.MAX_WBITS)
+
+        # Stored members of the zstd zip files are zstd frames
+        if self._archives.get(archive, {}).get("dictionary") is not None:
+            _require_zstandard()
+            dictionary = self._dictionary(archive)
+            data = zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data)
+
+        return data
+
+    def update(self) -> bool:
+        """Index the zip files that changed and save the index
+
+        Returns:
+            bool: Whether the index changed
+        """
+        with self._lock:
+            if self._entries is None:
+                self._load()
+
+            found: dict[str, list[int]] = {}
+            for path in glob.glob(os.path.join(self.directory, "*.zip")):
+                st = os.stat(path)
+                found[os.path.basename(path)] = [st.st_mtime_ns, st.st_size]
+
+            changed = [a for a, stat in found.items() if self._archives.get(a, {}).get("stat") != stat]
+            removed = [a for a in self._archives if a not in found]
+
+            if not changed and not removed:
+                return False
+
+            stale = set(changed) | set(removed)
+            self._entries = {n: e for n, e in self._entries.items() if e[0] not in stale}
+            for archive in stale:
+                self._archives.pop(archive, None)
+                self._dictionaries.pop(archive, None)
+
+                m = self._maps.pop(archive, None)
+                if m is not None:
+                    m.close()
+
+            for archive in changed:
+                self._index(archive, found[archive])
+
+            self._save()
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            for m in self._maps.values():
+                m.close()
+
+            self._maps = {}
+
+    def _entry(self, name: str) -> tuple[str, int, int, int] | None:
+        if self._entries is None:
+            self.update()
+
+        return self._entries.get(name)
+
+    def _index(self, archive: str, stat: list[int]) -> None:
+        """Add the files of a zip file to the index"""
+        path = os.path.join(self.directory, archive)
+        info: dict[str, Any] = {"stat": stat, "dictionary": None}
+
+        try:
+            with zipfile.ZipFile(path, "r") as zf, open(path, "rb") as f:
+                for member in zf.infolist():
+                    # The data starts after the local header of the member
+                    f.seek(member.header_offset)
+                    _, name_length, extra_length = _LOCAL_HEADER.unpack(
+                        f.read(_LOCAL_HEADER.size)
+                    )
+                    offset = member.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+                    entry = (archive, offset, member.compress_size, member.compress_type)
+
+                    if member.filename == _DICTIONARY:
+                        info["dictionary"] = entry
+                    else:
+                        self._entries[member.filename] = entry
+
+        except (zipfile.BadZipFile, OSError, struct.error) as e:
+            log.warning(f"Could not index {path}: {e}")
+
+        self._archives[archive] = info
+
+    def _map(self, archive: str) -> mmap.mmap:
+        with self._lock:
+            if archive not in self._maps:
+                with open(os.path.join(self.directory, archive), "rb") as f:
+                    self._maps[archive] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            return self._maps[archive]
+
+    def _dictionary(self, archive: str) -> Any:
+        """The zstd dictionary of a zip file, prepared to decompress"""
+        with self._lock:
+            if archive not in self._dictionaries:
+                dictionary = None
+
+                entry = self._archives.get(archive, {}).get("dictionary")
+                if entry:
+                    _, offset, size, _ = entry
+                    data = self._map(archive)[offset : offset + size]
+
+                    # The dictionary is digested once and then reused
+                    if data:
+                        dictionary = zstandard.ZstdCompressionDict(data)
+
+                self._dictionaries[archive] = dictionary
+
+            return self._dictionaries[archive]
+
+    def _load(self) -> None:
+        self._entries, self._archives = {}, {}
+
+        if not os.path.isfile(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                index = json.load(f)
+
+            self._archives = index["archives"]
+            self._entries = {n: tuple(e) for n, e in index["entries"].items()}
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning(f"Rebuilding the index {self.path}: {e}")
+            self._entries, self._archives = {}, {}
+
+    def _save(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+
+        # Write and rename, so other processes never read half an index
+        partial = f"{self.path}.{os.getpid()}.part"
+        with open(partial, "w") as f:
+            json.dump({"archives": self._archives, "entries": self._entries}, f)
+
+        os.replace(partial, self.path)
+
+
+def extract_archive(path: str, directory: str) -> int:
+    """Extract the files of a zip file into a directory. Used by the pool of processes
+    that extracts the zip files
+
+    Args:
+        path: Path to the zip file
+        directory: Folder to extract the files into
+
+    Returns:
+        int: Amount of bytes extracted
+    """
+    with Archive(path) as archive:
+        names = archive.extract(directory)
+
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in names)
+
+
+@dataclass
+class RawZipWriter:
+    """Writes a new zip file with members compressed already, e.g. copied as they are
+    stored from other zip files. `ZipFile` only writes the members it compresses.
+
+    The local header of each member is written before its data, and the central
+    directory when closed. The sizes and checksums are known beforehand, so the
+    members go without a data descriptor. Zip64 records are written when needed.
+
+    Attributes:
+        path: Path to the zip file
+        dictionary: Zstd dictionary of the zip file, written as its first member.
+            None for zip files without zstd members
+    """
+
+    path: str
+    dictionary: bytes = None
+
+    _file: IO[bytes] = field(default=None, init=False, repr=False)
+    # Members written and the offset of their local header
+    _members: list[tuple[zipfile.ZipInfo, int, int]] = field(
+        default_factory=list, init=False, repr=False
+    )
+    _names: set[str] = field(default_factory=set, init=False, repr=False)
+
+    def __enter__(self) -> "RawZipWriter":
+        self._file = open(self.path, "wb")
+
+        if self.dictionary is not None:
+            self.writestr(_DICTIONARY, self.dictionary, zipfile.ZIP_STORED)
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def write(self, info: zipfile.ZipInfo, data: bytes) -> None:
+        """Write a member with its data as it is compressed
+
+        Args:
+            info: Name, date, compression, checksum and size of the member
+            data: Compressed data of the member
+        """
+        name, flags = _encode(info.filename)
+        sizes = [info.file_size, len(data)]
+
+        extra = b""
+        if max(sizes) >= zipfile.ZIP64_LIMIT:
+            extra = struct.pack("<HHQQ", 1, 16, *sizes)
+            sizes = [0xFFFFFFFF, 0xFFFFFFFF]
+
+        dostime, dosdate = _dos_time(info.date_time)
+        offset = self._file.tell()
+
+        self._file.write(
+            _FILE_HEADER.pack(
+                b"PK\003\004",
+                45 if extra else 20,
+                0,
+                flags,
+                info.compress_type,
+                dostime,
+                dosdate,
+                info.CRC,
+                sizes[1],
+                sizes[0],
+                len(name),
+                len(extra),
+            )
+        )
+        self._file.write(name)
+        self._file.write(extra)
+        self._file.write(data)
+
+        self._members.append((info, offset, len(data)))
+        self._names.add(info.filename)
+
+    def writestr(
+        self,
+        name: str,
+        data: bytes,
+        compress_type: int = zipfile.ZIP_DEFLATED,
+        date_time: tuple = None,
+    ) -> None:
+        """Compress some data and write it as a member, with deflate or stored"""
+        info = zipfile.ZipInfo(name, date_time or time.localtime(time.time())[:6])
+        info.compress_type = compress_type
+        info.external_attr = 0o600 << 16
+        info.file_size = len(data)
+        info.CRC = zlib.crc32(data)
+
+        if compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(
+                zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS
+            )
+            data = compressor.compress(data) + compressor.flush()
+
+        self.write(info, data)
+
+    def close(self) -> None:
+        """Write the central directory and close the zip file"""
+        if self._file is None:
+            return
+
+        start = self._file.tell()
+        for info, offset, compress_size in self._members:
+            self._file.write(_central_directory(info, offset, compress_size))
+
+        end = self._file.tell()
+        count, size = len(self._members), end - start
+
+        if count >= 0xFFFF or start >= zipfile.ZIP64_LIMIT or size >= zipfile.ZIP64_LIMIT:
+            self._file.write(
+                _END_ARCHIVE64.pack(b"PK\006\006", 44, 45, 45, 0, 0, count, count, size, start)
+            )
+            self._file.write(_END_ARCHIVE64_LOCATOR.pack(b"PK\006\007", 0, end, 1))
+
+        self._file.write(
+            _END_ARCHIVE.pack(
+                b"PK\005\006",
+                0,
+                0,
+                min(count, 0xFFFF),
+                min(count, 0xFFFF),
+                min(size, 0xFFFFFFFF),
+                min(start, 0xFFFFFFFF),
+                0,
+            )
+        )
+
+        self._file.close()
+        self._file = None
+
+
+def _central_directory(info: zipfile.ZipInfo, offset: int, compress_size: int) -> bytes:
+    """Entry of a member in the central directory of the zip file"""
+    name, flags = _encode(info.filename)
+    fields = [info.file_size, compress_size, offset]
+
+    # The fields too large for the entry go in the zip64 extra field, in this order
+    large = [value for value in fields if value >= zipfile.ZIP64_LIMIT]
+    extra = b""
+    if large:
+        extra = struct.pack(f"<HH{len(large)}Q", 1, 8 * len(large), *large)
+        fields = [min(value, 0xFFFFFFFF) for value in fields]
+
+    version = 45 if extra else 20
+    dostime, dosdate = _dos_time(info.date_time)
+
+    header = _CENTRAL_DIRECTORY.pack(
+        b"PK\001\002",
+        version,
+        info.create_system,
+        version,
+        0,
+        flags,
+        info.compress_type,
+        dostime,
+        dosdate,
+        info.CRC,
+        fields[1],
+        fields[0],
+        len(name),
+        len(extra),
+        0,
+        0,
+        0,
+        info.external_attr,
+        fields[2],
+    )
+
+    return header + name + extra
+
+
+def _encode(filename: str) -> tuple[bytes, int]:
+    """Name of a member and its flags, utf-8 names are flagged as such"""
+    try:
+        return filename.encode("ascii"), 0
+    except UnicodeEncodeError:
+        return filename.encode("utf-8"), 0x800
+
+
+def _dos_time(date_time: tuple) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return hour << 11 | minute << 5 | second // 2, (year - 1980) << 9 | month << 5 | day
+
+
+def copy_members(source: str, target: RawZipWriter) -> tuple[int, int]:
+    """Copy the files of a zip file into another without decompressing them.
+    Files already in the target are skipped, as their names are their content.
+
+    Files of zstd zip files are decompressed and written with deflate instead, unless
+    the target is a zstd zip file with the same dictionary, as it could not read them
+
+    Args:
+        source: Path to the zip file to copy the files from
+        target: Zip file being written to copy the files to
+
+    Returns:
+        tuple[int, int]: Amount of files and bytes copied
+    """
+    files, size = 0, 0
+    with Archive(source) as archive:
+        dictionary = archive.dictionary()
+        raw = dictionary is None or dictionary == target.dictionary
+
+        for name in archive.names():
+            if name in target:
+                continue
+
+            if raw:
+                info, data = archive.raw(name)
+                target.write(info, data)
+            else:
+                data = archive.read(name)
+                target.writestr(name, data, date_time=archive.info(name).date_time)
+
+            files, size = files + 1, size + len(data)
+
+    return files, size
+
+
+def benchmark(filepaths: list[str], formats: list[str] = None) -> list[dict[str, Any]]:
+    """Compare the formats of the archives over the same files. Each format writes
+    all the files into a single zip file and reads them back
+
+    Args:
+        filepaths: Files to archive
+        formats: Formats to compare, all of them by default
+
+    Returns:
+        list[dict]: For each format, its compression ratio and throughput in MB/s
+    """
+    size = sum(os.path.getsize(f) for f in filepaths)
+    results: list[dict[str, Any]] = []
+
+    for name in formats or list(ArchiveFactory.archives):
+        with tempfile.TemporaryDirectory() as tmp:
+            # The files are removed once archived, archive copies of them
+            source = os.path.join(tmp, "source")
+            os.makedirs(source)
+
+            copies: list[str] = []
+            for filepath in filepaths:
+                copies.append(shutil.copy(filepath, source))
+
+            writer = ArchiveFactory.create(name, directory=tmp, max_files=len(copies) + 1)
+
+            start = time.perf_counter()
+            for members in copies:
+                path = writer.add(os.path.basename(members), members)
+            writer.flush()
+            written = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with Archive(path) as archive:
+                for member in archive.names():
+                    archive.read(member)
+            read = time.perf_counter() - start
+
+            archived = os.path.getsize(path)
+
+        results.append(
+            {
+                "format": name,
+                "files": len(filepaths),
+                "size": size,
+                "archived": archived,
+                "ratio": size / archived if archived else 0,
+                "write": size / written / 1e6 if written else 0,
+                "read": size / read / 1e6 if read else 0,
+            }
+        )
+
+    return results
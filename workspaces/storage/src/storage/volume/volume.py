@@ -16,13 +16,119 @@
 
 import os
 import glob
+import atexit
+import hashlib
+import threading
 import time
 import uuid
 import zipfile
 
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable
+
 from lib.logger.logger import log
 
+from storage.volume.archives import (
+    Archive,
+    ArchiveFactory,
+    ArchiveIndex,
+    PackWriter,
+    RawZipWriter,
+    copy_members,
+    extract_archive,
+)
+
+
+@dataclass
+class PendingFile:
+    """File being written into the pending folder.
+
+    The data is written to a partial file which is renamed when closed, so
+    nobody reads a file that is only half written.
+
+    Files without a name are content addressed: they are named after the hash of
+    their content, which is calculated while writing. If a file with the same
+    content is already there, or archived, the new one is dropped.
+
+    Attributes:
+        name: Name of the file once stored
+        directory: Folder in where the file is stored
+        suffix: Appended to the hash of the content addressed files
+        size: Amount of bytes written so far
+        created: Whether closing the file stored new content
+        archived: Tells whether a file is in the zip files already
+    """
+
+    name: str
+    directory: str
+    suffix: str = ""
+    size: int = 0
+    created: bool = False
+    archived: Callable[[str], bool] = field(default=None, repr=False)
+
+    _file: BinaryIO = field(default=None, init=False, repr=False)
+    _hash: Any = field(default=None, init=False, repr=False)
+    _partial: str = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.name:
+            self._hash = hashlib.sha256()
+
+        self._partial = os.path.join(self.directory, f"{uuid.uuid4()}.part")
+
+    @property
+    def path(self) -> str | None:
+        """Path to the file once stored"""
+        if self.name:
+            return os.path.join(self.directory, self.name)
+
+    @property
+    def partial(self) -> str:
+        return self._partial
+
+    def write(self, data: bytes) -> None:
+        if not self._file:
+            self._file = open(self.partial, "wb")
+
+        self._file.write(data)
+        self.size += len(data)
+
+        if self._hash:
+            self._hash.update(data)
+
+    def close(self) -> str | None:
+        """Close the file and move it into place
+
+        Returns:
+            str | None: Name of the file, or None if nothing was written
+        """
+        if not self._file:
+            return
+
+        self._file.close()
+        self._file = None
+
+        if self._hash:
+            self.name = self._hash.hexdigest() + self.suffix
+
+            # The same content is already stored
+            if os.path.isfile(self.path) or (self.archived and self.archived(self.name)):
+                os.remove(self.partial)
+                return self.name
+
+        os.replace(self.partial, self.path)
+        self.created = True
+        return self.name
+
+    def discard(self) -> None:
+        """Close the file and remove it"""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+            os.remove(self.partial)
+
 
 @dataclass
 class Volume:
@@ -33,32 +139,61 @@ class Volume:
         _PENDING: path to the pending files in the volume
         _PARSED: path to the parsed files in the volume
         _ZIP_MAX_FILES: maximum amount of files included in the zip file
+        _CONTENT_ADDRESSED: whether new files are named after the hash of their content
+        _ARCHIVE: format of the zip files, see `ArchiveFactory`
     """
 
     _pending: str = os.path.join("local", "pending")
     _parsed: str = os.path.join("local", "parsed")
     _ZIP_MAX_FILES: int = 1000
     _ZIP: str = "*.zip"
+    _CONTENT_ADDRESSED: bool = True
+    _ARCHIVE: str = "zip"
+
+    _packs: dict[tuple[str, str], PackWriter] = field(default_factory=dict, repr=False)
+    _indexes: dict[str, ArchiveIndex] = field(default_factory=dict, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+    @property
+    def archive(self) -> str:
+        """Format of the zip files, see `ArchiveFactory`"""
+        return self._ARCHIVE
+
+    @archive.setter
+    def archive(self, name: str) -> None:
+        if name not in ArchiveFactory.archives:
+            raise NotImplementedError(f"{name=} doesn't exist")
+
+        # The zip files being written keep their format, the next ones use the new one
+        with self._lock:
+            self.flush()
+            self._packs = {}
+            self._ARCHIVE = name
 
     @property
     def pending(self):
         if not os.path.exists(self._pending):
-            os.makedirs(self._pending)
+            # Other threads may be creating it too
+            os.makedirs(self._pending, exist_ok=True)
 
         return self._pending
 
     @property
     def parsed(self):
         if not os.path.exists(self._parsed):
-            os.makedirs(self._parsed)
+            # Other threads may be creating it too
+            os.makedirs(self._parsed, exist_ok=True)
 
         return self._parsed
 
-    def retrieve(self, name: str) -> bytes:
-        """Returns the content of some file
+    def retrieve(self, name: str, market: str = None, page_type: str = None) -> bytes:
+        """Returns the content of some file. Files already parsed are read from
+        their zip file, without extracting them
 
         Args:
             name (str): Name of the file
+            market (str): Name of the market the file belongs to
+            page_type (str): Type of the page stored in the file
 
         Returns:
             bytes: Content of the file
@@ -71,10 +206,59 @@ class Volume:
                     content = f.read()
                     return content
 
+            return self.index(market=market, page_type=page_type).read(name)
+
+    def archived(self, market: str = None, page_type: str = None) -> list[str]:
+        """Returns the names of the files in the zip files of the market and page
+        type, including the folders below, e.g. all the page types of a market"""
+        names: list[str] = []
+
+        for directory, _, files in os.walk(self._directory(market, page_type)):
+            if any(f.endswith(".zip") for f in files):
+                names.extend(self._index(directory).names())
+
+        return names
+
+    def index(self, market: str = None, page_type: str = None) -> ArchiveIndex:
+        """Returns the index of the zip files of the market and page type"""
+        return self._index(self._directory(market, page_type))
+
+    def _index(self, directory: str) -> ArchiveIndex:
+        with self._lock:
+            if directory not in self._indexes:
+                self._indexes[directory] = ArchiveIndex(directory=directory)
+
+            return self._indexes[directory]
+
+    def exists(self, name: str) -> bool:
+        """Whether the file is in the pending folder"""
+        return bool(name) and os.path.isfile(os.path.join(self.pending, name))
+
+    def stored(self, name: str, market: str = None, page_type: str = None) -> bool:
+        """Whether the file is either in the pending folder or in the zip files of
+        the market and page type"""
+        return self.exists(name) or (
+            bool(name) and self.index(market=market, page_type=page_type).contains(name)
+        )
+
+    def address(self, data: bytes, market: str = None, page_type: str = None) -> str:
+        """Name of a file after its content
+
+        Args:
+            data: Byte representation of a file data
+            market: Name of the market the file belongs to
+            page_type: Type of the page stored in the file
+
+        Returns:
+            str: Name of the file
+        """
+        return hashlib.sha256(data).hexdigest() + self._suffix(market, page_type)
+
     def store(
         self, data: bytes, name: str = None, market: str = None, page_type: str = None
     ) -> str:
-        """Store binary data to a file
+        """Store binary data to a file. Unless a name is given, content addressed
+        files are not written again if the same content is already stored
 
         Args:
             data: Byte representation of a file data
@@ -83,16 +267,63 @@ class Volume:
         Returns:
             str: Name of the file
         """
-        if not name:
-            name = str(uuid.uuid4())
-            name += "".join("_" + n for n in [market, page_type] if n)
+        if data:
+            if not name and self._CONTENT_ADDRESSED:
+                name = self.address(data, market=market, page_type=page_type)
 
-        filepath = os.path.join(self.pending, name)
+                if self.stored(name, market=market, page_type=page_type):
+                    return name
 
-        if data:
-            with open(filepath, "wb") as f:
-                f.write(data)
-                return name
+            writer = self.writer(name=name, market=market, page_type=page_type)
+            writer.write(data)
+            return writer.close()
+
+    def writer(
+        self, name: str = None, market: str = None, page_type: str = None
+    ) -> "PendingFile":
+        """Open a new file in the pending folder to write data into it in pieces
+
+        Args:
+            name: String representation of the file name
+            market: Name of the market the file belongs to
+            page_type: Type of the page stored in the file
+
+        Returns:
+            PendingFile: File to write to. It must be closed to be stored
+        """
+        suffix = self._suffix(market, page_type)
+
+        # Content addressed files are named when closed
+        if not name and not self._CONTENT_ADDRESSED:
+            name = str(uuid.uuid4()) + suffix
+
+        index = self.index(market=market, page_type=page_type)
+        return PendingFile(
+            name=name, directory=self.pending, suffix=suffix, archived=index.contains
+        )
+
+    def _suffix(self, market: str = None, page_type: str = None) -> str:
+        return "".join("_" + n for n in [market, page_type] if n)
+
+    def _directory(self, market: str = None, page_type: str = None) -> str:
+        """Folder of the zip files of the market and page type"""
+        return os.path.join(self.parsed, *[n for n in [market, page_type] if n])
+
+    def pack(self, market: str = None, page_type: str = None) -> PackWriter:
+        """Returns the pack writer for the zip files of the market and page type"""
+        key = (market, page_type)
+
+        if key not in self._packs:
+            zip_path = self._directory(market, page_type)
+
+            if not os.path.exists(zip_path):
+                os.makedirs(zip_path)
+
+            self._packs[key] = ArchiveFactory.create(
+                self._ARCHIVE, directory=zip_path, max_files=self._ZIP_MAX_FILES
+            )
+
+        return self._packs[key]
 
     def compress(
         self,
@@ -101,7 +332,8 @@ class Volume:
         market: str = None,
         page_type: str = None,
     ) -> str or None:
-        """This method adds a file that has been parsed to a zip file
+        """This method adds a file that has been parsed to a zip file.
+        The file is removed from the pending folder once the zip files are flushed
 
         Args:
             name: A string representing the name of the parsed file in the pending folder
@@ -116,40 +348,60 @@ class Volume:
         if not os.path.isfile(filepath):
             return
 
-        # If no file name has been provided, check the directory for the latest
-        # zip file stored.
-        if not zip_filepath:
-            zip_filepath: str = self.latest(
-                expression=self._ZIP, market=market, page_type=page_type
-            )
+        # Add the file to a specific zip file right away
+        if zip_filepath:
+            with zipfile.ZipFile(zip_filepath, mode="a") as zf:
+                zf.write(filepath, name, zipfile.ZIP_DEFLATED)
 
-        with zipfile.ZipFile(zip_filepath, mode="a") as zipfile:
-            # Check if the zip file has room to include more files.
-            # Otherwise, create a new ID for the file and repeat the process
-            if len(zipfile.namelist()) < self._ZIP_MAX_FILES:
-                # Write the file into the zip file
-                zipfile.write(filepath, name, zipfile.ZIP_DEFLATED)
-                zipfile.close()
+            os.remove(filepath)
+            return zip_filepath
 
-                # Remove the file from the directory
-                os.remove(filepath)
+        with self._lock:
+            return self.pack(market=market, page_type=page_type).add(name, filepath)
 
-                return zip_filepath
-        
+    def compress_many(
+        self, names: list[str], market: str = None, page_type: str = None
+    ) -> list[str]:
+        """Adds many parsed files to the zip files and flushes them
 
-        # Create a new UUID to be used as the name of the zip file
-        timestamp: str = time.strftime("%Y_%m_%d-%H_%M")
-        filename = f"{timestamp}.zip"
+        Args:
+            names: Names of the parsed files in the pending folder
+            market: Name of the market of the files
+            page_type: Type of the pages in the files
 
-        # Create the path to the parsed files and add the market if any
-        zip_path = self.parsed
+        Returns:
+            list[str]: Names of the files compressed
+        """
+        compressed: list[str] = []
 
-        for i in [market, page_type]:
-            if i:
-                zip_path = os.path.join(zip_path, i)
+        with self._lock:
+            pack = self.pack(market=market, page_type=page_type)
+            archived = set(self.index(market=market, page_type=page_type).names())
+
+            # Pages with the same content share the file
+            for name in dict.fromkeys(names):
+                filepath = os.path.join(self.pending, name) if name else None
+
+                if not (filepath and os.path.isfile(filepath)):
+                    continue
+
+                # The content was archived before, i.e. the page was scraped again
+                if name in archived:
+                    os.remove(filepath)
+                else:
+                    pack.add(name, filepath)
+
+                compressed.append(name)
+
+            pack.flush()
+
+        return compressed
 
-        path = os.path.join(zip_path, filename)
-        return self.compress(name=name, zip_filepath=path)
+    def flush(self) -> None:
+        """Flush every zip file being written"""
+        with self._lock:
+            for pack in self._packs.values():
+                pack.flush()
 
     def latest(
         self, expression: str = "*", market: str = None, page_type: str = None
@@ -193,51 +445,111 @@ class Volume:
 
         return latest
 
-    def combine(self):
-        """This method combines the zip files into a single one"""
-        path = os.path.join(self.parsed, self._ZIP)
-        g = glob.glob(path)
-        files: list = list(filter(os.path.isfile, g))
+    def combine(self, market: str = None, page_type: str = None) -> str | None:
+        """This method combines the zip files into a single one. The files are
+        copied as they are stored, without compressing them again.
+
+        The combined zip file replaces the first one, and the others are removed
+        once copied, so each file is in a single zip file.
 
-        ogname = files.pop(0)
-        with zipfile.ZipFile(ogname, "a") as og:
-            for file in files:
-                with zipfile.ZipFile(file, "r") as f:
-                    for n in f.namelist():
-                        data = f.open(n)
-                        og.writestr(n, data.read())
+        Args:
+            market: Name of the market of the zip files
+            page_type: Type of the pages in the zip files
+
+        Returns:
+            str | None: Path to the combined zip file, None if there are no zip files
+        """
+        with self._lock:
+            self.flush()
+
+            path = os.path.join(self._directory(market, page_type), self._ZIP)
+            files: list = sorted(filter(os.path.isfile, glob.glob(path)))
+
+            if not files:
+                return
+
+            start = time.perf_counter()
+            copied, size = 0, 0
+
+            ogname = files[0]
+            with Archive(ogname) as og:
+                dictionary = og.dictionary()
+
+            # Written next to the zip files, renamed once complete
+            partial = f"{ogname}.part"
+            try:
+                with RawZipWriter(partial, dictionary=dictionary) as target:
+                    for file in files:
+                        n, b = copy_members(file, target)
+                        copied, size = copied + n, size + b
+            except BaseException:
+                os.remove(partial)
+                raise
+
+            os.replace(partial, ogname)
+            for file in files[1:]:
+                os.remove(file)
+
+            # The writer of the folder starts again from the zip files left
+            self._packs.pop((market, page_type), None)
+            self.index(market, page_type).update()
+
+        elapsed = time.perf_counter() - start
+        log.info(
+            f"Combined {copied} files from {len(files)} Zip files, {size} bytes "
+            f"in {elapsed:.2f}s ({size / max(elapsed, 1e-9) / 1e6:.1f} MB/s)"
+        )
 
         return ogname
 
-    def extract(self, market: str = None, keep_zip: bool = True, page_type: str = None):
-        """Method to extract the content of zip files"""
-        # Get the path to the parsed files
-        filepath = self.parsed
+    def extract(
+        self,
+        market: str = None,
+        keep_zip: bool = True,
+        page_type: str = None,
+        processes: int = None,
+    ):
+        """Method to extract the content of zip files. The zip files are extracted
+        in parallel, in a pool of processes
 
-        # If a market or page type is included, extend the path
-        for i in [market, page_type]:
-            if i:
-                filepath = os.path.join(filepath, i)
+        Args:
+            market: Name of the market of the zip files
+            keep_zip: Whether to keep the zip files once extracted
+            page_type: Type of the pages in the zip files
+            processes: Size of the pool, the number of CPUs by default
+        """
+        self.flush()
 
         # Get only zip files
-        filepath = os.path.join(filepath, self._ZIP)
+        filepath = os.path.join(self._directory(market, page_type), self._ZIP)
 
         # Get all the zip files
         zip_files = glob.glob(filepath)
         log.info(f"Extracting from {len(zip_files)} Zip files...")
 
-        # Iterate the files
-        for e, zip_file in enumerate(zip_files):
-            log.info(f"{e}/{len(zip_files)}")
-            # Load the file and extract
-            with zipfile.ZipFile(zip_file, "r") as f:
-                f.extractall(self.pending)
+        if not zip_files:
+            return
+
+        start = time.perf_counter()
+        size = 0
 
-            # If it is not set, delete the zip file
-            if not keep_zip:
-                os.remove(zip_file)
+        processes = min(processes or os.cpu_count() or 1, len(zip_files))
+        with ProcessPoolExecutor(processes) as pool:
+            futures = {pool.submit(extract_archive, z, self.pending): z for z in zip_files}
 
-        log.info("Finished extracting.")
+            for e, future in enumerate(as_completed(futures)):
+                size += future.result()
+                log.info(f"{e + 1}/{len(zip_files)}")
+
+                # If it is not set, delete the zip file
+                if not keep_zip:
+                    os.remove(futures[future])
+
+        elapsed = time.perf_counter() - start
+        log.info(
+            f"Finished extracting {size} bytes in {elapsed:.2f}s "
+            f"({size / max(elapsed, 1e-9) / 1e6:.1f} MB/s)"
+        )
 
     def delete(self, filename: str):
         fpath = os.path.join(self.pending, filename)
@@ -248,3 +560,6 @@ class Volume:
 
 # Declare an instance of the volume
 volume: Volume = Volume()
+
+# Do not leave the zip files being written without their index
+atexit.register(volume.flush)
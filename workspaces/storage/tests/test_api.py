@@ -0,0 +1,78 @@
+import unittest
+
+from sqlalchemy import create_engine, orm
+
+from storage.api.factory import PageEndpoint
+from storage.database import database
+from storage.database.models import Market, Page
+
+
+class TestPageEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        db = database.Database()
+        db.engine = create_engine("sqlite://")
+        db.session = orm.scoped_session(orm.sessionmaker(bind=db.engine, future=True))
+        db.load_models()
+
+        database._db = db
+        self.db = db
+
+    def tearDown(self):
+        self.db.remove()
+        database._db = None
+
+    def test_placeholders(self):
+        ep = PageEndpoint()
+
+        found, created = ep.placeholders(urls=["a", "b", "a"], market="m", page_type="item")
+        self.assertEqual(found, [])
+        self.assertEqual(created, ["a", "b"])
+
+        found, created = ep.placeholders(urls=["a", "c"], market="m", page_type="item")
+        self.assertEqual(found, ["a"])
+        self.assertEqual(created, ["c"])
+
+        self.assertEqual(self.db.session.query(Market).count(), 1)
+        self.assertEqual(self.db.session.query(Page).count(), 3)
+
+    def test_exists(self):
+        ep = PageEndpoint()
+        ep.placeholders(urls=["a"], market="m", page_type="item")
+
+        found = ep.exists(market="m", pages=["a", "b"], page_type="item", placeholders=False)
+        self.assertEqual(found, ["a"])
+
+        found = ep.exists(market="m", pages=["a", "b"], page_type="item")
+        self.assertEqual(found, ["a"])
+        self.assertEqual(self.db.session.query(Page).count(), 2)
+
+    def test_store_batch(self):
+        ep = PageEndpoint()
+        ep.placeholders(urls=["a"], market="m", page_type="item")
+
+        results = ep.store_batch(
+            market="m", page_type="item", pages=[dict(url="a", file="f1"), dict(url="b", file=None)]
+        )
+        self.assertEqual([r["status"] for r in results], ["updated", "created"])
+
+        files = dict(self.db.session.query(Page.url, Page.file).all())
+        self.assertEqual(files, {"a": "f1", "b": None})
+
+    def test_lease(self):
+        ep = PageEndpoint()
+        ep.placeholders(urls=["a", "b", "c"], market="m", page_type="item")
+
+        leased = ep.lease(owner="x", market="m", page_type="item", limit=2)
+        self.assertEqual(len(leased), 2)
+
+        # Leased pages are not handed out again
+        self.assertEqual(ep.lease(owner="y", market="m", page_type="item"), ["c"])
+        self.assertEqual(ep.lease(owner="y", market="m", page_type="item"), [])
+
+        # Failed pages wait for their backoff before they are leased again
+        self.assertEqual(ep.release(owner="x", urls=leased, market="m"), 2)
+        self.assertEqual(ep.lease(owner="y", market="m", page_type="item"), [])
+
+        attempts = dict(self.db.session.query(Page.url, Page.attempts).all())
+        self.assertEqual(attempts, {leased[0]: 1, leased[1]: 1, "c": 0})
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, exc, orm
+
+from storage import events
+from storage.api.factory import PageEndpoint
+from storage.database import database
+from storage.database.models import Item, Page
+from storage.volume.volume import volume
+
+
+class FakeScraper:
+    def scrape_batch(self, pages):
+        results = []
+        for page in pages:
+            data = page["data"].decode()
+            results.append(None if data == "fail" else {} if data == "empty" else {"title": data})
+
+        return results
+
+
+class BreakingScraper(FakeScraper):
+    """Fails the whole call if any of the pages breaks it"""
+
+    def scrape_batch(self, pages):
+        if any(page["data"] == b"break" for page in pages):
+            raise RuntimeError("broken batch")
+
+        return super().scrape_batch(pages)
+
+
+class TestScrapePipeline(unittest.TestCase):
+
+    def setUp(self):
+        db = database.Database()
+        db.engine = create_engine("sqlite://", connect_args=dict(check_same_thread=False))
+        db.session = orm.scoped_session(orm.sessionmaker(bind=db.engine, future=True))
+        db.load_models()
+
+        database._db = db
+        self.db = db
+
+        self.tmp = tempfile.TemporaryDirectory()
+        volume._pending = os.path.join(self.tmp.name, "pending")
+        volume._parsed = os.path.join(self.tmp.name, "parsed")
+
+    def tearDown(self):
+        self.db.remove()
+        database._db = None
+        self.tmp.cleanup()
+
+        del volume._pending, volume._parsed
+        volume._packs.clear()
+
+    def test_scrape(self):
+        ep = PageEndpoint()
+        contents = {"a": b"A", "b": b"empty", "c": b"fail", "d": None, "e": b"E"}
+
+        pages = [
+            dict(url=url, file=volume.store(data=data or b"x", market="m", page_type="item"))
+            for url, data in contents.items()
+        ]
+        ep.store_batch(market="m", page_type="item", pages=pages)
+        volume.delete(pages[3]["file"])
+
+        stats = events.scrape(FakeScraper(), market="m", workers=2, batch_size=2)
+        self.assertEqual(
+            stats, dict(pages=5, stored=2, empty=1, missing=1, failed=1)
+        )
+
+        session = self.db.session
+        self.assertEqual(sorted(t for (t,) in session.query(Item.title)), ["A", "E"])
+        self.assertEqual(sorted(u for (u,) in session.query(Page.url)), ["a", "c", "d", "e"])
+        self.assertIsNone(session.query(Page.file).filter(Page.url == "d").scalar())
+
+        # The scraped files are compressed
+        self.assertEqual(
+            sorted(os.listdir(volume.pending)), sorted([pages[1]["file"], pages[2]["file"]])
+        )
+
+    def test_broken_batch(self):
+        contents = {"a": b"A", "b": b"break", "c": b"C", "d": b"D"}
+        pages = [
+            dict(url=url, file=volume.store(data=data, market="m", page_type="item"))
+            for url, data in contents.items()
+        ]
+        PageEndpoint().store_batch(market="m", page_type="item", pages=pages)
+
+        # The page that breaks the call does not fail the rest of its batch
+        stats = events.scrape(BreakingScraper(), market="m", workers=1, batch_size=4)
+        self.assertEqual(stats, dict(pages=4, stored=3, empty=0, missing=0, failed=1))
+
+    def test_failed_entry(self):
+        contents = {"a": b"A", "b": b"empty", "c": b"bad", "d": None}
+        pages = [
+            dict(url=url, file=volume.store(data=data or b"x", market="m", page_type="item"))
+            for url, data in contents.items()
+        ]
+        PageEndpoint().store_batch(market="m", page_type="item", pages=pages)
+        volume.delete(pages[3]["file"])
+
+        store = events.store_serialised_entry
+
+        def failing_store(model, data, **kwargs):
+            if data.get("title") == "bad":
+                raise exc.SQLAlchemyError("bad entry")
+            return store(model=model, data=data, **kwargs)
+
+        # A bad entry fails the batch transaction, the missing and empty pages stay
+        with mock.patch.object(events, "store_serialised_entry", failing_store):
+            stats = events.scrape(FakeScraper(), market="m", workers=1, batch_size=4)
+
+        self.assertEqual(stats, dict(pages=4, stored=1, empty=1, missing=1, failed=1))
+
+        session = self.db.session
+        self.assertEqual([t for (t,) in session.query(Item.title)], ["A"])
+        self.assertEqual(sorted(u for (u,) in session.query(Page.url)), ["a", "c", "d"])
+        self.assertIsNone(session.query(Page.file).filter(Page.url == "d").scalar())
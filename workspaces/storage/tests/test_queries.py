@@ -0,0 +1,50 @@
+import unittest
+
+from sqlalchemy import create_engine, orm
+
+from storage.api.factory import PageEndpoint
+from storage.database import database
+from storage.events import pending_pages_query
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Keep the hot queries on their indexes"""
+
+    def setUp(self):
+        db = database.Database()
+        db.engine = create_engine("sqlite://")
+        db.session = orm.scoped_session(orm.sessionmaker(bind=db.engine, future=True))
+        db.load_models()
+
+        database._db = db
+        self.db = db
+
+    def tearDown(self):
+        self.db.remove()
+        database._db = None
+
+    def explain(self, query) -> list[str]:
+        """Returns the details of the SQLite query plan"""
+        compiled = query.statement.compile(dialect=self.db.engine.dialect)
+        params = compiled.construct_params()
+
+        rows = self.db.session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN %s" % compiled,
+            tuple(params[name] for name in compiled.positiontup),
+        )
+        return [row[-1] for row in rows]
+
+    def test_pending(self):
+        query = PageEndpoint().pending_query(market="m", page_type="item")
+        plan = self.explain(query)
+
+        self.assertIn("SEARCH market USING INDEX ix_market_name (name=?)", plan)
+        self.assertIn(
+            "SEARCH page USING INDEX ix_page_pending (market_id=? AND page_type=?)", plan
+        )
+
+    def test_pending_pages(self):
+        plan = self.explain(pending_pages_query(market="m"))
+
+        self.assertTrue(any("USING INDEX ix_vendor_page_id" in p for p in plan))
+        self.assertTrue(any("USING INDEX ix_item_page_id" in p for p in plan))
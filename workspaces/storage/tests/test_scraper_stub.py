@@ -0,0 +1,50 @@
+import unittest
+
+from concurrent import futures
+
+import grpc
+
+from google.protobuf.struct_pb2 import Struct
+
+from lib.config.config import Client
+from lib.protos import scraper_pb2, scraper_pb2_grpc
+from storage.stubs.scraper import ScraperService
+
+
+class SizeScraper(scraper_pb2_grpc.ScraperServicer):
+    """Scrapes the size of each page"""
+
+    def ScrapeBatch(self, request, context):
+        pages = []
+        for page in request.pages:
+            content = Struct()
+            content.update({"size": len(page.data)})
+            pages.append(scraper_pb2.ScrapeResponse(content=content, id=page.id))
+
+        return scraper_pb2.ScrapeBatchResponse(pages=pages)
+
+
+class TestScraperService(unittest.TestCase):
+
+    def setUp(self):
+        # Server and channel with the default limits, 4 MiB per message
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        scraper_pb2_grpc.add_ScraperServicer_to_server(SizeScraper(), self.server)
+        port = self.server.add_insecure_port("localhost:0")
+        self.server.start()
+
+        self.channel = grpc.insecure_channel(f"localhost:{port}")
+        client = Client(address="localhost", port=port, name="scraper")
+        self.scraper = ScraperService(client=client, stub=scraper_pb2_grpc.ScraperStub(self.channel))
+
+    def tearDown(self):
+        self.channel.close()
+        self.server.stop(None)
+
+    def test_batch_over_message_limit(self):
+        sizes = [(i + 1) * 256 * 1024 for i in range(8)]  # 9 MiB in total
+        pages = [dict(market="m", model="item", data=b"x" * size) for size in sizes]
+
+        results = self.scraper.scrape_batch(pages)
+
+        self.assertEqual([r["size"] for r in results], sizes)
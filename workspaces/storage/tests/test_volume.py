@@ -0,0 +1,195 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from unittest import mock
+
+from storage.volume import archives
+from storage.volume.volume import Volume
+
+
+class TestVolume(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.volume = Volume(
+            _pending=os.path.join(self.tmp.name, "pending"),
+            _parsed=os.path.join(self.tmp.name, "parsed"),
+            _ZIP_MAX_FILES=3,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def members_path(self) -> list[str]:
+        folder = os.path.join(self.volume.parsed, "m", "item")
+        return sorted(os.path.join(folder, a) for a in os.listdir(folder) if a.endswith(".zip"))
+
+    def members(self) -> list[list[str]]:
+        return [sorted(zipfile.ZipFile(path).namelist()) for path in self.members_path()]
+
+    def test_pack(self):
+        names = [self.volume.store(data=b"x", name=str(i)) for i in range(4)]
+
+        # The files stay in the pending folder until they are flushed
+        for name in names[:2]:
+            self.volume.compress(name, market="m", page_type="item")
+        self.assertEqual(sorted(os.listdir(self.volume.pending)), names)
+
+        self.volume.flush()
+        self.assertEqual(sorted(os.listdir(self.volume.pending)), names[2:])
+
+        # The zip file is full after one more, the next one starts a new zip file
+        self.assertEqual(self.volume.compress_many(names[2:], market="m", page_type="item"), names[2:])
+        self.assertEqual(os.listdir(self.volume.pending), [])
+        self.assertEqual(self.members(), [["0", "1", "2"], ["3"]])
+
+    def test_content_addressed(self):
+        name = self.volume.store(data=b"x", market="m", page_type="item")
+        self.assertEqual(self.volume.store(data=b"x", market="m", page_type="item"), name)
+
+        # Streamed files with the same content are dropped when closed
+        writer = self.volume.writer(market="m", page_type="item")
+        writer.write(b"x")
+        self.assertEqual(writer.close(), name)
+        self.assertFalse(writer.created)
+
+        self.assertEqual(os.listdir(self.volume.pending), [name])
+
+    def test_archived_content(self):
+        name = self.volume.store(data=b"x", market="m", page_type="item")
+        self.volume.compress_many([name], market="m", page_type="item")
+
+        # The content is archived, it is not written again
+        self.assertEqual(self.volume.store(data=b"x", market="m", page_type="item"), name)
+
+        writer = self.volume.writer(market="m", page_type="item")
+        writer.write(b"x")
+        self.assertEqual(writer.close(), name)
+        self.assertFalse(writer.created)
+        self.assertEqual(os.listdir(self.volume.pending), [])
+
+        # Archived again, e.g. the page was set back to pending and scraped
+        self.volume.store(data=b"x", name=name)
+        self.assertEqual(self.volume.compress_many([name, name], market="m", page_type="item"), [name])
+        self.assertEqual(os.listdir(self.volume.pending), [])
+        self.assertEqual(self.members(), [[name]])
+
+    @unittest.skipIf(archives.zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        self.volume.archive = "zstd"
+        self.volume._ZIP_MAX_FILES = 1000
+
+        pages = {
+            str(i): b"<html><body><div class='listing'>%d</div></body></html>" % i * 20
+            for i in range(200)
+        }
+        names = [self.volume.store(data=data, name=name) for name, data in pages.items()]
+        self.volume.compress_many(names, market="m", page_type="item")
+
+        # The pages are read back as they were stored, from the zip files or extracted
+        for name, data in pages.items():
+            self.assertEqual(self.volume.retrieve(name, market="m", page_type="item"), data)
+
+        self.volume.extract(market="m", page_type="item", keep_zip=False)
+        for name, data in pages.items():
+            self.assertEqual(self.volume.retrieve(name), data)
+
+    def test_retrieve_archived(self):
+        names = [self.volume.store(data=b"x%d" % i, name=str(i)) for i in range(4)]
+        self.volume.compress_many(names, market="m", page_type="item")
+        self.assertEqual(os.listdir(self.volume.pending), [])
+
+        # Read from the zip files, without extracting them
+        self.assertEqual(sorted(self.volume.archived(market="m")), names)
+        for i, name in enumerate(names):
+            self.assertEqual(self.volume.retrieve(name, market="m", page_type="item"), b"x%d" % i)
+
+        # The index is kept next to the zip files
+        self.assertTrue(os.path.isfile(self.volume.index("m", "item").path))
+
+    def test_codec(self):
+        # Content that looks like a zstd frame, in a zip file written with deflate
+        data = b"\x28\xb5\x2f\xfd" + b"x" * 100
+        name = self.volume.store(data=data, name="0")
+        self.volume.compress_many([name], market="m", page_type="item")
+
+        self.assertEqual(self.volume.retrieve(name, market="m", page_type="item"), data)
+        with archives.Archive(self.members_path()[0]) as archive:
+            self.assertEqual(archive.read(name), data)
+
+    def test_combine(self):
+        self.volume._ZIP_MAX_FILES = 2
+        names = [self.volume.store(data=b"x%d" % i * 100, name=str(i)) for i in range(5)]
+        self.volume.compress_many(names, market="m", page_type="item")
+
+        crcs = {}
+        for path in self.members_path():
+            with zipfile.ZipFile(path) as zf:
+                crcs.update({info.filename: info.CRC for info in zf.infolist()})
+
+        # The files are copied compressed into the first zip file, the others removed
+        combined = self.volume.combine(market="m", page_type="item")
+        self.assertEqual(self.members_path(), [combined])
+        with zipfile.ZipFile(combined) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(sorted(zf.namelist()), names)
+            self.assertEqual({info.filename: info.CRC for info in zf.infolist()}, crcs)
+
+        # Read from the combined zip file
+        index = self.volume.index("m", "item")
+        self.assertEqual({index._entry(name)[0] for name in names}, {os.path.basename(combined)})
+        self.assertEqual(self.volume.retrieve("4", market="m", page_type="item"), b"x4" * 100)
+
+        # Extracted in parallel
+        self.volume.extract(market="m", page_type="item", processes=2)
+        self.assertEqual(sorted(os.listdir(self.volume.pending)), names)
+        self.assertEqual(self.volume.retrieve("4"), b"x4" * 100)
+
+        # Nothing to combine
+        self.assertIsNone(self.volume.combine(market="x"))
+
+    @unittest.skipIf(archives.zstandard is None, "zstandard is not installed")
+    def test_combine_zstd(self):
+        self.volume._ZIP_MAX_FILES = 100
+
+        # The members of the zip files with another dictionary are compressed again
+        for formats in [["zstd", "zip"], ["zip", "zstd"]]:
+            with self.subTest(formats=formats):
+                pages = {}
+                for archive in formats:
+                    self.volume.archive = archive
+                    batch = {
+                        f"{archive}{i}": b"<div class='%s'>%d</div>" % (archive.encode(), i) * 20
+                        for i in range(120)
+                    }
+                    names = [self.volume.store(data=d, name=n) for n, d in batch.items()]
+                    self.volume.compress_many(names, market="m", page_type="item")
+                    pages.update(batch)
+
+                combined = self.volume.combine(market="m", page_type="item")
+                self.assertEqual(self.members_path(), [combined])
+                with archives.Archive(combined) as archive:
+                    self.assertEqual(archive.zstd, formats[0] == "zstd")
+                with zipfile.ZipFile(combined) as zf:
+                    self.assertIsNone(zf.testzip())
+
+                for name, data in pages.items():
+                    self.assertEqual(self.volume.retrieve(name, market="m", page_type="item"), data)
+
+                os.remove(combined)
+
+    def test_raw_writer_zip64(self):
+        path = os.path.join(self.tmp.name, "raw.zip")
+        data = {f"é{i}": b"x%d" % i * 100 for i in range(3)}
+
+        # Every size and offset over the limit, written in the zip64 records
+        with mock.patch.object(zipfile, "ZIP64_LIMIT", 16):
+            with archives.RawZipWriter(path) as writer:
+                for name, content in data.items():
+                    writer.writestr(name, content)
+
+        with zipfile.ZipFile(path) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual({name: zf.read(name) for name in zf.namelist()}, data)